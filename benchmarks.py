@@ -0,0 +1,487 @@
+"""
+Mediciones de rendimiento de la agenda.
+
+Uso:
+    python benchmarks.py sentencias [--repeticiones N]
+    python benchmarks.py arranque [--repeticiones N] [--presupuesto-importacion S]
+                                  [--presupuesto-ventana S]
+    python benchmarks.py escala [--tamanos 10000,100000,1000000] [--salida X.json]
+                                [--comparar ANTERIOR.json] [--perfil rapido]
+
+Cada medición trabaja sobre una base de datos temporal, nunca sobre base_datos.db.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter, strftime
+
+from main import Comunicacion, Exportador
+
+
+def crear_base_temporal(directorio, **opciones):
+    """
+    Crea una base de datos vacía en un directorio temporal.
+
+    Args:
+        directorio (str): El directorio donde crear el archivo.
+        opciones: Argumentos extra para Comunicacion.
+
+    Devuelve:
+        Comunicacion: Una conexión a la base de datos nueva, con el esquema creado.
+    """
+    ruta = os.path.join(directorio, "bench.db")
+    return Comunicacion(ruta, avisar=lambda *aviso: None, **opciones)
+
+
+def medir(operacion, repeticiones):
+    """
+    Mide el tiempo medio de una operación.
+
+    Args:
+        operacion (callable): Recibe el número de repetición (desde 0).
+        repeticiones (int): Cuántas veces ejecutarla.
+
+    Devuelve:
+        float: Microsegundos por operación.
+    """
+    inicio = perf_counter()
+    for i in range(repeticiones):
+        operacion(i)
+    return (perf_counter() - inicio) / repeticiones * 1e6
+
+
+def _texto(valor):
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def bench_sentencias(repeticiones):
+    """
+    Compara sentencias armadas con texto contra las sentencias parametrizadas.
+
+    Con texto cada valor produce una sentencia distinta que SQLite vuelve a
+    analizar y planificar; las sentencias fijas de Comunicacion.SENTENCIAS se
+    preparan una vez y se toman de la caché. La variante "sin caché" usa las
+    mismas sentencias con cached_statements=0 para aislar el efecto de la caché.
+    Las escrituras corren dentro de una transacción para no medir fsync.
+
+    Args:
+        repeticiones (int): Operaciones por medición.
+
+    Devuelve:
+        dict: Microsegundos por operación, por operación y variante.
+    """
+    sentencias = Comunicacion.SENTENCIAS
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        base = crear_base_temporal(directorio)
+        sin_cache = Comunicacion(base.ruta, avisar=base.avisar, cache_sentencias=0)
+        base.inserta_datos_lote(
+            (f"contacto{i:07d}", 30, f"c{i}@ejemplo.com", i)
+            for i in range(repeticiones)
+        )
+
+        def insertar_texto(i):
+            base.conexion.execute(
+                "INSERT INTO datos (NOMBRE, EDAD, CORREO, TELEFONO, CREADO) VALUES "
+                f"({_texto(f'nuevo{i}')}, 30, {_texto(f'n{i}@ejemplo.com')}, {i}, "
+                "CAST(strftime('%s', 'now') AS INTEGER))"
+            )
+
+        def insertar(conexion):
+            return lambda i: conexion.execute(
+                sentencias["insertar"], (f"nuevo{i}", 30, f"n{i}@ejemplo.com", i)
+            )
+
+        def actualizar_texto(i):
+            base.conexion.execute(
+                f"UPDATE datos SET NOMBRE={_texto(f'editado{i}')}, EDAD=40, "
+                f"CORREO={_texto(f'e{i}@ejemplo.com')}, TELEFONO={i} WHERE ID={i + 1}"
+            )
+
+        def actualizar(conexion):
+            return lambda i: conexion.execute(
+                sentencias["actualizar"],
+                (f"editado{i}", 40, f"e{i}@ejemplo.com", i, i + 1),
+            )
+
+        def buscar_texto(i):
+            desde = f"contacto{i:07d}"
+            hasta = desde[:-1] + chr(ord(desde[-1]) + 1)
+            base.conexion.execute(
+                "SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos "
+                f"WHERE NOMBRE >= {_texto(desde)} COLLATE NOCASE "
+                f"AND NOMBRE < {_texto(hasta)} COLLATE NOCASE "
+                "ORDER BY NOMBRE COLLATE NOCASE"
+            ).fetchall()
+
+        def buscar(conexion):
+            def operacion(i):
+                desde = f"contacto{i:07d}"
+                hasta = desde[:-1] + chr(ord(desde[-1]) + 1)
+                conexion.execute(
+                    sentencias["buscar_prefijo"], (desde, hasta, -1)
+                ).fetchall()
+
+            return operacion
+
+        casos = {
+            "insertar": (insertar_texto, insertar),
+            "actualizar": (actualizar_texto, actualizar),
+            "buscar": (buscar_texto, buscar),
+        }
+        for nombre, (con_texto, parametrizada) in casos.items():
+            variantes = (
+                ("texto", base.conexion, con_texto),
+                ("sin_cache", sin_cache.conexion, parametrizada(sin_cache.conexion)),
+                ("parametrizada", base.conexion, parametrizada(base.conexion)),
+            )
+            resultados[nombre] = {}
+            for variante, conexion, operacion in variantes:
+                resultados[nombre][variante] = medir(operacion, repeticiones)
+                conexion.commit()
+        sin_cache.conexion.close()
+        base.conexion.close()
+    return resultados
+
+
+def mostrar_sentencias(resultados):
+    print(
+        f"{'operación':<12}{'texto':>12}{'sin caché':>12}"
+        f"{'parametr.':>12}{'ahorro':>10}"
+    )
+    for nombre, tiempos in resultados.items():
+        ahorro = 1 - tiempos["parametrizada"] / tiempos["texto"]
+        print(
+            f"{nombre:<12}{tiempos['texto']:>10.1f}µs{tiempos['sin_cache']:>10.1f}µs"
+            f"{tiempos['parametrizada']:>10.1f}µs{ahorro:>10.0%}"
+        )
+
+
+# Se ejecuta en un proceso nuevo para medir un arranque en frío real.
+SCRIPT_ARRANQUE = """
+import json, resource, time
+from tkinter import TclError
+inicio = time.perf_counter()
+import main
+importacion = time.perf_counter() - inicio
+ventana = None
+try:
+    raiz = main.Tk()
+except TclError:  # sin pantalla
+    pass
+else:
+    inicio = time.perf_counter()
+    app = main.Ventana(raiz)
+    raiz.update()
+    ventana = time.perf_counter() - inicio
+    app.cerrar()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"importacion": importacion, "ventana": ventana, "rss_kb": rss}))
+"""
+
+
+def bench_arranque(repeticiones):
+    """
+    Mide el arranque en frío: el import de main y el primer dibujo de Ventana.
+
+    Cada repetición corre en un proceso nuevo, dentro de un directorio temporal
+    para que Ventana cree su propia base de datos vacía. Si no hay pantalla
+    disponible solo se mide el import.
+
+    Args:
+        repeticiones (int): Cuántos procesos lanzar.
+
+    Devuelve:
+        dict: Las medianas de importacion y ventana (segundos, o None) y el
+        máximo de rss_kb.
+    """
+    directorio_repo = os.path.dirname(os.path.abspath(__file__))
+    entorno = dict(os.environ, PYTHONPATH=directorio_repo)
+    mediciones = []
+    for _ in range(repeticiones):
+        with tempfile.TemporaryDirectory() as directorio:
+            salida = subprocess.run(
+                [sys.executable, "-c", SCRIPT_ARRANQUE],
+                cwd=directorio,
+                env=entorno,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        mediciones.append(json.loads(salida.stdout.splitlines()[-1]))
+    ventanas = [m["ventana"] for m in mediciones if m["ventana"] is not None]
+    return {
+        "importacion": statistics.median(m["importacion"] for m in mediciones),
+        "ventana": statistics.median(ventanas) if ventanas else None,
+        "rss_kb": max(m["rss_kb"] for m in mediciones),
+    }
+
+
+def revisar_arranque(resultado, presupuesto_importacion, presupuesto_ventana):
+    """
+    Muestra la medición de arranque y la compara con el presupuesto.
+
+    Args:
+        resultado (dict): Lo devuelto por bench_arranque.
+        presupuesto_importacion (float): Segundos máximos para importar main.
+        presupuesto_ventana (float): Segundos máximos hasta el primer dibujo.
+
+    Devuelve:
+        bool: True si el arranque está dentro del presupuesto.
+    """
+    dentro = True
+    for clave, presupuesto in (
+        ("importacion", presupuesto_importacion),
+        ("ventana", presupuesto_ventana),
+    ):
+        valor = resultado[clave]
+        if valor is None:
+            print(f"{clave:<12} sin pantalla, no se mide")
+            continue
+        estado = "ok" if valor <= presupuesto else "EXCEDIDO"
+        dentro = dentro and valor <= presupuesto
+        print(
+            f"{clave:<12}{valor * 1000:>8.0f} ms  (presupuesto {presupuesto * 1000:.0f} ms) {estado}"
+        )
+    print(f"{'memoria':<12}{resultado['rss_kb'] / 1024:>8.1f} MB")
+    return dentro
+
+
+NOMBRES = (
+    "ana", "bruno", "carla", "diego", "elena", "facundo", "gabriela", "hugo",
+    "irene", "juan", "karina", "lucas", "maria", "nicolas", "olga", "pablo",
+    "quimey", "romina", "santiago", "tamara", "ulises", "valeria", "walter",
+    "ximena", "yanina", "zoe",
+)  # fmt: skip
+APELLIDOS = (
+    "acosta", "benitez", "castro", "dominguez", "fernandez", "gomez", "herrera",
+    "ibarra", "juarez", "lopez", "martinez", "navarro", "ortiz", "perez",
+    "quiroga", "rodriguez", "sosa", "torres", "vega", "zapata",
+)  # fmt: skip
+DOMINIOS = ("gmail.com", "hotmail.com", "yahoo.com.ar", "outlook.com", "utn.edu.ar")
+
+
+def generar_contactos(cantidad, semilla=2023):
+    """
+    Genera contactos sintéticos válidos, siempre los mismos para la misma semilla.
+
+    Args:
+        cantidad (int): Cuántos contactos generar.
+        semilla (int): La semilla del generador aleatorio.
+
+    Devuelve:
+        Generador de tuplas (nombre, edad, correo, telefono).
+    """
+    azar = random.Random(semilla)
+    for i in range(cantidad):
+        nombre = azar.choice(NOMBRES)
+        apellido = azar.choice(APELLIDOS)
+        yield (
+            f"{nombre} {apellido} {i}",
+            azar.randint(18, 100),
+            f"{nombre}.{apellido}{i}@{azar.choice(DOMINIOS)}",
+            azar.randint(1100000000, 1199999999),
+        )
+
+
+def _tasa(cantidad, segundos):
+    return {
+        "cantidad": cantidad,
+        "segundos": segundos,
+        "por_segundo": cantidad / segundos,
+    }
+
+
+def medir_escala(tamano, semilla=2023, perfil=Comunicacion.PERFIL_POR_DEFECTO):
+    """
+    Mide las operaciones principales de Comunicacion sobre una base de `tamano` contactos.
+
+    Debe correr en un proceso propio para que el pico de memoria sea el de este tamaño.
+
+    Args:
+        tamano (int): La cantidad de contactos de la base.
+        semilla (int): La semilla del generador sintético.
+        perfil (str): El perfil de almacenamiento.
+
+    Devuelve:
+        dict: Una medición (cantidad, segundos, por_segundo) por operación, más
+        rss_pico_kb y bytes_por_contacto (la memoria de listar todo).
+    """
+    azar = random.Random(semilla)
+    resultado = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        # Sin caché de lecturas: se mide la base de datos, no la memoria.
+        base = crear_base_temporal(directorio, perfil=perfil, memoria_cache=0)
+
+        inicio = perf_counter()
+        base.inserta_datos_lote(generar_contactos(tamano, semilla), 10000)
+        resultado["insertar"] = _tasa(tamano, perf_counter() - inicio)
+
+        prefijos = [
+            f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)[:3]}" for _ in range(200)
+        ]
+        inicio = perf_counter()
+        for prefijo in prefijos:
+            base.buscar_datos_por_nombre(prefijo)
+        resultado["buscar_prefijo"] = _tasa(len(prefijos), perf_counter() - inicio)
+
+        cacheada = Comunicacion(base.ruta, avisar=base.avisar, perfil=perfil)
+        for prefijo in prefijos:
+            cacheada.buscar_datos_por_nombre(prefijo)
+        inicio = perf_counter()
+        for prefijo in prefijos:
+            cacheada.buscar_datos_por_nombre(prefijo)
+        resultado["buscar_repetida"] = _tasa(len(prefijos), perf_counter() - inicio)
+        cacheada.conexion.close()
+
+        ids = azar.sample(range(1, tamano + 1), min(1000, tamano))
+        contactos = list(generar_contactos(len(ids), semilla + 1))
+        inicio = perf_counter()
+        for ID, contacto in zip(ids, contactos):
+            base.actualiza_datos(ID, *contacto)
+        resultado["actualizar_por_id"] = _tasa(len(ids), perf_counter() - inicio)
+
+        inicio = perf_counter()
+        base.elimina_datos_lote(ids)
+        resultado["eliminar"] = _tasa(len(ids), perf_counter() - inicio)
+
+        inicio = perf_counter()
+        contactos = base.mostrar_datos()
+        filas = len(contactos)
+        resultado["listar_todo"] = _tasa(filas, perf_counter() - inicio)
+        resultado["bytes_por_contacto"] = sys.getsizeof(contactos) / max(filas, 1)
+        del contactos
+
+        try:
+            inicio = perf_counter()
+            filas = Exportador(base).exportar(os.path.join(directorio, "bench.xlsx"))
+            resultado["exportar_excel"] = _tasa(filas, perf_counter() - inicio)
+        except ImportError:
+            resultado["exportar_excel"] = None
+        base.conexion.close()
+    resultado["rss_pico_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return resultado
+
+
+def bench_escala(tamanos, semilla, perfil):
+    """
+    Corre medir_escala para cada tamaño, cada uno en un proceso nuevo.
+
+    Args:
+        tamanos (list): Las cantidades de contactos a medir.
+        semilla (int): La semilla del generador sintético.
+        perfil (str): El perfil de almacenamiento.
+
+    Devuelve:
+        dict: La corrida completa, lista para guardar como JSON.
+    """
+    corrida = {
+        "fecha": strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "perfil": perfil,
+        "semilla": semilla,
+        "resultados": {},
+    }
+    for tamano in tamanos:
+        with ProcessPoolExecutor(max_workers=1) as proceso:
+            medicion = proceso.submit(medir_escala, tamano, semilla, perfil).result()
+        corrida["resultados"][str(tamano)] = medicion
+    return corrida
+
+
+def mostrar_escala(corrida, anterior=None):
+    """
+    Muestra una corrida de bench_escala y, si se da, la compara con otra anterior.
+
+    Args:
+        corrida (dict): La corrida a mostrar.
+        anterior (dict): Una corrida previa leída de su JSON.
+
+    Devuelve:
+        Ninguno
+    """
+    for tamano, medicion in corrida["resultados"].items():
+        previa = (anterior or {}).get("resultados", {}).get(tamano, {})
+        linea = (
+            f"{int(tamano):,} contactos  (pico {medicion['rss_pico_kb'] / 1024:.0f} MB"
+        )
+        if "bytes_por_contacto" in medicion:
+            linea += f", {medicion['bytes_por_contacto']:.0f} bytes por contacto"
+        print(linea + ")")
+        for operacion, tasa in medicion.items():
+            if operacion in ("rss_pico_kb", "bytes_por_contacto"):
+                continue
+            if tasa is None:
+                print(f"  {operacion:<20}{'sin openpyxl':>14}")
+                continue
+            linea = f"  {operacion:<20}{tasa['por_segundo']:>14,.0f} /s"
+            if previa.get(operacion):
+                cambio = tasa["por_segundo"] / previa[operacion]["por_segundo"] - 1
+                linea += f"  {cambio:+.0%}"
+            print(linea)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    sentencias = comandos.add_parser(
+        "sentencias", help="Texto armado contra sentencias parametrizadas en caché."
+    )
+    sentencias.add_argument("--repeticiones", type=int, default=5000)
+    arranque = comandos.add_parser(
+        "arranque", help="Arranque en frío; falla si supera el presupuesto."
+    )
+    arranque.add_argument("--repeticiones", type=int, default=5)
+    arranque.add_argument("--presupuesto-importacion", type=float, default=0.5)
+    arranque.add_argument("--presupuesto-ventana", type=float, default=1.0)
+    escala = comandos.add_parser(
+        "escala", help="Operaciones principales sobre 10k/100k/1M contactos."
+    )
+    escala.add_argument("--tamanos", default="10000,100000,1000000")
+    escala.add_argument("--semilla", type=int, default=2023)
+    escala.add_argument(
+        "--perfil",
+        choices=sorted(Comunicacion.PERFILES),
+        default=Comunicacion.PERFIL_POR_DEFECTO,
+    )
+    escala.add_argument("--salida", default="bench_escala.json")
+    escala.add_argument("--comparar", help="JSON de una corrida anterior.")
+    argumentos = parser.parse_args(argumentos)
+
+    if argumentos.comando == "escala":
+        corrida = bench_escala(
+            [int(tamano) for tamano in argumentos.tamanos.split(",")],
+            argumentos.semilla,
+            argumentos.perfil,
+        )
+        anterior = None
+        if argumentos.comparar:
+            with open(argumentos.comparar, encoding="utf-8") as archivo:
+                anterior = json.load(archivo)
+        mostrar_escala(corrida, anterior)
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            json.dump(corrida, archivo, indent=2)
+    elif argumentos.comando == "sentencias":
+        mostrar_sentencias(bench_sentencias(argumentos.repeticiones))
+    elif argumentos.comando == "arranque":
+        dentro = revisar_arranque(
+            bench_arranque(argumentos.repeticiones),
+            argumentos.presupuesto_importacion,
+            argumentos.presupuesto_ventana,
+        )
+        return 0 if dentro else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,215 +1,4475 @@
 from tkinter import Tk, Button, Entry, Label, PhotoImage, ttk
-from tkinter import StringVar, Scrollbar, Frame, messagebox
-from time import strftime
-import pandas as pd
-import matplotlib.pyplot as plt
+from tkinter import StringVar, Scrollbar, Frame, messagebox, filedialog, font
+from tkinter import BooleanVar, Checkbutton, Toplevel
+from time import strftime, perf_counter, time
+import os
+from itertools import accumulate, islice
+import csv
+import gzip
+import shutil
+import sys
+import io
+import json
+import argparse
 import sqlite3
+import threading
+import queue
 import random
 import re
-from pydantic import BaseModel, EmailStr, Field, ValidationError
+import string
+import inspect
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, deque
+from functools import cache, wraps
+from typing import ClassVar, NamedTuple
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
+
+
+def avisar_con_dialogo(tipo, titulo, mensaje):
+    """
+    Muestra un aviso al usuario en un cuadro de diálogo de Tk.
+
+    Args:
+        tipo (str): "error" o "info".
+        titulo (str): El título del cuadro de diálogo.
+        mensaje (str): El texto a mostrar.
+
+    Devuelve:
+        Ninguno
+    """
+    if tipo == "error":
+        messagebox.showerror(titulo, mensaje)
+    else:
+        messagebox.showinfo(titulo, mensaje)
+
+
+class OperacionCancelada(Exception):
+    """
+    Se lanza cuando el usuario cancela una operación larga (exportación, importación).
+    """
+
+
+class Instrumentacion:
+    """
+    Junta tiempos y contadores para diagnosticar lentitudes sin un depurador.
+
+    Es opcional: la ventana la crea solo si está definida la variable de entorno
+    AGENDA_INSTRUMENTAR (con el archivo donde volcar los datos al cerrar), y la
+    línea de comandos con --instrumentar. Una misma instancia se comparte entre la
+    conexión de la ventana y la del hilo de base de datos.
+
+    Los métodos de las clases pasadas por medir_metodos() se cronometran cuando
+    su objeto tiene una instrumentación; si no, solo cuestan una llamada más. Las
+    sentencias SQL se siguen con set_trace_callback: cada una dura, en forma
+    aproximada, hasta que empieza la siguiente o termina el método que la ejecutó.
+
+    Args:
+        umbral_lento (float): Segundos a partir de los cuales una sentencia se
+            registra como lenta. Por defecto AGENDA_CONSULTA_LENTA_MS o 50 ms.
+        volcado (str): El archivo donde volcar los datos al cerrar, o None.
+
+    Atributos:
+        metodos (dict): Por método, [llamadas, segundos totales, segundos máximo].
+        lentas (dict): Por sentencia lenta, sin sus valores literales,
+            [veces, segundos totales, segundos máximo].
+        contadores (collections.Counter): Sentencias ejecutadas, filas leídas e
+            items insertados o reescritos en la tabla.
+    """
+
+    UMBRAL_LENTO = float(os.environ.get("AGENDA_CONSULTA_LENTA_MS", "50")) / 1000
+    LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+    def __init__(self, umbral_lento=UMBRAL_LENTO, volcado=None):
+        self.umbral_lento = umbral_lento
+        self.volcado = volcado
+        self.metodos = {}
+        self.lentas = {}
+        self.contadores = Counter()
+        self._candado = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def desde_entorno(cls):
+        """
+        Crea la instrumentación si la pide la variable de entorno AGENDA_INSTRUMENTAR.
+
+        Devuelve:
+            Instrumentacion: La instrumentación, o None si no está pedida.
+        """
+        volcado = os.environ.get("AGENDA_INSTRUMENTAR")
+        return cls(volcado=volcado) if volcado else None
+
+    @staticmethod
+    def medir_metodos(clase):
+        """
+        Envuelve los métodos de una clase para cronometrarlos cuando se pida.
+
+        Cada objeto decide con su atributo instrumentacion: si es None, el método
+        original se llama directamente.
+
+        Args:
+            clase (type): La clase a instrumentar.
+
+        Devuelve:
+            type: La misma clase.
+        """
+        for nombre, funcion in list(vars(clase).items()):
+            if nombre.startswith("__") or not inspect.isfunction(funcion):
+                continue
+            etiqueta = f"{clase.__name__}.{nombre}"
+            # Las filas se cuentan en los métodos públicos, no otra vez en los
+            # auxiliares privados que los implementan.
+            filas = not nombre.startswith("_")
+            if inspect.isgeneratorfunction(funcion):
+                envoltura = Instrumentacion._envolver_generador(
+                    etiqueta, funcion, filas
+                )
+            else:
+                envoltura = Instrumentacion._envolver(etiqueta, funcion, filas)
+            setattr(clase, nombre, envoltura)
+        return clase
+
+    @staticmethod
+    def _envolver(etiqueta, funcion, filas):
+        @wraps(funcion)
+        def metodo(self, *args, **kwargs):
+            instrumentacion = self.instrumentacion
+            if instrumentacion is None:
+                return funcion(self, *args, **kwargs)
+            inicio = perf_counter()
+            try:
+                resultado = funcion(self, *args, **kwargs)
+            finally:
+                instrumentacion.cerrar_sentencia()
+                instrumentacion.medir(etiqueta, perf_counter() - inicio)
+            if filas and isinstance(resultado, list):
+                instrumentacion.contar("filas_leidas", len(resultado))
+            return resultado
+
+        return metodo
+
+    @staticmethod
+    def _envolver_generador(etiqueta, funcion, filas):
+        # Solo cuenta el tiempo pasado dentro del generador, no el de quien lo consume.
+        @wraps(funcion)
+        def generador(self, *args, **kwargs):
+            instrumentacion = self.instrumentacion
+            if instrumentacion is None:
+                return (yield from funcion(self, *args, **kwargs))
+            iterador = funcion(self, *args, **kwargs)
+            segundos = 0.0
+            try:
+                while True:
+                    inicio = perf_counter()
+                    try:
+                        valor = next(iterador)
+                    except StopIteration as fin:
+                        return fin.value
+                    finally:
+                        instrumentacion.cerrar_sentencia()
+                        segundos += perf_counter() - inicio
+                    if filas and isinstance(valor, list):
+                        instrumentacion.contar("filas_leidas", len(valor))
+                    yield valor
+            finally:
+                iterador.close()
+                instrumentacion.medir(etiqueta, segundos)
+
+        return generador
+
+    def medir(self, etiqueta, segundos):
+        """
+        Suma una llamada cronometrada a las estadísticas de un método.
+
+        Args:
+            etiqueta (str): El nombre del método, por ejemplo "Comunicacion.mostrar_datos".
+            segundos (float): La duración de la llamada.
+
+        Devuelve:
+            Ninguno
+        """
+        with self._candado:
+            datos = self.metodos.setdefault(etiqueta, [0, 0.0, 0.0])
+            datos[0] += 1
+            datos[1] += segundos
+            datos[2] = max(datos[2], segundos)
+
+    def contar(self, contador, cantidad=1):
+        """
+        Suma una cantidad a un contador, por ejemplo "items_insertados".
+
+        Args:
+            contador (str): El nombre del contador.
+            cantidad (int): La cantidad a sumar.
+
+        Devuelve:
+            Ninguno
+        """
+        with self._candado:
+            self.contadores[contador] += cantidad
+
+    def rastrear(self, sentencia):
+        """
+        Callback para sqlite3.Connection.set_trace_callback.
+
+        Se llama al empezar cada sentencia; cierra la anterior del mismo hilo.
+
+        Args:
+            sentencia (str): El texto de la sentencia.
+
+        Devuelve:
+            Ninguno
+        """
+        self.cerrar_sentencia()
+        self._local.pendiente = (perf_counter(), sentencia)
+
+    def cerrar_sentencia(self):
+        """
+        Da por terminada la última sentencia del hilo y la registra si fue lenta.
+
+        Devuelve:
+            Ninguno
+        """
+        pendiente = getattr(self._local, "pendiente", None)
+        if pendiente is None:
+            return
+        self._local.pendiente = None
+        inicio, sentencia = pendiente
+        segundos = perf_counter() - inicio
+        lenta = segundos >= self.umbral_lento
+        if lenta:
+            # Sin los valores: no guarda datos personales y agrupa sentencias iguales.
+            sentencia = self.LITERALES.sub("?", " ".join(sentencia.split()))
+        with self._candado:
+            self.contadores["sentencias"] += 1
+            if lenta:
+                datos = self.lentas.setdefault(sentencia, [0, 0.0, 0.0])
+                datos[0] += 1
+                datos[1] += segundos
+                datos[2] = max(datos[2], segundos)
+
+    def resumen(self):
+        """
+        Arma una línea con los totales, para la barra de estado.
+
+        Devuelve:
+            str: El resumen.
+        """
+        with self._candado:
+            contadores = self.contadores.copy()
+            lentas = sum(datos[0] for datos in self.lentas.values())
+            maximo = max(self.metodos.items(), key=lambda par: par[1][2], default=None)
+        texto = (
+            f"Sentencias: {contadores['sentencias']} (lentas: {lentas})"
+            f" | Filas leídas: {contadores['filas_leidas']}"
+            f" | Items insertados: {contadores['items_insertados']}"
+            f" | Items reescritos: {contadores['items_reescritos']}"
+        )
+        if maximo is not None:
+            texto += f" | Más lento: {maximo[0]} {maximo[1][2] * 1000:.1f} ms"
+        return texto
+
+    def volcar(self, ruta=None):
+        """
+        Guarda todos los datos juntados en un archivo JSON.
+
+        Args:
+            ruta (str): El archivo destino. Por defecto el indicado en volcado.
+
+        Devuelve:
+            str: La ruta del archivo escrito.
+        """
+        ruta = ruta or self.volcado
+
+        def detalle(datos):
+            llamadas, total, maximo = datos
+            return {
+                "veces": llamadas,
+                "total_ms": round(total * 1000, 3),
+                "promedio_ms": round(total * 1000 / llamadas, 3),
+                "maximo_ms": round(maximo * 1000, 3),
+            }
+
+        with self._candado:
+            informe = {
+                "fecha": strftime("%Y-%m-%d %H:%M:%S"),
+                "umbral_lento_ms": self.umbral_lento * 1000,
+                "contadores": dict(self.contadores),
+                "metodos": {
+                    etiqueta: detalle(datos)
+                    for etiqueta, datos in sorted(
+                        self.metodos.items(), key=lambda par: -par[1][1]
+                    )
+                },
+                "sentencias_lentas": [
+                    {"sentencia": sentencia, **detalle(datos)}
+                    for sentencia, datos in sorted(
+                        self.lentas.items(), key=lambda par: -par[1][1]
+                    )
+                ],
+            }
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, ensure_ascii=False, indent=2)
+        return ruta
+
+
+class Contacto:
+    """
+    Un contacto de la agenda, con __slots__ para no cargar un diccionario por objeto.
+
+    Se puede recorrer e indexar como la tupla (ID, NOMBRE, EDAD, CORREO, TELEFONO)
+    que devuelve sqlite3, así que sirve donde antes se usaba la fila.
+
+    Args:
+        ID (int): El ID de la fila.
+        nombre (str): El nombre del usuario.
+        edad (int): La edad del usuario.
+        correo (str): El correo electrónico del usuario.
+        telefono (int): El número de teléfono del usuario.
+    """
+
+    __slots__ = ("ID", "nombre", "edad", "correo", "telefono")
+
+    def __init__(self, ID, nombre, edad, correo, telefono):
+        self.ID = ID
+        self.nombre = nombre
+        self.edad = edad
+        self.correo = correo
+        self.telefono = telefono
+
+    def valores(self):
+        """
+        Devuelve los datos que muestra la tabla en sus columnas.
+
+        Devuelve:
+            tuple: (edad, correo, telefono).
+        """
+        return (self.edad, self.correo, self.telefono)
+
+    def __iter__(self):
+        return iter((self.ID, self.nombre, self.edad, self.correo, self.telefono))
+
+    def __getitem__(self, posicion):
+        return tuple(self)[posicion]
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, otro):
+        if isinstance(otro, (Contacto, tuple)):
+            return tuple(self) == tuple(otro)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Contacto{tuple(self)!r}"
+
+
+class Contactos:
+    """
+    Un conjunto de contactos guardado por columnas, para resultados grandes.
+
+    ID, EDAD y TELEFONO se guardan en arrays de enteros y los nombres y correos
+    como un único bloque de bytes UTF-8 con el final de cada texto en un array,
+    así que no hay un objeto de Python por fila ni por dato. Los Contacto se
+    crean recién al leer cada posición.
+
+    Args:
+        filas (iterable): Tuplas (ID, NOMBRE, EDAD, CORREO, TELEFONO) iniciales.
+
+    Atributos:
+        ids (array.array): El ID de cada contacto, en orden.
+    """
+
+    def __init__(self, filas=()):
+        self.ids = array("q")
+        self.edades = array("h")
+        self.telefonos = array("q")
+        self.nombres = bytearray()
+        self.fin_nombres = array("q")
+        self.correos = bytearray()
+        self.fin_correos = array("q")
+        self._posiciones = None
+        self.extender(filas)
+
+    @classmethod
+    def desde_cursor(cls, cursor, tamano_bloque=5000):
+        """
+        Lee todas las filas de un cursor de a bloques, sin armar la lista de tuplas.
+
+        Args:
+            cursor (sqlite3.Cursor): Un cursor con (ID, NOMBRE, EDAD, CORREO,
+                TELEFONO) ya ejecutado. Se cierra al terminar.
+            tamano_bloque (int): La cantidad de filas leídas por vez.
+
+        Devuelve:
+            Contactos: Los contactos leídos.
+        """
+        contactos = cls()
+        try:
+            while filas := cursor.fetchmany(tamano_bloque):
+                contactos.extender(filas)
+        finally:
+            cursor.close()
+        return contactos
+
+    def extender(self, filas):
+        """
+        Agrega filas al final.
+
+        Args:
+            filas (iterable): Tuplas (ID, NOMBRE, EDAD, CORREO, TELEFONO).
+
+        Devuelve:
+            Ninguno
+        """
+        columnas = list(zip(*filas))
+        if columnas:
+            ids, nombres, edades, correos, telefonos = columnas
+            self.ids.extend(ids)
+            self.edades.extend(edades)
+            self.telefonos.extend(telefonos)
+            self._agregar_textos(self.nombres, self.fin_nombres, nombres)
+            self._agregar_textos(self.correos, self.fin_correos, correos)
+        self._posiciones = None
+
+    def buscar(self, ID):
+        """
+        Devuelve el contacto con un ID, o None si no está.
+
+        Args:
+            ID (int): El ID buscado.
+
+        Devuelve:
+            Contacto: El contacto, o None.
+        """
+        if self._posiciones is None:
+            self._posiciones = {ID: posicion for posicion, ID in enumerate(self.ids)}
+        posicion = self._posiciones.get(ID)
+        return None if posicion is None else self[posicion]
+
+    def filas(self):
+        """
+        Recorre los datos sin el ID, en el orden de las columnas exportadas.
+
+        Devuelve:
+            Iterador de tuplas (NOMBRE, EDAD, CORREO, TELEFONO).
+        """
+        return zip(*self.columnas())
+
+    def columnas(self):
+        """
+        Devuelve los datos por columna, sin el ID.
+
+        Devuelve:
+            tuple: (nombres, edades, correos, telefonos); los textos como listas y
+            los números como arrays.
+        """
+        return (
+            self._textos(self.nombres, self.fin_nombres),
+            self.edades,
+            self._textos(self.correos, self.fin_correos),
+            self.telefonos,
+        )
+
+    def copy(self):
+        """
+        Devuelve una copia independiente, como list.copy().
+
+        Devuelve:
+            Contactos: La copia.
+        """
+        copia = Contactos()
+        for atributo in (
+            "ids",
+            "edades",
+            "telefonos",
+            "nombres",
+            "fin_nombres",
+            "correos",
+            "fin_correos",
+        ):
+            getattr(copia, atributo).extend(getattr(self, atributo))
+        return copia
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, posicion):
+        if posicion < 0:
+            posicion += len(self.ids)
+        return Contacto(
+            self.ids[posicion],
+            self._texto(self.nombres, self.fin_nombres, posicion),
+            self.edades[posicion],
+            self._texto(self.correos, self.fin_correos, posicion),
+            self.telefonos[posicion],
+        )
+
+    def __iter__(self):
+        for posicion in range(len(self.ids)):
+            yield self[posicion]
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(
+            sys.getsizeof(columna)
+            for columna in (
+                self.ids,
+                self.edades,
+                self.telefonos,
+                self.nombres,
+                self.fin_nombres,
+                self.correos,
+                self.fin_correos,
+            )
+        )
+
+    @staticmethod
+    def _texto(datos, fines, posicion):
+        inicio = fines[posicion - 1] if posicion else 0
+        return datos[inicio : fines[posicion]].decode()
+
+    @staticmethod
+    def _agregar_textos(datos, fines, textos):
+        codificados = [texto.encode() for texto in textos]
+        fines.extend(
+            islice(accumulate(map(len, codificados), initial=len(datos)), 1, None)
+        )
+        datos += b"".join(codificados)
+
+    @staticmethod
+    def _textos(datos, fines):
+        inicio = 0
+        textos = []
+        for fin in fines:
+            textos.append(datos[inicio:fin].decode())
+            inicio = fin
+        return textos
+
+
+class CacheLecturas:
+    """
+    Guarda los resultados de las lecturas recientes de una Comunicacion.
+
+    Es un LRU con límite de memoria: al pasarse del límite se descartan las
+    entradas usadas hace más tiempo, y un resultado más grande que el límite no
+    se guarda. Las búsquedas por nombre recuerdan su texto y los IDs que
+    devolvieron, así que una escritura solo descarta las búsquedas que pudo
+    cambiar; los conteos, páginas y la tabla completa se descartan con cualquier
+    escritura. Las escrituras de otras conexiones (por ejemplo la del hilo de
+    base de datos) se detectan con PRAGMA data_version antes de cada lectura.
+
+    Args:
+        limite_bytes (int): La memoria aproximada máxima de los resultados guardados.
+
+    Atributos:
+        entradas (collections.OrderedDict): clave -> (valor, bytes, busqueda), de la
+            usada hace más tiempo a la más reciente. busqueda es None o una tupla
+            (texto, contiene, ids) para las búsquedas por nombre.
+        bytes (int): La memoria estimada de todas las entradas.
+        version (int): El último PRAGMA data_version visto.
+        aciertos (int): Lecturas respondidas desde la caché.
+        fallos (int): Lecturas que fueron a la base de datos.
+    """
+
+    MUESTRA = 100
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self.entradas = OrderedDict()
+        self.bytes = 0
+        self.version = None
+        self.aciertos = 0
+        self.fallos = 0
+
+    def leer(self, conexion, clave, leer, busqueda=None):
+        """
+        Devuelve el resultado guardado para una clave, o lo lee y lo guarda.
+
+        Args:
+            conexion (sqlite3.Connection): La conexión, para revisar data_version.
+            clave (tuple): Identifica la lectura, por ejemplo ("contar",).
+            leer (callable): Hace la lectura si no está guardada; no devuelve None.
+            busqueda (tuple): (texto, contiene) si es una búsqueda por nombre.
+
+        Devuelve:
+            El resultado. Las listas, diccionarios y Contactos se devuelven copiados, para
+            que quien los reciba pueda modificarlos sin cambiar la caché.
+        """
+        version = conexion.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self.limpiar()
+            self.version = version
+        if clave in self.entradas:
+            self.entradas.move_to_end(clave)
+            self.aciertos += 1
+            valor = self.entradas[clave][0]
+        else:
+            self.fallos += 1
+            valor = leer()
+            self._guardar(clave, valor, busqueda)
+        return valor.copy() if isinstance(valor, (list, dict, Contactos)) else valor
+
+    def invalidar(self, nombres=(), ids=()):
+        """
+        Descarta las entradas que pudo cambiar una escritura de esta conexión.
+
+        Args:
+            nombres (iterable): Los nombres insertados o nuevos de filas actualizadas.
+            ids (iterable): Los ID de filas actualizadas o eliminadas.
+
+        Devuelve:
+            Ninguno
+        """
+        nombres = [nombre.lower() for nombre in nombres]
+        ids = set(ids)
+        for clave, (_, tamano, busqueda) in list(self.entradas.items()):
+            if busqueda is not None:
+                texto, contiene, encontrados = busqueda
+                # lower() pliega al menos lo mismo que NOCASE y FTS5: ante la duda
+                # se descarta.
+                if contiene:
+                    afectada = any(texto in nombre for nombre in nombres)
+                else:
+                    afectada = any(nombre.startswith(texto) for nombre in nombres)
+                if not afectada and encontrados.isdisjoint(ids):
+                    continue
+            del self.entradas[clave]
+            self.bytes -= tamano
+
+    def limpiar(self):
+        """
+        Descarta todas las entradas.
+
+        Devuelve:
+            Ninguno
+        """
+        self.entradas.clear()
+        self.bytes = 0
+
+    def _guardar(self, clave, valor, busqueda):
+        tamano = self._estimar_bytes(valor)
+        if tamano > self.limite_bytes:
+            return
+        if busqueda is not None:
+            texto, contiene = busqueda
+            busqueda = (texto.lower(), contiene, frozenset(valor.ids))
+        self.entradas[clave] = (valor, tamano, busqueda)
+        self.bytes += tamano
+        while self.bytes > self.limite_bytes:
+            _, (_, tamano, _) = self.entradas.popitem(last=False)
+            self.bytes -= tamano
+
+    def _estimar_bytes(self, valor):
+        # Mide una muestra de filas y la extrapola: medir todas costaría tanto
+        # como la consulta.
+        if not isinstance(valor, list) or not valor:
+            return sys.getsizeof(valor)
+        muestra = valor[: self.MUESTRA]
+        por_fila = sum(
+            sys.getsizeof(fila) + sum(sys.getsizeof(dato) for dato in fila)
+            for fila in muestra
+        ) / len(muestra)
+        return sys.getsizeof(valor) + int(por_fila * len(valor))
+
+
+class EscrituraDiferida:
+    """
+    Junta las altas, ediciones y bajas de una Comunicacion para guardarlas juntas.
+
+    Cada operación se agrega a un diario en disco (una línea JSON por operación,
+    con flush() para que sobreviva a un cierre inesperado del programa) y se
+    combina en memoria con las anteriores del mismo ID: varias ediciones seguidas
+    quedan en la última, una edición de un alta pendiente sigue siendo un alta y
+    la baja de un alta pendiente la descarta. La Comunicacion guarda todo en una
+    sola transacción cuando vence el retardo, cuando se llega al límite, antes de
+    cualquier otra consulta y al cerrar. El diario no se sincroniza con fsync: un
+    corte de luz puede perder las ediciones del último retardo.
+
+    Las ediciones y bajas llevan la VERSION que tenía la fila al hacerse; al
+    guardarlas se descartan las de filas que otra conexión cambió mientras tanto,
+    así un diario viejo no pisa datos más nuevos. Mientras el diario está abierto
+    queda bloqueado, para que otra conexión no lo recupere como abandonado.
+
+    Args:
+        ruta (str): El archivo del diario.
+        retardo (float): Los segundos máximos que espera una operación pendiente.
+        limite (int): La cantidad de filas pendientes que fuerza el guardado.
+
+    Atributos:
+        pendientes (dict): ID -> operación combinada, una lista ["alta", ID, nombre,
+            edad, correo, telefono, creado], ["cambio", ID, nombre, edad, correo,
+            telefono, version] o ["baja", ID, version].
+        desde (float): El perf_counter() de la operación pendiente más antigua, o None.
+        al_vaciar (callable): Se llama sin argumentos después de cada guardado, o None.
+    """
+
+    def __init__(self, ruta, retardo=1.0, limite=500):
+        self.ruta = ruta
+        self.retardo = retardo
+        self.limite = limite
+        self.pendientes = {}
+        self.desde = None
+        self.al_vaciar = None
+        self._archivo = None
+
+    def registrar(self, operacion):
+        """
+        Anota una operación en el diario y la combina con las pendientes.
+
+        Args:
+            operacion (list): ["alta", ID, nombre, edad, correo, telefono, creado],
+                ["cambio", ID, nombre, edad, correo, telefono, version] o
+                ["baja", ID, version].
+
+        Devuelve:
+            bool: Si se llegó al límite y conviene guardar.
+        """
+        if self._archivo is None:
+            self._archivo = self._abrir()
+        self._archivo.write(json.dumps(operacion) + "\n")
+        self._archivo.flush()
+        self.combinar(self.pendientes, operacion)
+        if self.desde is None:
+            self.desde = perf_counter()
+        return len(self.pendientes) >= self.limite
+
+    def _abrir(self):
+        # Si otra conexión recuperó y borró el diario mientras se esperaba el
+        # bloqueo, el archivo abierto ya no es el de la ruta: se abre de nuevo.
+        while True:
+            archivo = open(self.ruta, "a", encoding="utf-8")
+            self.bloquear(archivo)
+            try:
+                if os.stat(self.ruta).st_ino == os.fstat(archivo.fileno()).st_ino:
+                    return archivo
+            except FileNotFoundError:
+                pass
+            archivo.close()
+
+    @staticmethod
+    def combinar(pendientes, operacion):
+        """
+        Combina una operación con la pendiente del mismo ID.
+
+        Args:
+            pendientes (dict): ID -> operación combinada; se modifica.
+            operacion (list): La operación nueva.
+
+        Devuelve:
+            Ninguno
+        """
+        tipo, ID = operacion[0], operacion[1]
+        anterior = pendientes.get(ID)
+        if tipo == "baja" and anterior is not None and anterior[0] == "alta":
+            del pendientes[ID]
+        elif tipo == "cambio" and anterior is not None and anterior[0] == "alta":
+            pendientes[ID] = ["alta", *operacion[1:6], anterior[6]]
+        elif tipo == "cambio" and anterior is not None and anterior[0] == "baja":
+            return
+        else:
+            pendientes[ID] = operacion
+
+    def estado(self, ID):
+        """
+        Dice cómo quedó un ID según las operaciones pendientes.
+
+        Args:
+            ID (int): El ID de la fila.
+
+        Devuelve:
+            tuple: (existe, version): existe es True si hay un alta o edición
+            pendiente y False si hay una baja; version es la VERSION de la fila al
+            empezar a editarla (None para un alta). None si el ID no tiene
+            operaciones pendientes.
+        """
+        operacion = self.pendientes.get(ID)
+        if operacion is None:
+            return None
+        if operacion[0] == "alta":
+            return True, None
+        return operacion[0] != "baja", operacion[-1]
+
+    def vence(self):
+        """
+        Devuelve los segundos que faltan para guardar, o None si no hay pendientes.
+        """
+        if self.desde is None:
+            return None
+        return max(0.0, self.desde + self.retardo - perf_counter())
+
+    def vaciado(self):
+        """
+        Olvida las operaciones pendientes y borra el diario, una vez guardadas.
+
+        Devuelve:
+            Ninguno
+        """
+        self.pendientes = {}
+        self.desde = None
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    @staticmethod
+    def bloquear(archivo, esperar=True):
+        """
+        Bloquea un archivo abierto hasta cerrarlo, con flock() o msvcrt.locking().
+
+        Args:
+            archivo (file): El archivo abierto.
+            esperar (bool): Si espera a que otro lo libere o falla enseguida.
+
+        Devuelve:
+            bool: Si se pudo bloquear.
+        """
+        archivo.seek(0)
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+
+            modo = msvcrt.LK_LOCK if esperar else msvcrt.LK_NBLCK
+            bloquear = lambda: msvcrt.locking(archivo.fileno(), modo, 1)
+        else:
+            modo = fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB
+            bloquear = lambda: fcntl.flock(archivo.fileno(), modo)
+        try:
+            bloquear()
+        except OSError:
+            return False
+        return True
+
+    @classmethod
+    def leer_diario(cls, archivo):
+        """
+        Lee un diario y combina sus operaciones.
+
+        Una última línea incompleta (el programa se cerró mientras la escribía) se
+        ignora.
+
+        Args:
+            archivo (file): El diario abierto para lectura.
+
+        Devuelve:
+            dict: ID -> operación combinada.
+        """
+        pendientes = {}
+        for linea in archivo:
+            try:
+                operacion = json.loads(linea)
+            except ValueError:
+                continue
+            cls.combinar(pendientes, operacion)
+        return pendientes
+
+    @classmethod
+    def recuperar(cls, ruta, guardar):
+        """
+        Guarda y borra el diario que dejó un cierre inesperado.
+
+        Un diario bloqueado es de una conexión que sigue abierta y todavía no lo
+        guardó: se deja como está.
+
+        Args:
+            ruta (str): El archivo del diario.
+            guardar (callable): Recibe las operaciones combinadas y las guarda.
+
+        Devuelve:
+            int: La cantidad de filas recuperadas.
+        """
+        try:
+            archivo = open(ruta, encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with archivo:
+            if not cls.bloquear(archivo, esperar=False):
+                return 0
+            pendientes = cls.leer_diario(archivo)
+            if pendientes:
+                guardar(pendientes.values())
+            try:
+                os.remove(ruta)
+                ruta = None
+            except PermissionError:
+                pass  # Windows no borra un archivo abierto: se borra al cerrarlo.
+        if ruta is not None:
+            os.remove(ruta)
+        return len(pendientes)
 
 
 class Comunicacion:
     """
-    Clase que maneja la comunicación con la base de datos.
+    Clase que maneja la comunicación con la base de datos.
+
+    Args: self
+
+    Atributos:
+        conexion (sqlite3.Connection): La conexión con la base de datos.
+        cursor (sqlite3.Cursor): El cursor para ejecutar las consultas SQL.
+        nombre (str): El nombre del usuario.
+        edad (str): La edad del usuario.
+        correo (str): El correo electrónico del usuario.
+        telefono (str): El número de teléfono del usuario.
+        fts_disponible (bool): Si existe el índice FTS5 para búsquedas "contiene".
+        ruta (str): La ruta del archivo de la base de datos.
+        avisar (callable): Función (tipo, titulo, mensaje) usada para avisar al usuario.
+            Por defecto muestra un cuadro de diálogo; el hilo de base de datos la
+            reemplaza para que los avisos se muestren desde el hilo de Tk.
+        SENTENCIAS (dict): Las sentencias SQL fijas y parametrizadas que usa la clase.
+            Como su texto no cambia con los valores, sqlite3 las prepara una sola vez
+            y las reutiliza desde su caché de sentencias.
+        CACHE_SENTENCIAS (int): El tamaño por defecto de esa caché.
+        PERFILES (dict): Los perfiles de almacenamiento ("seguro" o "rapido") con los
+            PRAGMA que aplica cada uno al abrir la conexión.
+        MIGRACIONES (tuple): Los métodos que llevan el esquema de una versión a la
+            siguiente; la versión actual se guarda en PRAGMA user_version.
+        perfil (str): El perfil de almacenamiento de la conexión.
+        instrumentacion (Instrumentacion): Junta tiempos de métodos y sentencias, o
+            None si no se pidió.
+        cache (CacheLecturas): Los resultados de lecturas recientes, o None si
+            memoria_cache es 0.
+        MEMORIA_CACHE (int): El límite por defecto, en bytes, de esa caché.
+        AHORA_MS (str): La expresión SQL del momento actual, en milisegundos desde
+            1970 (UTC), que usan los triggers del registro de cambios.
+        diferidas (EscrituraDiferida): Las escrituras diferidas pendientes, o None si
+            la conexión escribe en el momento.
+        DIFERIR_POR_DEFECTO (float): Los segundos de retardo de la escritura
+            diferida de la interfaz, de AGENDA_DIFERIR_MS, o None si no se pidió.
+        LIMITE_DIFERIDAS (int): Las filas pendientes que fuerzan el guardado.
+        RESERVA_IDS (int): Cuántos ID de AUTOINCREMENT se reservan de una vez para
+            las altas diferidas.
+    """
+
+    SENTENCIAS = {
+        "insertar": """INSERT INTO datos (NOMBRE, EDAD, CORREO, TELEFONO, CREADO)
+            VALUES (?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))""",
+        "actualizar": """UPDATE datos SET NOMBRE=?, EDAD=?, CORREO=?, TELEFONO=?
+            WHERE ID=?""",
+        "eliminar": "DELETE FROM datos WHERE ID=?",
+        "mostrar": "SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos",
+        "iterar": "SELECT NOMBRE, EDAD, CORREO, TELEFONO FROM datos ORDER BY ID",
+        "iterar_con_id": (
+            "SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos ORDER BY ID"
+        ),
+        "contar": "SELECT COUNT(*) FROM datos",
+        "estadisticas": "SELECT COUNT(*), MIN(EDAD), MAX(EDAD), AVG(EDAD) FROM datos",
+        # Plantillas de TablaVirtual: Vista completa las partes entre llaves con
+        # columnas de una lista fija, nunca con valores.
+        "contar_vista": "SELECT COUNT(*) FROM datos WHERE {condiciones}",
+        "pagina": """SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos
+            WHERE {condiciones} ORDER BY {orden} LIMIT ?""",
+        "ancla_en": """SELECT {claves} FROM datos
+            WHERE {condiciones} ORDER BY {orden} LIMIT 1 OFFSET ?""",
+        "buscar_prefijo": """SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos
+            WHERE NOMBRE >= ? COLLATE NOCASE AND NOMBRE < ? COLLATE NOCASE
+            ORDER BY NOMBRE COLLATE NOCASE LIMIT ?""",
+        "buscar_contiene": """SELECT datos.ID, datos.NOMBRE, datos.EDAD,
+            datos.CORREO, datos.TELEFONO FROM datos_fts JOIN datos ON datos.ID = datos_fts.rowid
+            WHERE datos_fts MATCH ? ORDER BY datos.NOMBRE COLLATE NOCASE LIMIT ?""",
+        "buscar_contiene_like": """SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO
+            FROM datos WHERE NOMBRE LIKE ? ESCAPE '\\'
+            ORDER BY NOMBRE COLLATE NOCASE LIMIT ?""",
+        # Las mismas condiciones que las búsquedas, sin límite, para borrar todo lo
+        # que coincide y no solo las filas que se muestran.
+        "contar_prefijo": """SELECT COUNT(*) FROM datos
+            WHERE NOMBRE >= ? COLLATE NOCASE AND NOMBRE < ? COLLATE NOCASE""",
+        "contar_contiene": "SELECT COUNT(*) FROM datos_fts WHERE datos_fts MATCH ?",
+        "contar_contiene_like": """SELECT COUNT(*) FROM datos
+            WHERE NOMBRE LIKE ? ESCAPE '\\'""",
+        "eliminar_prefijo": """DELETE FROM datos
+            WHERE NOMBRE >= ? COLLATE NOCASE AND NOMBRE < ? COLLATE NOCASE
+            RETURNING ID""",
+        "eliminar_contiene": """DELETE FROM datos WHERE ID IN
+            (SELECT rowid FROM datos_fts WHERE datos_fts MATCH ?) RETURNING ID""",
+        "eliminar_contiene_like": """DELETE FROM datos
+            WHERE NOMBRE LIKE ? ESCAPE '\\' RETURNING ID""",
+        "nombres": "SELECT ID, NOMBRE FROM datos ORDER BY NOMBRE COLLATE NOCASE",
+        "edades": "SELECT EDAD, COUNT(*) FROM datos GROUP BY EDAD",
+        # El dominio se escribe igual que Vista.DOMINIO para usar idx_datos_dominio.
+        "dominios": """SELECT substr(CORREO, instr(CORREO, '@') + 1) AS dominio,
+            COUNT(*) AS cantidad FROM datos GROUP BY dominio
+            ORDER BY cantidad DESC, dominio LIMIT ?""",
+        "fechas_alta": "SELECT CREADO FROM datos WHERE CREADO IS NOT NULL",
+        "sin_fecha_alta": "SELECT COUNT(*) FROM datos WHERE CREADO IS NULL",
+        "leer_ids": """SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos
+            WHERE ID IN (SELECT value FROM json_each(?))""",
+        "version_cambios": "SELECT VALOR FROM contador_cambios",
+        "contar_cambios": """SELECT (SELECT COUNT(*) FROM datos
+            WHERE VERSION > :desde AND VERSION <= :hasta)
+            + (SELECT COUNT(*) FROM datos_borrados
+            WHERE VERSION > :desde AND VERSION <= :hasta)""",
+        "cambios": """SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO, MODIFICADO, 0
+            FROM datos WHERE VERSION > ? AND VERSION <= ? ORDER BY VERSION""",
+        "bajas": """SELECT ID, NULL, NULL, NULL, NULL, BORRADO, 1 FROM datos_borrados
+            WHERE VERSION > ? AND VERSION <= ? ORDER BY VERSION""",
+        "marca_exportacion": "SELECT VERSION FROM marcas_exportacion WHERE NOMBRE=?",
+        "guardar_marca": """INSERT INTO marcas_exportacion (NOMBRE, VERSION, MOMENTO)
+            VALUES (?, ?, CAST(strftime('%s', 'now') AS INTEGER))
+            ON CONFLICT (NOMBRE) DO UPDATE
+            SET VERSION=excluded.VERSION, MOMENTO=excluded.MOMENTO""",
+        # Alta (ID NULL) o cambio de una fila existente, en una sola sentencia.
+        "sincronizar": """INSERT INTO datos (ID, NOMBRE, EDAD, CORREO, TELEFONO, CREADO)
+            VALUES (?, ?, ?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))
+            ON CONFLICT (ID) DO UPDATE SET NOMBRE=excluded.NOMBRE,
+            EDAD=excluded.EDAD, CORREO=excluded.CORREO, TELEFONO=excluded.TELEFONO""",
+        # Las bajas que ya exportaron todas las marcas no se vuelven a necesitar.
+        "podar_bajas": """DELETE FROM datos_borrados
+            WHERE VERSION <= (SELECT MIN(VERSION) FROM marcas_exportacion)""",
+        "version": "SELECT VERSION FROM datos WHERE ID=?",
+        "versiones": """SELECT ID, VERSION FROM datos
+            WHERE ID IN (SELECT value FROM json_each(?))""",
+        # Altas diferidas: el ID ya se reservó con reservar_ids.
+        "guardar_alta": """INSERT INTO datos (ID, NOMBRE, EDAD, CORREO, TELEFONO, CREADO)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+        "crear_secuencia": """INSERT INTO sqlite_sequence (name, seq)
+            SELECT 'datos', COALESCE((SELECT MAX(ID) FROM datos), 0)
+            WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name='datos')""",
+        "reservar_ids": """UPDATE sqlite_sequence SET seq = seq + ?
+            WHERE name='datos' RETURNING seq""",
+    }
+    CACHE_SENTENCIAS = 64
+    PLIEGUE_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+    MEMORIA_CACHE = 32 * 1024 * 1024
+    AHORA_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+    PERFILES = {
+        # Máxima durabilidad: cada commit se sincroniza completo con el disco.
+        "seguro": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "cache_size": -16000,
+            "mmap_size": 0,
+            "temp_store": "DEFAULT",
+        },
+        # Más velocidad: un corte de luz puede perder los últimos commits, pero no
+        # corrompe la base; más caché, mmap y temporales en memoria.
+        "rapido": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+    }
+    PERFIL_POR_DEFECTO = os.environ.get("AGENDA_PERFIL", "seguro")
+    DIFERIR_POR_DEFECTO = (
+        float(os.environ["AGENDA_DIFERIR_MS"]) / 1000
+        if os.environ.get("AGENDA_DIFERIR_MS")
+        else None
+    )
+    LIMITE_DIFERIDAS = 500
+    RESERVA_IDS = 100
+
+    def __init__(
+        self,
+        ruta="base_datos.db",
+        usar_fts=True,
+        avisar=avisar_con_dialogo,
+        cache_sentencias=CACHE_SENTENCIAS,
+        perfil=PERFIL_POR_DEFECTO,
+        instrumentacion=None,
+        memoria_cache=MEMORIA_CACHE,
+        diferir=None,
+    ):
+        self.ruta = ruta
+        self.avisar = avisar
+        self.instrumentacion = instrumentacion
+        self.cache = CacheLecturas(memoria_cache) if memoria_cache else None
+        self.diferidas = None
+        self._ids_reservados = iter(())
+        self._conexion = sqlite3.connect(ruta, cached_statements=cache_sentencias)
+        if instrumentacion is not None:
+            self.conexion.set_trace_callback(instrumentacion.rastrear)
+        self.cursor = self.conexion.cursor()
+        self.nombre = ""
+        self.edad = ""
+        self.correo = ""
+        self.telefono = ""
+        self.fts_disponible = False
+        self.aplicar_perfil(perfil)
+        self.migrar()
+        self.preparar_busqueda(usar_fts)
+        self.recuperar_diferidas()
+        if diferir is not None:
+            self.diferidas = EscrituraDiferida(
+                ruta + "-diferidas", diferir, self.LIMITE_DIFERIDAS
+            )
+
+    @property
+    def conexion(self):
+        # Cualquier consulta ve antes las escrituras diferidas: se guardan primero.
+        if self.diferidas is not None and self.diferidas.pendientes:
+            self.vaciar_diferidas()
+        return self._conexion
+
+    def vaciar_diferidas(self):
+        """
+        Guarda en una sola transacción las escrituras diferidas pendientes.
+
+        Si falla, avisa y las conserva (en memoria y en el diario) para volver a
+        intentarlo después del retardo.
+
+        Args:
+            self
+
+        Devuelve:
+            int: La cantidad de filas guardadas.
+        """
+        if self.diferidas is None or not self.diferidas.pendientes:
+            return 0
+        pendientes = self.diferidas.pendientes
+        try:
+            descartadas = self._guardar_operaciones(pendientes.values())
+        except (sqlite3.Error, OverflowError) as e:
+            self.diferidas.desde = perf_counter()
+            self.avisar("error", "Database Error", str(e))
+            return 0
+        self.diferidas.vaciado()
+        if descartadas:
+            self.avisar(
+                "info",
+                "Ediciones descartadas",
+                f"No se guardaron {descartadas} ediciones: otra conexión cambió "
+                "esas filas mientras tanto.",
+            )
+        if self.diferidas.al_vaciar is not None:
+            self.diferidas.al_vaciar()
+        return len(pendientes) - descartadas
+
+    def recuperar_diferidas(self):
+        """
+        Guarda las escrituras diferidas que dejó en el diario un cierre inesperado.
+
+        Se llama al abrir cualquier conexión, difiera o no sus escrituras. Las
+        ediciones de filas que cambiaron después de anotarse se descartan.
+
+        Args:
+            self
+
+        Devuelve:
+            int: La cantidad de filas recuperadas.
+        """
+        return EscrituraDiferida.recuperar(
+            self.ruta + "-diferidas", self._guardar_operaciones
+        )
+
+    def _guardar_operaciones(self, operaciones):
+        operaciones = list(operaciones)
+        altas, cambios, bajas, nombres, ids = [], [], [], [], []
+        with self._conexion:
+            # BEGIN IMMEDIATE: nadie cambia las filas entre leer sus VERSION y
+            # escribirlas.
+            self._conexion.execute("BEGIN IMMEDIATE")
+            versiones = dict(
+                self._conexion.execute(
+                    self.SENTENCIAS["versiones"],
+                    (json.dumps([operacion[1] for operacion in operaciones]),),
+                )
+            )
+            for operacion in operaciones:
+                tipo, ID = operacion[0], operacion[1]
+                if tipo == "alta":
+                    if ID in versiones:
+                        continue
+                    altas.append(operacion[1:])
+                    nombres.append(operacion[2])
+                    continue
+                if ID not in versiones or versiones[ID] != operacion[-1]:
+                    continue
+                if tipo == "cambio":
+                    cambios.append((*operacion[2:6], ID))
+                    nombres.append(operacion[2])
+                else:
+                    bajas.append((ID,))
+                ids.append(ID)
+            self._conexion.executemany(self.SENTENCIAS["guardar_alta"], altas)
+            self._conexion.executemany(self.SENTENCIAS["actualizar"], cambios)
+            self._conexion.executemany(self.SENTENCIAS["eliminar"], bajas)
+        if self.cache is not None:
+            self.cache.invalidar(nombres=nombres, ids=ids)
+        return len(operaciones) - len(altas) - len(cambios) - len(bajas)
+
+    def _diferir(self, operacion):
+        if self.diferidas.registrar(operacion):
+            self.vaciar_diferidas()
+
+    def _reservar_id(self):
+        # Las altas diferidas necesitan su ID antes de guardarse: se toma un bloque
+        # del contador de AUTOINCREMENT, así ninguna otra alta lo repite. Los ID
+        # que no se usen quedan como huecos, igual que las filas borradas.
+        nuevo_id = next(self._ids_reservados, None)
+        if nuevo_id is None:
+            with self._conexion:
+                self._conexion.execute(self.SENTENCIAS["crear_secuencia"])
+                hasta = self._conexion.execute(
+                    self.SENTENCIAS["reservar_ids"], (self.RESERVA_IDS,)
+                ).fetchone()[0]
+            self._ids_reservados = iter(range(hasta - self.RESERVA_IDS + 1, hasta + 1))
+            nuevo_id = next(self._ids_reservados)
+        return nuevo_id
+
+    def _estado(self, ID):
+        # (existe, version) de la fila contando las escrituras pendientes.
+        estado = self.diferidas.estado(ID)
+        if estado is None:
+            fila = self._conexion.execute(self.SENTENCIAS["version"], (ID,)).fetchone()
+            estado = (False, None) if fila is None else (True, fila[0])
+        return estado
+
+    def estado_cambios(self):
+        """
+        Anota el registro de cambios antes de reemplazar el contenido del archivo,
+        para seguirlo después con continuar_cambios().
+
+        Guarda el contador de cambios, las marcas de exportación y el contador de
+        AUTOINCREMENT, y los ID actuales en una tabla temporal de la conexión (las
+        tablas temporales no se reemplazan al restaurar).
+
+        Args:
+            self
+
+        Devuelve:
+            dict: "contador", "marcas" (filas de marcas_exportacion) y "secuencia".
+        """
+        self.conexion.execute("DROP TABLE IF EXISTS temp.ids_anteriores")
+        self.conexion.execute(
+            "CREATE TEMP TABLE ids_anteriores AS SELECT ID FROM datos"
+        )
+        secuencia = self.conexion.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name='datos'"
+        ).fetchone()
+        return {
+            "contador": self.version_cambios(),
+            "marcas": self.conexion.execute(
+                "SELECT NOMBRE, VERSION, MOMENTO FROM marcas_exportacion"
+            ).fetchall(),
+            "secuencia": secuencia[0] if secuencia else 0,
+        }
+
+    def continuar_cambios(self, estado):
+        """
+        Sigue el registro de cambios anotado con estado_cambios() después de que el
+        contenido del archivo se reemplazó, por ejemplo con un respaldo.
+
+        El contador no vuelve atrás, así que ningún número de cambio se repite.
+        Todas las filas toman un número de cambio nuevo y los ID que ya no existen
+        quedan como bajas; las marcas de exportación se conservan, así que la
+        próxima exportación incremental trae la tabla completa y las bajas que
+        deshizo el reemplazo. El contador de AUTOINCREMENT tampoco vuelve atrás.
+
+        Args:
+            self
+            estado (dict): Lo que devolvió estado_cambios().
+
+        Devuelve:
+            int: El número de cambio de las filas reemplazadas.
+        """
+        with self.conexion:
+            version = max(estado["contador"], self.version_cambios()) + 1
+            self.conexion.execute("UPDATE contador_cambios SET VALOR = ?", (version,))
+            self.conexion.execute("UPDATE datos SET VERSION = ?", (version,))
+            self.conexion.execute(
+                f"""INSERT OR REPLACE INTO datos_borrados (ID, BORRADO, VERSION)
+                SELECT ID, {self.AHORA_MS}, ? FROM temp.ids_anteriores
+                WHERE ID NOT IN (SELECT ID FROM datos)""",
+                (version,),
+            )
+            self.conexion.execute("DELETE FROM marcas_exportacion")
+            self.conexion.executemany(
+                "INSERT INTO marcas_exportacion (NOMBRE, VERSION, MOMENTO) VALUES (?, ?, ?)",
+                estado["marcas"],
+            )
+            self.conexion.execute(self.SENTENCIAS["crear_secuencia"])
+            self.conexion.execute(
+                "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name='datos'",
+                (estado["secuencia"],),
+            )
+        self.conexion.execute("DROP TABLE temp.ids_anteriores")
+        if self.cache is not None:
+            self.cache.limpiar()
+        return version
+
+    def recargar(self):
+        """
+        Prepara de nuevo la conexión después de que el contenido del archivo se
+        reemplazó por completo, por ejemplo al restaurar un respaldo.
+
+        Vuelve a aplicar el perfil, migra el esquema si es anterior, recrea el
+        índice FTS5 si se estaba usando y descarta la caché y los ID reservados.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.aplicar_perfil(self.perfil)
+        self.migrar()
+        self.preparar_busqueda(self.fts_disponible)
+        self._ids_reservados = iter(())
+        if self.cache is not None:
+            self.cache.limpiar()
+
+    def aplicar_perfil(self, perfil):
+        """
+        Configura la conexión con los PRAGMA de un perfil de almacenamiento.
+
+        Args:
+            self
+            perfil (str): "seguro" o "rapido".
+
+        Devuelve:
+            Ninguno
+
+        Lanza:
+            ValueError: Aparece cuando el perfil no existe.
+        """
+        if perfil not in self.PERFILES:
+            raise ValueError(f"Perfil de almacenamiento desconocido: {perfil}")
+        self.perfil = perfil
+        for pragma, valor in self.PERFILES[perfil].items():
+            self.conexion.execute(f"PRAGMA {pragma}={valor}")
+
+    def migrar(self):
+        """
+        Crea o actualiza el esquema de la base de datos hasta la última versión.
+
+        Cada migración pendiente corre en su propia transacción junto con el
+        cambio de PRAGMA user_version, así que una migración fallida no deja el
+        esquema a medias.
+
+        Args:
+            self
+
+        Devuelve:
+            int: La versión del esquema después de migrar.
+        """
+        version = self.conexion.execute("PRAGMA user_version").fetchone()[0]
+        for numero, migracion in enumerate(self.MIGRACIONES, start=1):
+            if numero <= version:
+                continue
+            self.conexion.execute("BEGIN")
+            try:
+                migracion(self)
+                self.conexion.execute(f"PRAGMA user_version={numero}")
+            except BaseException:
+                self.conexion.rollback()
+                raise
+            self.conexion.commit()
+            version = numero
+        return version
+
+    def _migracion_tabla_tipada(self):
+        # Versión 1: tabla datos con columnas tipadas (EDAD y TELEFONO INTEGER).
+        # Las bases anteriores tenían EDAD y TELEFONO NUMERIC; se copian las filas
+        # conservando los ID y el contador de AUTOINCREMENT.
+        crear = """CREATE TABLE {} (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            NOMBRE TEXT NOT NULL,
+            EDAD INTEGER NOT NULL,
+            CORREO TEXT NOT NULL,
+            TELEFONO INTEGER NOT NULL
+        )"""
+        existe = self.conexion.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='datos'"
+        ).fetchone()[0]
+        if not existe:
+            self.conexion.execute(crear.format("datos"))
+            return
+        secuencia = self.conexion.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name='datos'"
+        ).fetchone()
+        self.conexion.execute(crear.format("datos_tipada"))
+        self.conexion.execute(
+            """INSERT INTO datos_tipada (ID, NOMBRE, EDAD, CORREO, TELEFONO)
+            SELECT ID, NOMBRE, EDAD, CORREO, TELEFONO FROM datos"""
+        )
+        self.conexion.execute("DROP TABLE datos")
+        self.conexion.execute("ALTER TABLE datos_tipada RENAME TO datos")
+        if secuencia:
+            self.conexion.execute(
+                "UPDATE sqlite_sequence SET seq=max(seq, ?) WHERE name='datos'",
+                secuencia,
+            )
+
+    def _migracion_indice_nombre(self):
+        # Versión 2: índice NOCASE para las búsquedas por prefijo de nombre.
+        self.conexion.execute(
+            "CREATE INDEX IF NOT EXISTS idx_datos_nombre ON datos (NOMBRE COLLATE NOCASE)"
+        )
+
+    def _migracion_indices_vista(self):
+        # Versión 3: índices para ordenar y filtrar la tabla desde los encabezados.
+        for indice, columnas in (
+            ("idx_datos_edad", "EDAD"),
+            ("idx_datos_correo", "CORREO COLLATE NOCASE"),
+            ("idx_datos_telefono", "TELEFONO"),
+            ("idx_datos_dominio", Vista.DOMINIO),
+        ):
+            self.conexion.execute(
+                f"CREATE INDEX IF NOT EXISTS {indice} ON datos ({columnas})"
+            )
+        # Con estadísticas SQLite sabe cuándo un filtro por dominio es poco
+        # selectivo y conviene recorrer el índice del orden.
+        self.conexion.execute("ANALYZE")
+
+    def _migracion_fecha_alta(self):
+        # Versión 4: fecha de alta (segundos desde 1970, UTC) para el gráfico de
+        # crecimiento. Las filas anteriores quedan sin fecha (NULL).
+        self.conexion.execute("ALTER TABLE datos ADD COLUMN CREADO INTEGER")
+
+    def _migracion_cambios(self):
+        # Versión 5: registro de cambios para las exportaciones incrementales.
+        # Cada alta, edición o baja toma el siguiente número de contador_cambios;
+        # las filas guardan el último en VERSION y las bajas quedan en
+        # datos_borrados. Las filas anteriores quedan con VERSION 0.
+        for sentencia in (
+            "ALTER TABLE datos ADD COLUMN MODIFICADO INTEGER",
+            "ALTER TABLE datos ADD COLUMN VERSION INTEGER",
+            "UPDATE datos SET VERSION = 0, MODIFICADO = CREADO * 1000",
+            "CREATE INDEX idx_datos_version ON datos (VERSION)",
+            """CREATE TABLE datos_borrados (
+                ID INTEGER PRIMARY KEY,
+                BORRADO INTEGER NOT NULL,
+                VERSION INTEGER NOT NULL
+            )""",
+            "CREATE INDEX idx_datos_borrados_version ON datos_borrados (VERSION)",
+            "CREATE TABLE contador_cambios (VALOR INTEGER NOT NULL)",
+            "INSERT INTO contador_cambios (VALOR) VALUES (0)",
+            """CREATE TABLE marcas_exportacion (
+                NOMBRE TEXT PRIMARY KEY,
+                VERSION INTEGER NOT NULL,
+                MOMENTO INTEGER NOT NULL
+            )""",
+            f"""CREATE TRIGGER datos_cambio_alta AFTER INSERT ON datos BEGIN
+                UPDATE contador_cambios SET VALOR = VALOR + 1;
+                UPDATE datos SET MODIFICADO = {self.AHORA_MS},
+                    VERSION = (SELECT VALOR FROM contador_cambios)
+                    WHERE ID = new.ID;
+                DELETE FROM datos_borrados WHERE ID = new.ID;
+            END""",
+            f"""CREATE TRIGGER datos_cambio_edicion
+                AFTER UPDATE OF NOMBRE, EDAD, CORREO, TELEFONO ON datos BEGIN
+                UPDATE contador_cambios SET VALOR = VALOR + 1;
+                UPDATE datos SET MODIFICADO = {self.AHORA_MS},
+                    VERSION = (SELECT VALOR FROM contador_cambios)
+                    WHERE ID = new.ID;
+            END""",
+            f"""CREATE TRIGGER datos_cambio_baja AFTER DELETE ON datos BEGIN
+                UPDATE contador_cambios SET VALOR = VALOR + 1;
+                INSERT OR REPLACE INTO datos_borrados (ID, BORRADO, VERSION)
+                    VALUES (old.ID, {self.AHORA_MS},
+                    (SELECT VALOR FROM contador_cambios));
+            END""",
+        ):
+            self.conexion.execute(sentencia)
+
+    def _migracion_indices_orden(self):
+        # Versión 6: índices (columna de orden, ID, EDAD) y, por cada columna, uno
+        # que empieza por el dominio. Así ordenar con un filtro de dominio o de
+        # edad recorre un solo índice, sin B-tree temporal ni leer la tabla para
+        # ver la edad, y los saltos con OFFSET cuentan filas solo en el índice.
+        for indice, columnas in (
+            ("idx_datos_nombre", "NOMBRE COLLATE NOCASE, ID, EDAD"),
+            ("idx_datos_correo", "CORREO COLLATE NOCASE, ID, EDAD"),
+            ("idx_datos_telefono", "TELEFONO, ID, EDAD"),
+            (
+                "idx_datos_dominio_nombre",
+                f"{Vista.DOMINIO}, NOMBRE COLLATE NOCASE, ID, EDAD",
+            ),
+            (
+                "idx_datos_dominio_correo",
+                f"{Vista.DOMINIO}, CORREO COLLATE NOCASE, ID, EDAD",
+            ),
+            ("idx_datos_dominio_telefono", f"{Vista.DOMINIO}, TELEFONO, ID, EDAD"),
+            ("idx_datos_dominio_edad", f"{Vista.DOMINIO}, EDAD"),
+        ):
+            self.conexion.execute(f"DROP INDEX IF EXISTS {indice}")
+            self.conexion.execute(f"CREATE INDEX {indice} ON datos ({columnas})")
+        self.conexion.execute("ANALYZE datos")
+
+    MIGRACIONES = (
+        _migracion_tabla_tipada,
+        _migracion_indice_nombre,
+        _migracion_indices_vista,
+        _migracion_fecha_alta,
+        _migracion_cambios,
+        _migracion_indices_orden,
+    )
+
+    def preparar_busqueda(self, usar_fts=True):
+        """
+        Crea el índice de texto completo para las búsquedas "contiene", si se pide.
+
+        El índice NOCASE para las búsquedas por prefijo lo crea migrar(). Si
+        usar_fts es True y SQLite trae FTS5 con el tokenizador trigram, se crea la
+        tabla virtual datos_fts, sincronizada con datos por triggers. Es opcional,
+        por eso no forma parte de las migraciones.
+
+        Args:
+            self
+            usar_fts (bool): Si se debe crear y usar el índice FTS5.
+
+        Devuelve:
+            Ninguno
+        """
+        if not usar_fts:
+            return
+        cursor = self.conexion.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='datos_fts'"
+        )
+        existe = cursor.fetchone()[0]
+        try:
+            with self.conexion:
+                self.conexion.executescript("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS datos_fts USING fts5(
+                        NOMBRE, content='datos', content_rowid='ID', tokenize='trigram'
+                    );
+                    CREATE TRIGGER IF NOT EXISTS datos_fts_ai AFTER INSERT ON datos BEGIN
+                        INSERT INTO datos_fts (rowid, NOMBRE) VALUES (new.ID, new.NOMBRE);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS datos_fts_ad AFTER DELETE ON datos BEGIN
+                        INSERT INTO datos_fts (datos_fts, rowid, NOMBRE)
+                        VALUES ('delete', old.ID, old.NOMBRE);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS datos_fts_au AFTER UPDATE OF NOMBRE ON datos
+                    BEGIN
+                        INSERT INTO datos_fts (datos_fts, rowid, NOMBRE)
+                        VALUES ('delete', old.ID, old.NOMBRE);
+                        INSERT INTO datos_fts (rowid, NOMBRE) VALUES (new.ID, new.NOMBRE);
+                    END;
+                    """)
+                if not existe:
+                    cursor.execute(
+                        "INSERT INTO datos_fts (datos_fts) VALUES ('rebuild')"
+                    )
+        except sqlite3.OperationalError:
+            # SQLite sin FTS5 o sin el tokenizador trigram (anterior a 3.34).
+            self.fts_disponible = False
+        else:
+            self.fts_disponible = True
+        cursor.close()
+
+    class UserInput(BaseModel):
+        """
+        Clase que representa la entrada del usuario y proporciona métodos de validación.
+
+        La validación no muestra cuadros de diálogo: devuelve los errores como
+        diccionarios {"campo", "codigo", "mensaje"} para que quien la llama decida
+        cómo informarlos.
+
+        Args:
+            cls: La clase en sí.
+            nombre (str): El nombre del usuario.
+            edad (int): La edad del usuario.
+            correo (str): El correo electrónico del usuario.
+            telefono (int): El número de teléfono del usuario.
+
+        Atributos:
+            CAMPOS (tuple): Los nombres de los campos, en el orden de las filas.
+            MENSAJES (dict): El mensaje para el usuario de cada código de error.
+
+        Ejemplo:
+            ```
+            is_valid, resultado = UserInput.validate_input("Juan", 25, "juan@ejemplo.com", 1234567890)
+            if is_valid:
+                print(f"La entrada es válida: {resultado.nombre}")
+            si no:
+                print([error["codigo"] for error in resultado])
+            ```
+        """
+
+        nombre: str = Field(..., min_length=2)
+        edad: int = Field(..., ge=18, le=100)
+        correo: str
+        # Los enteros de SQLite son de 64 bits: un número más largo no se guarda.
+        telefono: int = Field(..., ge=0, le=2**63 - 1)
+
+        CAMPOS: ClassVar[tuple] = ("nombre", "edad", "correo", "telefono")
+        CORREO_SIMPLE: ClassVar[re.Pattern] = re.compile(
+            r"(?P<local>[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*)"
+            r"@(?P<dominio>(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+"
+            r"(?P<tld>[A-Za-z]{2,63}))"
+        )
+        DOMINIOS_RESERVADOS: ClassVar[frozenset] = frozenset(
+            ("arpa", "invalid", "local", "localhost", "onion", "test")
+        )
+        MENSAJES: ClassVar[dict] = {
+            "nombre_corto": "El Nombre debe tener mas de dos letras",
+            "nombre_invalido": "Nombre inválido",
+            "edad_fuera_de_rango": "Edad fuera de rango (18-100 Años)",
+            "edad_invalida": "Edad inválida",
+            "correo_invalido": "Correo inválido",
+            "telefono_invalido": "Telefono inválido",
+            "campo_faltante": "Falta un dato obligatorio",
+            "columnas": "Se esperaban 4 columnas",
+            "base_datos": "Error de base de datos",
+            "fila_repetida": "El correo o el teléfono ya aparece en otra fila",
+        }
+
+        @field_validator("correo")
+        @classmethod
+        def validar_correo(cls, correo):
+            """
+            Valida el correo con un camino rápido para las direcciones comunes.
+
+            Las direcciones ASCII simples (usuario@dominio.tld) se aceptan con una
+            expresión regular y el dominio en minúsculas, que es lo mismo que
+            devuelve email-validator para ellas. Cualquier otra se valida con
+            email-validator, igual que EmailStr.
+
+            Devuelve:
+                str: El correo normalizado.
+            """
+            simple = cls.CORREO_SIMPLE.fullmatch(correo)
+            if (
+                simple
+                and len(simple["local"]) <= 64
+                and len(correo) <= 254
+                and simple["tld"].lower() not in cls.DOMINIOS_RESERVADOS
+            ):
+                return f"{simple['local']}@{simple['dominio'].lower()}"
+            from pydantic.networks import validate_email
+
+            return validate_email(correo)[1]
+
+        @classmethod
+        def error(cls, campo, codigo, mensaje=None):
+            """
+            Arma un error estructurado.
+
+            Args:
+                campo (str): El campo con el error, o None si es de la fila entera.
+                codigo (str): Una clave de MENSAJES.
+                mensaje (str): Reemplaza el mensaje por defecto del código.
+
+            Devuelve:
+                dict: {"campo": campo, "codigo": codigo, "mensaje": mensaje}.
+            """
+            return {
+                "campo": campo,
+                "codigo": codigo,
+                "mensaje": mensaje or cls.MENSAJES[codigo],
+            }
+
+        @classmethod
+        def traducir_error(cls, detalle):
+            """
+            Convierte un error de pydantic (un elemento de ValidationError.errors()) a un error estructurado.
+
+            Args:
+                detalle (dict): El error de pydantic.
+
+            Devuelve:
+                dict: El error estructurado.
+            """
+            campo = next(
+                (parte for parte in detalle["loc"] if parte in cls.CAMPOS), None
+            )
+            tipo = detalle["type"]
+            if tipo == "missing":
+                codigo = "campo_faltante"
+            elif campo == "nombre":
+                codigo = (
+                    "nombre_corto" if tipo == "string_too_short" else "nombre_invalido"
+                )
+            elif campo == "edad":
+                if tipo in ("less_than_equal", "greater_than_equal"):
+                    codigo = "edad_fuera_de_rango"
+                else:
+                    codigo = "edad_invalida"
+            elif campo in ("correo", "telefono"):
+                codigo = f"{campo}_invalido"
+            else:
+                return cls.error(campo, "campo_faltante", detalle["msg"])
+            return cls.error(campo, codigo)
+
+        @classmethod
+        def validate_input(cls, nombre, edad, correo, telefono):
+            """
+            Valida la entrada del usuario para cada campo (nombre, edad, correo, teléfono), una sola vez.
+
+            Devuelve:
+                Tupla[bool, UserInput | list]: (True, instancia validada) o
+                (False, lista de errores estructurados).
+            """
+            try:
+                user_input = cls(
+                    nombre=nombre, edad=edad, correo=correo, telefono=telefono
+                )
+            except ValidationError as e:
+                return False, [cls.traducir_error(detalle) for detalle in e.errors()]
+            return True, user_input
+
+        @classmethod
+        def validar_lote(cls, filas):
+            """
+            Valida muchas filas con un único TypeAdapter(list[UserInput]), compilado una vez.
+
+            Si todas las filas son válidas se recorren una sola vez. Si alguna falla,
+            las válidas se vuelven a pasar juntas para obtener sus instancias.
+
+            Args:
+                filas (list): Tuplas (nombre, edad, correo, telefono).
+
+            Devuelve:
+                list: Un resultado por fila, con la misma forma que validate_input.
+            """
+            datos = [dict(zip(cls.CAMPOS, fila)) for fila in filas]
+            try:
+                return [
+                    (True, valida) for valida in adaptador_lote().validate_python(datos)
+                ]
+            except ValidationError as e:
+                errores = {}
+                for detalle in e.errors():
+                    errores.setdefault(detalle["loc"][0], []).append(
+                        cls.traducir_error(detalle)
+                    )
+            buenas = iter(
+                adaptador_lote().validate_python(
+                    [dato for indice, dato in enumerate(datos) if indice not in errores]
+                )
+            )
+            return [
+                (False, errores[indice]) if indice in errores else (True, next(buenas))
+                for indice in range(len(datos))
+            ]
+
+    def inserta_datos(self, nombre, edad, correo, telefono):
+        """
+        Inserta los datos en la base de datos si son válidos.
+        Args:
+            self
+            nombre (str): El nombre del usuario.
+            edad (int): La edad del usuario.
+            correo (str): El correo electrónico del usuario.
+            telefono (int): El número de teléfono del usuario.
+
+        Devuelve:
+            int: El ID de la fila insertada, o None si no se insertó. Con escritura
+            diferida el ID ya está reservado aunque la fila se guarde después.
+        """
+        nuevo_id = None
+        is_valid, resultado = self.UserInput.validate_input(
+            nombre, edad, correo, telefono
+        )
+        if is_valid:
+            try:
+                if self.diferidas is not None:
+                    nuevo_id = self._reservar_id()
+                    self._diferir(
+                        [
+                            "alta",
+                            nuevo_id,
+                            resultado.nombre,
+                            resultado.edad,
+                            resultado.correo,
+                            resultado.telefono,
+                            int(time()),
+                        ]
+                    )
+                else:
+                    cursor = self.conexion.cursor()
+
+                    bd = self.SENTENCIAS["insertar"]
+                    cursor.execute(
+                        bd,
+                        (
+                            resultado.nombre,
+                            resultado.edad,
+                            resultado.correo,
+                            resultado.telefono,
+                        ),
+                    )
+                    nuevo_id = cursor.lastrowid
+                    self.conexion.commit()
+                    cursor.close()
+                    if self.cache is not None:
+                        self.cache.invalidar(nombres=(resultado.nombre,))
+            except (sqlite3.Error, OverflowError) as e:
+                nuevo_id = None
+                self.avisar("error", "Database Error", str(e))
+            else:
+                self.avisar("info", "Success", "Ud. inserta datos")
+        else:
+            self.avisar_errores(resultado)
+        return nuevo_id
+
+    def avisar_errores(self, errores):
+        """
+        Informa al usuario los errores de validación de una fila.
+
+        Args:
+            self
+            errores (list): Los errores estructurados devueltos por UserInput.
+
+        Devuelve:
+            Ninguno
+        """
+        self.avisar("error", "Error", "\n".join(error["mensaje"] for error in errores))
+
+    def inserta_datos_lote(self, filas, tamano_lote=1000, cancelado=None, procesos=1):
+        """
+        Inserta muchas filas en la base de datos sin mostrar un diálogo por fila.
+
+        Cada fila se valida con UserInput; las válidas se insertan en bloques de
+        `tamano_lote` filas con executemany, usando una sola transacción por bloque.
+        Si un bloque falla, se deshace completo y sus filas se informan como rechazadas.
+
+        Con procesos > 1 la validación, que es la parte más lenta, se reparte entre
+        varios procesos: este hilo lee los bloques, los envía a un
+        ProcessPoolExecutor y los escribe en el orden del archivo a medida que
+        vuelven validados. Nunca hay más de dos bloques por proceso esperando, así
+        que la memoria no depende del tamaño del archivo. Si las filas entran en
+        un solo bloque se validan aquí, sin crear procesos.
+
+        Args:
+            self
+            filas (iterable): Tuplas (nombre, edad, correo, telefono).
+            tamano_lote (int): Cantidad de filas por transacción.
+            cancelado (threading.Event): Si se activa, la carga se detiene antes del
+                siguiente bloque; los bloques ya confirmados se conservan.
+            procesos (int): Cantidad de procesos que validan en paralelo.
+
+        Devuelve:
+            dict: {"aceptadas": int, "rechazadas": list, "cancelada": bool} donde cada
+            rechazada es una tupla (numero_fila, fila, errores) y errores es una lista
+            de errores estructurados de UserInput. Las filas se numeran desde 1 y
+            las rechazadas quedan en ese orden.
+        """
+        reporte = {"aceptadas": 0, "rechazadas": [], "cancelada": False}
+        bloques = self._bloques_validados(
+            enumerate(filas, start=1), tamano_lote, procesos
+        )
+        try:
+            for validas, rechazadas in bloques:
+                if cancelado is not None and cancelado.is_set():
+                    reporte["cancelada"] = True
+                    break
+                reporte["rechazadas"].extend(rechazadas)
+                self._escribir_lote(validas, reporte)
+        finally:
+            bloques.close()
+        # Los rechazos de validación y los de un bloque que falló al escribirse
+        # llegan por separado: el reporte se lee en el orden del archivo.
+        reporte["rechazadas"].sort(key=lambda rechazada: rechazada[0])
+        self._actualizar_estadisticas(reporte["aceptadas"])
+        return reporte
+
+    @staticmethod
+    def _bloques_validados(numeradas, tamano_lote, procesos):
+        primero = list(islice(numeradas, tamano_lote))
+        if procesos <= 1 or len(primero) < tamano_lote:
+            bloque = primero
+            while bloque:
+                yield validar_bloque(bloque)
+                bloque = list(islice(numeradas, tamano_lote))
+            return
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn y no fork: el proceso tiene otros hilos (Tk, el de base de datos).
+        grupo = ProcessPoolExecutor(
+            procesos, mp_context=multiprocessing.get_context("spawn")
+        )
+        pendientes = deque([grupo.submit(validar_bloque, primero)])
+        try:
+            while pendientes:
+                while len(pendientes) < 2 * procesos and (
+                    bloque := list(islice(numeradas, tamano_lote))
+                ):
+                    pendientes.append(grupo.submit(validar_bloque, bloque))
+                yield pendientes.popleft().result()
+        finally:
+            grupo.shutdown(cancel_futures=True)
+
+    def _escribir_lote(self, validas, reporte):
+        if not validas:
+            return
+        try:
+            with self.conexion:
+                self.conexion.executemany(
+                    self.SENTENCIAS["insertar"], [valores for _, _, valores in validas]
+                )
+        except (sqlite3.Error, OverflowError) as e:
+            error = [self.UserInput.error(None, "base_datos", str(e))]
+            reporte["rechazadas"].extend(
+                (numero, fila, error) for numero, fila, _ in validas
+            )
+        else:
+            reporte["aceptadas"] += len(validas)
+            if self.cache is not None:
+                self.cache.limpiar()
+
+    def _actualizar_estadisticas(self, cambiadas):
+        # El plan de las consultas de TablaVirtual sale de las estadísticas de
+        # ANALYZE; después de una carga que cambia al menos un décimo de la tabla
+        # (o en una base que estaba vacía) se recalculan.
+        if cambiadas and cambiadas * 10 >= self._contar_datos():
+            self.conexion.execute("ANALYZE datos")
+
+    def sincroniza_datos_lote(self, filas, tamano_lote=1000, cancelado=None):
+        """
+        Inserta o actualiza filas ya validadas, en una transacción por bloque.
+
+        Las filas con ID None se insertan; las demás reemplazan los datos de la
+        fila con ese ID, conservando su fecha de alta.
+
+        Args:
+            self
+            filas (iterable): Tuplas (ID, nombre, edad, correo, telefono).
+            tamano_lote (int): Cantidad de filas por transacción.
+            cancelado (threading.Event): Si se activa, se detiene antes del siguiente
+                bloque; los bloques ya confirmados se conservan.
+
+        Devuelve:
+            tuple: (filas guardadas, si se canceló).
+        """
+        bd = self.SENTENCIAS["sincronizar"]
+        guardadas = 0
+        filas = iter(filas)
+        try:
+            while bloque := list(islice(filas, tamano_lote)):
+                if cancelado is not None and cancelado.is_set():
+                    return guardadas, True
+                with self.conexion:
+                    self.conexion.executemany(bd, bloque)
+                guardadas += len(bloque)
+        finally:
+            if self.cache is not None and guardadas:
+                self.cache.limpiar()
+        self._actualizar_estadisticas(guardadas)
+        return guardadas, False
+
+    def mostrar_datos(self):
+        """
+        Recupera todos los datos de la base de datos.
+
+        Args:
+            self
+
+        Devuelve:
+            Contactos: Todos los contactos, guardados por columnas.
+        """
+        return self._leer(("mostrar",), self._mostrar_datos)
+
+    def _mostrar_datos(self):
+        cursor = self.conexion.cursor()
+        bd = self.SENTENCIAS["mostrar"]
+        cursor.execute(bd)
+        return Contactos.desde_cursor(cursor)
+
+    def iterar_datos(self, tamano_bloque=5000, con_id=False):
+        """
+        Recorre la tabla datos de a bloques con fetchmany, sin cargarla completa.
+
+        Args:
+            self
+            tamano_bloque (int): La cantidad de filas por bloque.
+            con_id (bool): Si cada fila empieza con su ID.
+
+        Devuelve:
+            Generador de listas de tuplas (NOMBRE, EDAD, CORREO, TELEFONO), o
+            (ID, NOMBRE, EDAD, CORREO, TELEFONO) si con_id es True.
+        """
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["iterar_con_id" if con_id else "iterar"])
+        try:
+            while filas := cursor.fetchmany(tamano_bloque):
+                yield filas
+        finally:
+            cursor.close()
+
+    def iterar_contactos(self, tamano_bloque=5000):
+        """
+        Recorre la tabla datos de a bloques, cada uno guardado por columnas.
+
+        Args:
+            self
+            tamano_bloque (int): La cantidad de filas por bloque.
+
+        Devuelve:
+            Generador de Contactos.
+        """
+        for filas in self.iterar_datos(tamano_bloque, con_id=True):
+            yield Contactos(filas)
+
+    def contar_datos(self, vista=None):
+        """
+        Cuenta las filas de la tabla datos, o las que pasan los filtros de una vista.
+
+        Args:
+            self
+            vista (Vista): Los filtros a aplicar; por defecto ninguno.
+
+        Devuelve:
+            int: La cantidad de contactos guardados.
+        """
+        if vista is None or not vista.filtrada():
+            return self._leer(("contar",), self._contar_datos)
+        return self._leer(
+            ("contar", vista.filtros()), lambda: self._contar_vista(vista)
+        )
+
+    def _contar_datos(self):
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["contar"])
+        total = cursor.fetchone()[0]
+        cursor.close()
+        return total
+
+    def _contar_vista(self, vista):
+        condiciones, valores = vista.condiciones()
+        bd = self.SENTENCIAS["contar_vista"].format(condiciones=condiciones)
+        return self.conexion.execute(bd, valores).fetchone()[0]
+
+    def estadisticas(self):
+        """
+        Calcula un resumen de la agenda con una sola consulta de agregación.
+
+        Args:
+            self
+
+        Devuelve:
+            dict: total, edad_minima, edad_maxima, edad_promedio y tamano_bytes
+            (el tamaño del archivo de la base de datos).
+        """
+        return self._leer(("estadisticas",), self._estadisticas)
+
+    def _estadisticas(self):
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["estadisticas"])
+        total, minima, maxima, promedio = cursor.fetchone()
+        paginas = cursor.execute("PRAGMA page_count").fetchone()[0]
+        tamano_pagina = cursor.execute("PRAGMA page_size").fetchone()[0]
+        cursor.close()
+        return {
+            "total": total,
+            "edad_minima": minima,
+            "edad_maxima": maxima,
+            "edad_promedio": round(promedio, 1) if promedio is not None else None,
+            "tamano_bytes": paginas * tamano_pagina,
+        }
+
+    def datos_graficos(self, dominios=10):
+        """
+        Calcula los datos de la ventana de estadísticas sin recorrer filas en Python.
+
+        Las edades y los dominios se agrupan en SQLite con GROUP BY sobre sus
+        índices. Las fechas de alta se leen como una sola columna y NumPy las
+        agrupa por mes.
+
+        Args:
+            self
+            dominios (int): La cantidad de dominios de correo más usados a devolver.
+
+        Devuelve:
+            dict: "decadas" (los bordes de cada década de edad), "por_decada" (los
+            contactos en cada una), "dominios" (lista de (dominio, cantidad)),
+            "meses" (datetime64[M]) y "acumulado" (los contactos al final de cada
+            mes, contando desde el comienzo los que no tienen fecha de alta), y
+            "sin_fecha".
+
+        Lanza:
+            ImportError: Aparece cuando NumPy no está instalado.
+        """
+        import numpy as np
+
+        cursor = self.conexion.cursor()
+        edades = np.array(
+            cursor.execute(self.SENTENCIAS["edades"]).fetchall(), dtype=np.int64
+        ).reshape(-1, 2)
+        decadas = np.arange(10, 111, 10)
+        por_decada, _ = np.histogram(edades[:, 0], bins=decadas, weights=edades[:, 1])
+        mas_usados = cursor.execute(self.SENTENCIAS["dominios"], (dominios,)).fetchall()
+        cursor.execute(self.SENTENCIAS["fechas_alta"])
+        creados = np.fromiter(
+            (fila[0] for fila in cursor), dtype="datetime64[s]"
+        ).astype("datetime64[M]")
+        meses, por_mes = np.unique(creados, return_counts=True)
+        sin_fecha = cursor.execute(self.SENTENCIAS["sin_fecha_alta"]).fetchone()[0]
+        cursor.close()
+        return {
+            "decadas": decadas,
+            "por_decada": por_decada.astype(np.int64),
+            "dominios": mas_usados,
+            "meses": meses,
+            "acumulado": sin_fecha + np.cumsum(por_mes),
+            "sin_fecha": sin_fecha,
+        }
+
+    def leer_pagina(self, ancla, cantidad, hacia_atras=False, vista=None):
+        """
+        Lee una página de filas vecina a otra usando paginación por clave (keyset).
+
+        No usa OFFSET: la consulta recorre el índice de la columna de orden desde
+        la clave (columna, ID) del ancla, así que su costo no depende de la
+        posición dentro de la tabla.
+
+        Args:
+            self
+            ancla (tuple): La fila a partir de la cual se lee (no se incluye).
+            cantidad (int): La cantidad máxima de filas a leer.
+            hacia_atras (bool): Si es True lee las filas anteriores al ancla.
+            vista (Vista): El orden y los filtros; por defecto por ID, sin filtros.
+
+        Devuelve:
+            Lista[Tupla]: Las filas (ID, NOMBRE, EDAD, CORREO, TELEFONO) en el orden
+            de la vista.
+        """
+        vista = vista or Vista()
+        clave = vista.clave(ancla)
+        return self._leer(
+            ("pagina", clave, cantidad, hacia_atras, vista),
+            lambda: self._leer_pagina(clave, cantidad, hacia_atras, vista),
+        )
+
+    def _leer_pagina(self, clave, cantidad, hacia_atras, vista, incluida=False):
+        condiciones, valores = vista.condiciones(
+            clave, adelante=not hacia_atras, incluida=incluida
+        )
+        bd = self.SENTENCIAS["pagina"].format(
+            condiciones=condiciones, orden=vista.orden_sql(not hacia_atras)
+        )
+        cursor = self.conexion.cursor()
+        cursor.execute(bd, valores + [cantidad])
+        datos = cursor.fetchall()
+        cursor.close()
+        if hacia_atras:
+            datos.reverse()
+        return datos
+
+    def leer_pagina_en(self, posicion, cantidad, vista=None, desde=None):
+        """
+        Lee una página de filas que empieza en una posición dada de la vista.
+
+        Se usa para saltos de la barra de desplazamiento. El OFFSET solo busca la
+        primera fila; como el orden sale de un índice que también tiene la edad,
+        SQLite cuenta las filas salteadas en el índice, sin leerlas de la tabla.
+        Si se conoce una fila más cercana que el comienzo, el OFFSET se cuenta
+        desde ella, así que arrastrar la barra solo recorre la distancia movida.
+        El resto de la página se lee como en leer_pagina.
+
+        Args:
+            self
+            posicion (int): La posición (desde 0) de la primera fila.
+            cantidad (int): La cantidad máxima de filas a leer.
+            vista (Vista): El orden y los filtros; por defecto por ID, sin filtros.
+            desde (tuple): (posición, fila) de una fila conocida de la vista, o None.
+
+        Devuelve:
+            Lista[Tupla]: Las filas (ID, NOMBRE, EDAD, CORREO, TELEFONO) en el orden
+            de la vista.
+        """
+        vista = vista or Vista()
+        return self._leer(
+            ("pagina_en", posicion, cantidad, vista),
+            lambda: self._leer_pagina_en(posicion, cantidad, vista, desde),
+        )
+
+    def _leer_pagina_en(self, posicion, cantidad, vista, desde=None):
+        clave, adelante, salto = None, True, posicion
+        if desde is not None and abs(posicion - desde[0]) < posicion:
+            adelante = posicion >= desde[0]
+            clave, salto = vista.clave(desde[1]), abs(posicion - desde[0])
+        condiciones, valores = vista.condiciones(clave, adelante, incluida=True)
+        bd = self.SENTENCIAS["ancla_en"].format(
+            claves=", ".join(vista.claves()),
+            condiciones=condiciones,
+            orden=vista.orden_sql(adelante),
+        )
+        clave = self.conexion.execute(bd, valores + [salto]).fetchone()
+        if clave is None:
+            return []
+        return self._leer_pagina(clave, cantidad, False, vista, incluida=True)
+
+    def elimina_datos(self, ID):
+        """
+        Elimina datos de la base de datos basándose en el ID.
+
+        Args:
+            self
+            ID (int): El ID de los datos.
+
+        Devuelve:
+            int: El número de filas eliminadas.
+        """
+        if self.diferidas is not None:
+            existe, version = self._estado(ID)
+            if existe:
+                self._diferir(["baja", ID, version])
+            return int(existe)
+        cursor = self.conexion.cursor()
+        bd = self.SENTENCIAS["eliminar"]
+        cursor.execute(bd, (ID,))
+        dato = cursor.rowcount
+        self.conexion.commit()
+        cursor.close()
+        if self.cache is not None:
+            self.cache.invalidar(ids=(ID,))
+        return dato
+
+    def fusiona_datos(self, completadas, eliminar):
+        """
+        Guarda las filas completadas de una fusión y elimina las demás, en una sola
+        transacción.
+
+        Args:
+            self
+            completadas (list): Tuplas (ID, nombre, edad, correo, telefono) de las
+                filas conservadas.
+            eliminar (list): Los ID de las filas a eliminar.
+
+        Devuelve:
+            int: El número de filas eliminadas.
+        """
+        with self.conexion:
+            self.conexion.executemany(
+                self.SENTENCIAS["actualizar"],
+                [(*fila[1:], fila[0]) for fila in completadas],
+            )
+            cursor = self.conexion.executemany(
+                self.SENTENCIAS["eliminar"], ((ID,) for ID in eliminar)
+            )
+        if self.cache is not None:
+            self.cache.limpiar()
+        return cursor.rowcount
+
+    def elimina_datos_lote(self, ids):
+        """
+        Elimina varias filas de la base de datos en una sola transacción.
+
+        Args:
+            self
+            ids (iterable): Los ID de las filas a eliminar.
+
+        Devuelve:
+            int: El número de filas eliminadas.
+        """
+        bd = self.SENTENCIAS["eliminar"]
+        ids = list(ids)
+        if self.diferidas is not None:
+            borradas = 0
+            for ID in ids:
+                existe, version = self._estado(ID)
+                if existe:
+                    self._diferir(["baja", ID, version])
+                    borradas += 1
+            return borradas
+        with self.conexion:
+            cursor = self.conexion.executemany(bd, ((ID,) for ID in ids))
+        if self.cache is not None:
+            self.cache.invalidar(ids=ids)
+        return cursor.rowcount
+
+    def actualiza_datos(self, ID, nombre, edad, correo, telefono):
+        """
+        Actualiza los datos en la base de datos basándose en el ID.
+
+        Args:
+            self
+            ID (int): El ID de los datos.
+            nombre (str): El nombre del usuario.
+            edad (int): La edad del usuario.
+            correo (str): El correo electrónico del usuario.
+            telefono (int): El número de teléfono del usuario.
+
+        Devuelve:
+            int: El número de filas afectadas por la actualización.
+        """
+        is_valid, resultado = self.UserInput.validate_input(
+            nombre, edad, correo, telefono
+        )
+        if is_valid:
+            dato = None
+            try:
+                if self.diferidas is not None:
+                    existe, version = self._estado(ID)
+                    if existe:
+                        self._diferir(
+                            [
+                                "cambio",
+                                ID,
+                                resultado.nombre,
+                                resultado.edad,
+                                resultado.correo,
+                                resultado.telefono,
+                                version,
+                            ]
+                        )
+                    return int(existe)
+                cursor = self.conexion.cursor()
+                bd = self.SENTENCIAS["actualizar"]
+                cursor.execute(
+                    bd,
+                    (
+                        resultado.nombre,
+                        resultado.edad,
+                        resultado.correo,
+                        resultado.telefono,
+                        ID,
+                    ),
+                )
+                dato = cursor.rowcount
+                self.conexion.commit()
+                cursor.close()
+                if self.cache is not None:
+                    self.cache.invalidar(nombres=(resultado.nombre,), ids=(ID,))
+            except (sqlite3.Error, OverflowError) as e:
+                self.avisar("error", "Database Error", str(e))
+            return dato
+        self.avisar_errores(resultado)
+
+    def buscar_datos_por_nombre(self, nombre, contiene=False, limite=None):
+        """
+        Busca datos en la base de datos basándose en el nombre, sin distinguir mayúsculas.
+
+        Por defecto busca los nombres que empiezan con el texto usando el índice
+        NOCASE. Con contiene=True busca el texto en cualquier parte del nombre
+        usando el índice FTS5 trigram (para textos de 3 o más caracteres).
+
+        Args:
+            self
+            nombre (str): El nombre del usuario, o una parte de él.
+            contiene (bool): Si se buscan coincidencias en cualquier parte del nombre.
+            limite (int): La cantidad máxima de contactos a devolver, o None para
+                devolver todos.
+
+        Devuelve:
+            Contactos: Los contactos que coinciden con el nombre.
+        """
+        if not nombre:
+            return self.mostrar_datos()
+        return self._leer(
+            ("buscar", nombre, contiene, limite),
+            lambda: self._buscar_datos_por_nombre(nombre, contiene, limite),
+            busqueda=(nombre, contiene),
+        )
+
+    def _buscar_datos_por_nombre(self, nombre, contiene, limite=None):
+        # LIMIT -1 es sin límite en SQLite.
+        limite = -1 if limite is None else limite
+        tipo, valores = self._busqueda_nombre(nombre, contiene)
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["buscar_" + tipo], (*valores, limite))
+        return Contactos.desde_cursor(cursor)
+
+    def _busqueda_nombre(self, nombre, contiene):
+        # Devuelve el sufijo de las sentencias buscar_, contar_ y eliminar_ que
+        # corresponden a la búsqueda, y sus parámetros.
+        if contiene and self.fts_disponible and len(nombre) >= 3:
+            return "contiene", ('"' + nombre.replace('"', '""') + '"',)
+        if contiene:
+            patron = (
+                nombre.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            return "contiene_like", (f"%{patron}%",)
+        desde = self.plegar(nombre)
+        return "prefijo", (desde, self.limite_prefijo(desde))
+
+    def iterar_busqueda(self, nombre, contiene=False, tamano_bloque=5000):
+        """
+        Recorre de a bloques, con fetchmany, lo que encuentra buscar_datos_por_nombre,
+        sin cargar todo el resultado.
+
+        Args:
+            self
+            nombre (str): El nombre del usuario, o una parte de él; vacío recorre
+                toda la tabla.
+            contiene (bool): Si se buscan coincidencias en cualquier parte del nombre.
+            tamano_bloque (int): La cantidad de filas por bloque.
+
+        Devuelve:
+            Generador de listas de tuplas (ID, NOMBRE, EDAD, CORREO, TELEFONO).
+        """
+        if not nombre:
+            yield from self.iterar_datos(tamano_bloque, con_id=True)
+            return
+        tipo, valores = self._busqueda_nombre(nombre, contiene)
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["buscar_" + tipo], (*valores, -1))
+        try:
+            while filas := cursor.fetchmany(tamano_bloque):
+                yield filas
+        finally:
+            cursor.close()
+
+    def contar_datos_por_nombre(self, nombre, contiene=False):
+        """
+        Cuenta todas las filas que encuentra buscar_datos_por_nombre, sin límite.
+
+        Args:
+            self
+            nombre (str): El nombre del usuario, o una parte de él.
+            contiene (bool): Si se buscan coincidencias en cualquier parte del nombre.
+
+        Devuelve:
+            int: La cantidad de filas que coinciden.
+        """
+        tipo, valores = self._busqueda_nombre(nombre, contiene)
+        return self.conexion.execute(
+            self.SENTENCIAS["contar_" + tipo], valores
+        ).fetchone()[0]
+
+    def elimina_datos_por_nombre(self, nombre, contiene=False):
+        """
+        Elimina en una sola transacción todas las filas que encuentra
+        buscar_datos_por_nombre, incluidas las que no entraron en el límite.
+
+        Args:
+            self
+            nombre (str): El nombre del usuario, o una parte de él. No puede estar
+                vacío.
+            contiene (bool): Si se buscan coincidencias en cualquier parte del nombre.
+
+        Devuelve:
+            list: Los ID de las filas eliminadas.
+
+        Lanza:
+            ValueError: Aparece cuando el nombre está vacío, que borraría todo.
+        """
+        if not nombre:
+            raise ValueError("Falta el nombre de las filas a eliminar.")
+        tipo, valores = self._busqueda_nombre(nombre, contiene)
+        with self.conexion:
+            ids = [
+                fila[0]
+                for fila in self.conexion.execute(
+                    self.SENTENCIAS["eliminar_" + tipo], valores
+                )
+            ]
+        if self.cache is not None:
+            self.cache.limpiar()
+        return ids
+
+    def iterar_nombres(self, tamano_bloque=5000):
+        """
+        Recorre los nombres en el orden del índice NOCASE, de a bloques.
+
+        Args:
+            self
+            tamano_bloque (int): La cantidad de filas por bloque.
+
+        Devuelve:
+            Generador de listas de tuplas (ID, NOMBRE).
+        """
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["nombres"])
+        try:
+            while filas := cursor.fetchmany(tamano_bloque):
+                yield filas
+        finally:
+            cursor.close()
+
+    def version_cambios(self):
+        """
+        Devuelve el número del último cambio registrado por los triggers.
+
+        Args:
+            self
+
+        Devuelve:
+            int: El número de la última alta, edición o baja.
+        """
+        return self.conexion.execute(self.SENTENCIAS["version_cambios"]).fetchone()[0]
+
+    def contar_cambios(self, desde, hasta):
+        """
+        Cuenta las filas y las bajas con un número de cambio en (desde, hasta].
+
+        Args:
+            self
+            desde (int): El último cambio ya exportado.
+            hasta (int): El último cambio a incluir.
+
+        Devuelve:
+            int: La cantidad de cambios.
+        """
+        return self.conexion.execute(
+            self.SENTENCIAS["contar_cambios"], {"desde": desde, "hasta": hasta}
+        ).fetchone()[0]
+
+    def iterar_cambios(self, desde, hasta, tamano_bloque=5000):
+        """
+        Recorre de a bloques las filas y las bajas con un número de cambio en (desde, hasta].
+
+        Cada fila aparece una sola vez, con sus datos actuales. Los cambios
+        posteriores a hasta quedan para la próxima exportación.
+
+        Args:
+            self
+            desde (int): El último cambio ya exportado.
+            hasta (int): El último cambio a incluir.
+            tamano_bloque (int): La cantidad de filas por bloque.
+
+        Devuelve:
+            Generador de listas de tuplas (ID, NOMBRE, EDAD, CORREO, TELEFONO,
+            MODIFICADO, BORRADO). En las bajas los datos son None y BORRADO es 1.
+        """
+        for clave in ("cambios", "bajas"):
+            cursor = self.conexion.cursor()
+            cursor.execute(self.SENTENCIAS[clave], (desde, hasta))
+            try:
+                while filas := cursor.fetchmany(tamano_bloque):
+                    yield filas
+            finally:
+                cursor.close()
+
+    def marca_exportacion(self, nombre):
+        """
+        Lee hasta qué cambio llegó la última exportación incremental con ese nombre.
+
+        Args:
+            self
+            nombre (str): El nombre de la marca.
+
+        Devuelve:
+            int: El número del último cambio exportado, o None si nunca se exportó.
+        """
+        fila = self.conexion.execute(
+            self.SENTENCIAS["marca_exportacion"], (nombre,)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def guardar_marca_exportacion(self, nombre, version):
+        """
+        Guarda hasta qué cambio llegó una exportación incremental.
+
+        Las bajas que ya exportaron todas las marcas se descartan.
+
+        Args:
+            self
+            nombre (str): El nombre de la marca.
+            version (int): El número del último cambio exportado.
+
+        Devuelve:
+            Ninguno
+        """
+        with self.conexion:
+            self.conexion.execute(self.SENTENCIAS["guardar_marca"], (nombre, version))
+            self.conexion.execute(self.SENTENCIAS["podar_bajas"])
+
+    def leer_filas(self, ids):
+        """
+        Lee las filas con los ID dados, en una sola consulta.
+
+        Args:
+            self
+            ids (list): Los ID a leer.
+
+        Devuelve:
+            Contactos: Los contactos leídos; se ubican por ID con buscar(). Los ID
+            que ya no existen no aparecen.
+        """
+        if not ids:
+            return Contactos()
+        cursor = self.conexion.cursor()
+        cursor.execute(self.SENTENCIAS["leer_ids"], (json.dumps(list(ids)),))
+        return Contactos.desde_cursor(cursor)
+
+    @staticmethod
+    def plegar(texto):
+        """
+        Pasa a minúsculas como lo hace la intercalación NOCASE de SQLite.
+
+        NOCASE solo pliega mayúsculas ASCII, igual que LIKE.
+
+        Args:
+            texto (str): El texto a plegar.
+
+        Devuelve:
+            str: El texto con las mayúsculas ASCII en minúscula.
+        """
+        return texto.translate(Comunicacion.PLIEGUE_NOCASE)
+
+    @staticmethod
+    def limite_prefijo(desde):
+        """
+        Devuelve el primer texto plegado mayor que todos los que empiezan con desde.
+
+        Se compara con NOCASE, que pliega las mayúsculas: el siguiente carácter de
+        "@" no puede ser "A", que vale como "a" y dejaría entrar "a[" o "a_" en
+        la búsqueda de "a@". Se salta hasta "[", el siguiente que no se pliega.
+
+        Args:
+            desde (str): El prefijo, ya plegado con plegar() (no vacío).
+
+        Devuelve:
+            str: El límite superior, excluido, del rango del prefijo.
+        """
+        siguiente = chr(ord(desde[-1]) + 1)
+        if "A" <= siguiente <= "Z":
+            siguiente = "["
+        return desde[:-1] + siguiente
+
+    def _leer(self, clave, leer, busqueda=None):
+        # Lectura a través de la caché, si la hay.
+        if self.cache is None:
+            return leer()
+        return self.cache.leer(self.conexion, clave, leer, busqueda)
+
+
+Instrumentacion.medir_metodos(Comunicacion)
+
+
+def leer_csv(archivo):
+    """
+    Recorre un archivo CSV fila por fila, sin cargarlo completo en memoria.
+
+    Omite la fila de encabezado si la primera columna dice "Nombre" y las filas vacías.
+
+    Args:
+        archivo: Un archivo de texto abierto con newline="".
+
+    Devuelve:
+        Generador de listas (nombre, edad, correo, telefono).
+    """
+    lector = csv.reader(archivo)
+    for numero, fila in enumerate(lector):
+        if not fila:
+            continue
+        if numero == 0 and fila[0].strip().lower() == "nombre":
+            continue
+        yield [valor.strip() for valor in fila]
+
+
+def leer_archivo(ruta):
+    """
+    Recorre un CSV o, si la extensión es .xlsx, una planilla, fila por fila.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Devuelve:
+        Generador de listas (nombre, edad, correo, telefono).
+    """
+    if ruta.lower().endswith(".xlsx"):
+        yield from leer_xlsx(ruta)
+        return
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        yield from leer_csv(archivo)
+
+
+def leer_xlsx(ruta):
+    """
+    Recorre la primera hoja de un archivo xlsx fila por fila, en modo de solo lectura.
+
+    Las columnas se buscan por su encabezado (Nombre, Edad, Correo, Telefono), así
+    que sirven tanto las planillas de Exportador como las anteriores, que empiezan
+    con una columna de índice. Omite las filas vacías.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Devuelve:
+        Generador de listas (nombre, edad, correo, telefono).
+
+    Lanza:
+        ValueError: Aparece cuando al encabezado le falta alguna de las columnas.
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = [
+            str(valor).strip().lower() if valor is not None else ""
+            for valor in next(filas, ())
+        ]
+        try:
+            posiciones = [
+                encabezado.index(columna.lower()) for columna in Exportador.COLUMNAS
+            ]
+        except ValueError:
+            raise ValueError(
+                f"La planilla debe tener las columnas {', '.join(Exportador.COLUMNAS)}"
+            ) from None
+        for fila in filas:
+            valores = [
+                fila[posicion] if posicion < len(fila) else None
+                for posicion in posiciones
+            ]
+            valores = [
+                valor.strip() if isinstance(valor, str) else valor for valor in valores
+            ]
+            if all(valor is None or valor == "" for valor in valores):
+                continue
+            yield valores
+    finally:
+        libro.close()
+
+
+class Exportador:
+    """
+    Exporta la tabla datos, o sus cambios, a un archivo xlsx, csv o parquet
+    escribiendo a medida que lee.
+
+    Las filas se leen del cursor de a bloques y se escriben enseguida, así que la
+    memoria usada no depende del tamaño de la tabla. openpyxl (xlsx) y pyarrow
+    (parquet) se importan solo cuando se usa ese formato.
+
+    Args:
+        base_datos (Comunicacion): La conexión con la base de datos.
+        tamano_bloque (int): La cantidad de filas leídas por bloque.
+
+    Atributos:
+        COLUMNAS (tuple): Los encabezados de las columnas exportadas.
+        COLUMNAS_CAMBIOS (tuple): Los encabezados de la exportación de cambios.
+        TIPOS (dict): El tipo de pyarrow de cada columna, para parquet.
+        FORMATOS (tuple): Las extensiones de archivo soportadas.
+        escritas (int): Las filas escritas en la última exportación.
+        columnas (tuple): Los encabezados de la última exportación.
+    """
+
+    COLUMNAS = ("Nombre", "Edad", "Correo", "Telefono")
+    COLUMNAS_CAMBIOS = ("ID",) + COLUMNAS + ("Modificado", "Borrado")
+    TIPOS = {
+        "ID": "int64",
+        "Nombre": "string",
+        "Edad": "int64",
+        "Correo": "string",
+        "Telefono": "int64",
+        "Modificado": "int64",
+        "Borrado": "int64",
+    }
+    FORMATOS = ("xlsx", "csv", "parquet")
+
+    def __init__(self, base_datos, tamano_bloque=5000):
+        self.base_datos = base_datos
+        self.tamano_bloque = tamano_bloque
+        self.escritas = 0
+        self.columnas = self.COLUMNAS
+
+    def exportar(self, ruta, formato=None, progreso=None, cancelado=None):
+        """
+        Escribe todas las filas de la tabla datos en un archivo.
+
+        Args:
+            ruta (str): La ruta del archivo a crear, o "-" para escribir CSV en la
+                salida estándar.
+            formato (str): "xlsx", "csv" o "parquet"; si es None se toma de la extensión.
+            progreso (callable): Función opcional llamada con (filas_escritas, total)
+                después de cada bloque.
+            cancelado (threading.Event): Si se activa, la exportación se detiene y se
+                borra el archivo a medio escribir.
+
+        Devuelve:
+            int: La cantidad de filas exportadas.
+
+        Lanza:
+            ValueError: Aparece cuando el formato no está soportado.
+            OperacionCancelada: Aparece cuando se cancela la exportación.
+        """
+        formato = self._formato(ruta, formato)
+        self.columnas = self.COLUMNAS
+        total = self.base_datos.contar_datos()
+        return self._escribir(
+            ruta,
+            formato,
+            self.base_datos.iterar_contactos(self.tamano_bloque),
+            total,
+            progreso,
+            cancelado,
+        )
+
+    def exportar_cambios(
+        self, ruta, formato=None, marca="exportacion", progreso=None, cancelado=None
+    ):
+        """
+        Escribe solo las altas, ediciones y bajas posteriores a la última exportación.
+
+        La marca guarda el número del último cambio exportado; la primera vez se
+        exporta todo. Cada fila lleva su ID, el momento del cambio (milisegundos
+        desde 1970, UTC) y si fue una baja, en cuyo caso los datos quedan vacíos.
+        La marca se mueve solo si el archivo se escribió completo.
+
+        Args:
+            ruta (str): La ruta del archivo a crear, o "-" para escribir CSV en la
+                salida estándar.
+            formato (str): "xlsx", "csv" o "parquet"; si es None se toma de la extensión.
+            marca (str): El nombre de la marca, para llevar exportaciones
+                incrementales independientes.
+            progreso (callable): Función opcional llamada con (filas_escritas, total)
+                después de cada bloque.
+            cancelado (threading.Event): Si se activa, la exportación se detiene, se
+                borra el archivo a medio escribir y la marca no cambia.
+
+        Devuelve:
+            int: La cantidad de cambios exportados.
+
+        Lanza:
+            ValueError: Aparece cuando el formato no está soportado.
+            OperacionCancelada: Aparece cuando se cancela la exportación.
+        """
+        formato = self._formato(ruta, formato)
+        self.columnas = self.COLUMNAS_CAMBIOS
+        desde = self.base_datos.marca_exportacion(marca)
+        desde = -1 if desde is None else desde
+        hasta = self.base_datos.version_cambios()
+        total = self.base_datos.contar_cambios(desde, hasta)
+        escritas = self._escribir(
+            ruta,
+            formato,
+            self.base_datos.iterar_cambios(desde, hasta, self.tamano_bloque),
+            total,
+            progreso,
+            cancelado,
+        )
+        self.base_datos.guardar_marca_exportacion(marca, hasta)
+        return escritas
+
+    def _formato(self, ruta, formato):
+        if ruta == "-":
+            formato = formato or "csv"
+        if ruta == "-" and formato != "csv":
+            raise ValueError(
+                "Solo el formato csv se puede escribir en la salida estándar"
+            )
+        formato = (formato or os.path.splitext(ruta)[1].lstrip(".")).lower()
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato de exportación no soportado: {formato}")
+        return formato
+
+    def _escribir(self, ruta, formato, filas, total, progreso, cancelado):
+        bloques = self._con_progreso(filas, total, progreso, cancelado)
+        try:
+            getattr(self, f"_exportar_{formato}")(ruta, bloques)
+        except OperacionCancelada:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            raise
+        finally:
+            bloques.close()
+        return self.escritas
+
+    def _con_progreso(self, bloques, total, progreso, cancelado):
+        self.escritas = 0
+        try:
+            for filas in bloques:
+                if cancelado is not None and cancelado.is_set():
+                    raise OperacionCancelada()
+                yield filas
+                self.escritas += len(filas)
+                if progreso:
+                    progreso(self.escritas, total)
+        finally:
+            bloques.close()
+
+    def _exportar_xlsx(self, ruta, bloques):
+        from openpyxl import Workbook
+
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet("Datos")
+        hoja.append(self.columnas)
+        for filas in bloques:
+            for fila in self._filas(filas):
+                hoja.append(fila)
+        libro.save(ruta)
+
+    def _exportar_csv(self, ruta, bloques):
+        if ruta == "-":
+            self._escribir_csv(sys.stdout, bloques)
+            return
+        with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+            self._escribir_csv(archivo, bloques)
+
+    def _escribir_csv(self, archivo, bloques):
+        escritor = csv.writer(archivo)
+        escritor.writerow(self.columnas)
+        for filas in bloques:
+            escritor.writerows(self._filas(filas))
+
+    def _exportar_parquet(self, ruta, bloques):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pa.schema(
+            [(columna, getattr(pa, self.TIPOS[columna])()) for columna in self.columnas]
+        )
+        with pq.ParquetWriter(ruta, esquema) as escritor:
+            for filas in bloques:
+                columnas = {
+                    columna: self._arrow(pa, valores)
+                    for columna, valores in zip(self.columnas, self._columnas(filas))
+                }
+                escritor.write_table(pa.Table.from_pydict(columnas, schema=esquema))
+
+    @staticmethod
+    def _filas(bloque):
+        # Los datos llegan como Contactos; los cambios, como listas de tuplas.
+        return bloque.filas() if isinstance(bloque, Contactos) else bloque
+
+    @staticmethod
+    def _columnas(bloque):
+        return bloque.columnas() if isinstance(bloque, Contactos) else zip(*bloque)
+
+    @staticmethod
+    def _arrow(pa, valores):
+        # Las columnas de enteros de Contactos pasan a pyarrow sin copiarse, por
+        # el protocolo de buffer; pyarrow las convierte al tipo del esquema.
+        if not isinstance(valores, array):
+            return valores
+        tipo = {"h": pa.int16(), "q": pa.int64()}[valores.typecode]
+        return pa.Array.from_buffers(tipo, len(valores), [None, pa.py_buffer(valores)])
+
+
+class Deduplicador:
+    """
+    Encuentra contactos duplicados y los fusiona.
+
+    Cada fila se reduce a tres claves normalizadas: el correo, el teléfono y el
+    nombre junto con la edad. Las filas que comparten el correo o el teléfono son
+    el mismo contacto y quedan en el mismo grupo: cada clave se guarda en un
+    diccionario y las filas se unen con union-find, así que el costo crece con la
+    cantidad de filas y no con la de pares. El nombre con la edad solo indica
+    parecido: esas filas se agrupan aparte, para revisarlas a mano, y nunca se
+    fusionan automáticamente.
+
+    Args:
+        base_datos (Comunicacion): La conexión con la base de datos.
+        tamano_bloque (int): La cantidad de filas leídas por bloque.
+
+    Atributos:
+        CRITERIOS (tuple): Los nombres de las claves, en el orden de claves().
+        IDENTIDAD (tuple): Los criterios que identifican al contacto; los demás
+            solo arman grupos para revisar.
+        DIGITOS_TELEFONO (int): Las últimas cifras del teléfono que se comparan, para
+            que el mismo número coincida con y sin el código de país.
+        MINIMO_TELEFONO (int): Los teléfonos con menos cifras no se comparan.
+        DOMINIOS_ETIQUETA (frozenset): Los dominios que entregan
+            usuario+etiqueta@dominio en el buzón de usuario@dominio.
+        revisadas (int): Las filas revisadas en la última búsqueda.
+        completadas (list): Los Contacto conservados en la última fusión a los que
+            se les completaron campos vacíos.
+    """
+
+    CRITERIOS = ("correo", "telefono", "nombre")
+    IDENTIDAD = ("correo", "telefono")
+    # En otros proveedores "+" es parte del nombre del buzón: dos correos que solo
+    # difieren ahí pueden ser de personas distintas.
+    DOMINIOS_ETIQUETA = frozenset(
+        (
+            "gmail.com",
+            "googlemail.com",
+            "outlook.com",
+            "hotmail.com",
+            "live.com",
+            "icloud.com",
+            "me.com",
+            "fastmail.com",
+            "protonmail.com",
+            "proton.me",
+        )
+    )
+    DIGITOS_TELEFONO = 10
+    MINIMO_TELEFONO = 6
+    NO_CIFRAS = re.compile(r"\D")
+
+    def __init__(self, base_datos, tamano_bloque=5000):
+        self.base_datos = base_datos
+        self.tamano_bloque = tamano_bloque
+        self.revisadas = 0
+        self.completadas = []
+
+    @classmethod
+    def normalizar_correo(cls, correo):
+        """
+        Pasa el correo a minúsculas y, en los DOMINIOS_ETIQUETA, le quita la
+        etiqueta "+..." de la parte local.
+
+        Args:
+            correo (str): El correo guardado.
+
+        Devuelve:
+            str: El correo normalizado.
+        """
+        local, _, dominio = correo.strip().lower().rpartition("@")
+        if dominio in cls.DOMINIOS_ETIQUETA:
+            local = local.split("+", 1)[0]
+        return f"{local}@{dominio}"
+
+    @classmethod
+    def normalizar_telefono(cls, telefono):
+        """
+        Deja solo las últimas cifras del teléfono, sin ceros a la izquierda.
+
+        Args:
+            telefono (int): El teléfono guardado.
+
+        Devuelve:
+            str: Las cifras a comparar, o None si el número es demasiado corto.
+        """
+        if isinstance(telefono, int):
+            cifras = str(abs(telefono))
+        else:
+            cifras = cls.NO_CIFRAS.sub("", str(telefono)).lstrip("0")
+        if len(cifras) < cls.MINIMO_TELEFONO:
+            return None
+        return cifras[-cls.DIGITOS_TELEFONO :]
+
+    @staticmethod
+    def normalizar_nombre(nombre):
+        """
+        Pliega mayúsculas y acentos, y ordena las palabras del nombre.
+
+        Así "Pérez  Juan" y "juan perez" dan la misma clave.
+
+        Args:
+            nombre (str): El nombre guardado.
+
+        Devuelve:
+            str: El nombre normalizado.
+        """
+        if not nombre.isascii():
+            sin_acentos = (
+                unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore").decode()
+            )
+            nombre = sin_acentos if sin_acentos.strip() else nombre
+        return " ".join(sorted(nombre.casefold().split()))
+
+    def claves(self, fila):
+        """
+        Calcula las claves de comparación de una fila.
+
+        Args:
+            fila (tuple): (ID, NOMBRE, EDAD, CORREO, TELEFONO).
+
+        Devuelve:
+            tuple: Una clave por cada criterio de CRITERIOS; None si no se compara.
+        """
+        _, nombre, edad, correo, telefono = fila
+        return (
+            self.normalizar_correo(correo),
+            self.normalizar_telefono(telefono),
+            f"{self.normalizar_nombre(nombre)}|{edad}",
+        )
+
+    def buscar(self, cancelado=None):
+        """
+        Recorre la tabla una vez y arma los grupos de contactos duplicados.
+
+        Args:
+            cancelado (threading.Event): Si se activa, la búsqueda se detiene.
+
+        Devuelve:
+            list: Un diccionario {"filas", "motivos", "fusionable"} por grupo,
+            ordenados por el menor ID. "filas" son los Contacto del grupo ordenados
+            por ID, "motivos" los criterios que comparten y "fusionable" es False
+            para los grupos que solo comparten el nombre y la edad, que son para
+            revisar a mano.
+
+        Lanza:
+            OperacionCancelada: Aparece cuando se cancela la búsqueda.
+        """
+        ids = []
+        padres = []
+        identidad = [{} for _ in self.IDENTIDAD]
+        parecidos = {}
+        for bloque in self.base_datos.iterar_datos(self.tamano_bloque, con_id=True):
+            if cancelado is not None and cancelado.is_set():
+                raise OperacionCancelada
+            for fila in bloque:
+                posicion = len(ids)
+                ids.append(fila[0])
+                padres.append(posicion)
+                *claves, nombre = self.claves(fila)
+                for visto, clave in zip(identidad, claves):
+                    if clave is None:
+                        continue
+                    primera = visto.setdefault(clave, posicion)
+                    if primera != posicion:
+                        self._unir(padres, primera, posicion)
+                parecidos.setdefault(nombre, []).append(posicion)
+        del identidad
+        self.revisadas = len(ids)
+
+        # La raíz de cada grupo es su fila de menor ID, así que los miembros
+        # quedan ordenados por ID.
+        componentes = {}
+        for posicion in range(len(padres)):
+            raiz = self._raiz(padres, posicion)
+            if raiz != posicion:
+                componentes.setdefault(raiz, [ids[raiz]]).append(ids[posicion])
+        # Los parecidos que ya son un mismo contacto no se vuelven a mostrar.
+        revisar = {
+            posiciones[0]: [ids[posicion] for posicion in posiciones]
+            for posiciones in parecidos.values()
+            if len({self._raiz(padres, posicion) for posicion in posiciones}) > 1
+        }
+        del parecidos
+        filas = self.base_datos.leer_filas(
+            [
+                ID
+                for grupos in (componentes, revisar)
+                for miembros in grupos.values()
+                for ID in miembros
+            ]
+        )
+        grupos = []
+        for posicion, miembros, fusionable in sorted(
+            [(raiz, miembros, True) for raiz, miembros in componentes.items()]
+            + [(primera, miembros, False) for primera, miembros in revisar.items()]
+        ):
+            filas_grupo = [
+                contacto
+                for contacto in map(filas.buscar, miembros)
+                if contacto is not None
+            ]
+            if len(filas_grupo) > 1:
+                grupos.append(
+                    {
+                        "filas": filas_grupo,
+                        "motivos": self._motivos(filas_grupo),
+                        "fusionable": fusionable,
+                    }
+                )
+        return grupos
+
+    def fusionar(self, grupos):
+        """
+        Fusiona grupos de duplicados en una sola transacción.
+
+        De cada grupo se conserva la fila elegida y se eliminan las demás. Los
+        campos vacíos de la fila conservada se completan antes con los de las
+        eliminadas, en orden de ID; los que tienen datos no se cambian.
+
+        Args:
+            grupos (iterable): Pares (ID a conservar, ID de todo el grupo).
+
+        Devuelve:
+            list: Los ID eliminados.
+        """
+        grupos = list(grupos)
+        filas = self.base_datos.leer_filas(
+            [ID for _, miembros in grupos for ID in miembros]
+        )
+        self.completadas = []
+        eliminar = []
+        for conservar, miembros in grupos:
+            otras = [ID for ID in miembros if ID != conservar]
+            eliminar.extend(otras)
+            fila = filas.buscar(conservar)
+            if fila is None:
+                continue
+            completa = self.completar(fila, map(filas.buscar, otras))
+            if completa != fila:
+                self.completadas.append(completa)
+        self.base_datos.fusiona_datos(self.completadas, eliminar)
+        return eliminar
+
+    @classmethod
+    def completar(cls, fila, otras):
+        """
+        Completa los campos vacíos ("" o 0) de una fila con los de otras filas.
+
+        Args:
+            fila (Contacto): La fila a completar.
+            otras (iterable): Las otras filas del mismo contacto; None se saltea.
+
+        Devuelve:
+            Contacto: Una fila nueva con los campos completados.
+        """
+        valores = list(fila)
+        for otra in otras:
+            if otra is None:
+                continue
+            for posicion in range(1, len(valores)):
+                if cls._vacio(valores[posicion]):
+                    valores[posicion] = otra[posicion]
+        return Contacto(*valores)
+
+    @staticmethod
+    def _vacio(valor):
+        if isinstance(valor, str):
+            return not valor.strip()
+        return not valor
+
+    def _motivos(self, filas):
+        claves = [self.claves(fila) for fila in filas]
+        motivos = []
+        for posicion, criterio in enumerate(self.CRITERIOS):
+            cuenta = Counter(clave[posicion] for clave in claves)
+            cuenta.pop(None, None)
+            if cuenta and max(cuenta.values()) > 1:
+                motivos.append(criterio)
+        return motivos
+
+    @staticmethod
+    def _raiz(padres, posicion):
+        while padres[posicion] != posicion:
+            padres[posicion] = padres[padres[posicion]]
+            posicion = padres[posicion]
+        return posicion
+
+    def _unir(self, padres, una, otra):
+        una = self._raiz(padres, una)
+        otra = self._raiz(padres, otra)
+        if una != otra:
+            padres[max(una, otra)] = min(una, otra)
+
+
+class Sincronizador:
+    """
+    Concilia la tabla datos con una planilla editada a mano.
+
+    Las filas se emparejan por una clave natural: el correo y, si no coincide, el
+    teléfono, normalizados como en Deduplicador. Primero se arma un plan con las
+    altas, los cambios y las bajas (las filas de la base que no están en la
+    planilla), sin modificar nada; después se aplica con
+    Comunicacion.sincroniza_datos_lote y Comunicacion.elimina_datos_lote.
+
+    Args:
+        base_datos (Comunicacion): La conexión con la base de datos.
+        tamano_lote (int): La cantidad de filas validadas y guardadas por bloque.
+    """
+
+    def __init__(self, base_datos, tamano_lote=1000):
+        self.base_datos = base_datos
+        self.tamano_lote = tamano_lote
+
+    def planificar(self, filas, cancelado=None):
+        """
+        Compara las filas de la planilla con la base y arma el plan, sin escribir.
+
+        Args:
+            filas (iterable): Tuplas (nombre, edad, correo, telefono).
+            cancelado (threading.Event): Si se activa, la comparación se detiene.
+
+        Devuelve:
+            dict: {"altas", "cambios", "bajas", "iguales", "rechazadas"}. "altas" son
+            tuplas (nombre, edad, correo, telefono), "cambios" tuplas (ID, nombre,
+            edad, correo, telefono), "bajas" una lista de ID e "iguales" la cantidad
+            de filas sin cambios. "rechazadas" tiene la forma del reporte de
+            Comunicacion.inserta_datos_lote.
+
+        Lanza:
+            OperacionCancelada: Aparece cuando se cancela la comparación.
+        """
+        # Cada clave apunta a todas las filas que la tienen, por si la base ya
+        # tiene duplicados: cada fila de la planilla se empareja con la primera
+        # que quede libre.
+        actuales = {}
+        por_correo = {}
+        por_telefono = {}
+        for bloque in self.base_datos.iterar_datos(con_id=True):
+            for ID, *valores in bloque:
+                actuales[ID] = tuple(valores)
+                correo = Deduplicador.normalizar_correo(valores[2])
+                por_correo.setdefault(correo, []).append(ID)
+                telefono = Deduplicador.normalizar_telefono(valores[3])
+                if telefono is not None:
+                    por_telefono.setdefault(telefono, []).append(ID)
+
+        plan = {"altas": [], "cambios": [], "bajas": [], "iguales": 0, "rechazadas": []}
+        UserInput = self.base_datos.UserInput
+        emparejadas = set()
+        usadas = set()
+        numeradas = enumerate(filas, start=1)
+        while bloque := list(islice(numeradas, self.tamano_lote)):
+            if cancelado is not None and cancelado.is_set():
+                raise OperacionCancelada
+            validaciones = UserInput.validar_lote([fila for _, fila in bloque])
+            for (numero, fila), (is_valid, resultado) in zip(bloque, validaciones):
+                if not is_valid:
+                    plan["rechazadas"].append((numero, fila, resultado))
+                    # Un error de tipeo en la planilla no debe borrar el contacto
+                    # que la fila representa.
+                    self._proteger(fila, por_correo, por_telefono, emparejadas)
+                    continue
+                valores = (
+                    resultado.nombre,
+                    resultado.edad,
+                    resultado.correo,
+                    resultado.telefono,
+                )
+                correo = Deduplicador.normalizar_correo(resultado.correo)
+                telefono = Deduplicador.normalizar_telefono(resultado.telefono)
+                ID = self._libre(por_correo, correo, emparejadas)
+                if ID is None:
+                    ID = self._libre(por_telefono, telefono, emparejadas)
+                if ID is None and (correo in usadas or telefono in usadas):
+                    plan["rechazadas"].append(
+                        (numero, fila, [UserInput.error(None, "fila_repetida")])
+                    )
+                    continue
+                usadas.add(correo)
+                if telefono is not None:
+                    usadas.add(telefono)
+                if ID is None:
+                    plan["altas"].append(valores)
+                    continue
+                emparejadas.add(ID)
+                if actuales[ID] == valores:
+                    plan["iguales"] += 1
+                else:
+                    plan["cambios"].append((ID,) + valores)
+        plan["bajas"] = [ID for ID in actuales if ID not in emparejadas]
+        return plan
+
+    def aplicar(self, plan, borrar=True, cancelado=None):
+        """
+        Guarda las altas y los cambios de un plan y, si se pide, borra las bajas.
+
+        Las altas y los cambios se guardan juntos con INSERT ... ON CONFLICT DO
+        UPDATE, en una transacción por bloque. Si el plan tiene filas rechazadas no
+        se borra nada: una fila rechazada puede ser un contacto existente que no
+        se pudo emparejar.
+
+        Args:
+            plan (dict): El plan devuelto por planificar().
+            borrar (bool): Si se eliminan las filas que no están en la planilla.
+            cancelado (threading.Event): Si se activa, se detiene antes del siguiente
+                bloque; los bloques ya confirmados se conservan y no se borra nada.
+
+        Devuelve:
+            dict: {"guardadas": int, "eliminadas": int, "cancelada": bool}.
+        """
+        filas = [(None,) + valores for valores in plan["altas"]] + plan["cambios"]
+        guardadas, cancelada = self.base_datos.sincroniza_datos_lote(
+            filas, self.tamano_lote, cancelado
+        )
+        eliminadas = 0
+        if borrar and not cancelada and not plan["rechazadas"]:
+            eliminadas = self.base_datos.elimina_datos_lote(plan["bajas"])
+        return {
+            "guardadas": guardadas,
+            "eliminadas": eliminadas,
+            "cancelada": cancelada,
+        }
+
+    @classmethod
+    def _proteger(cls, fila, por_correo, por_telefono, emparejadas):
+        # Empareja una fila rechazada con los valores tal como vienen, para que su
+        # contacto no quede entre las bajas.
+        if len(fila) < 4:
+            return
+        correo = Deduplicador.normalizar_correo(str(fila[2]))
+        ID = cls._libre(por_correo, correo, emparejadas)
+        if ID is None:
+            telefono = Deduplicador.normalizar_telefono(fila[3])
+            ID = cls._libre(por_telefono, telefono, emparejadas)
+        if ID is not None:
+            emparejadas.add(ID)
+
+    @staticmethod
+    def _libre(indice, clave, emparejadas):
+        for ID in indice.get(clave, ()):
+            if ID not in emparejadas:
+                return ID
+        return None
+
+    @staticmethod
+    def resumen(plan):
+        """
+        Describe un plan en pocas líneas, para mostrarlo antes de aplicarlo.
+
+        Args:
+            plan (dict): El plan devuelto por planificar().
+
+        Devuelve:
+            str: La cantidad de altas, cambios, bajas, filas iguales y rechazadas.
+        """
+        return (
+            f"Altas: {len(plan['altas'])}\n"
+            f"Cambios: {len(plan['cambios'])}\n"
+            f"Bajas: {len(plan['bajas'])}\n"
+            f"Sin cambios: {plan['iguales']}\n"
+            f"Rechazadas: {len(plan['rechazadas'])}"
+            + (
+                "\nLas bajas no se aplican mientras haya filas rechazadas."
+                if plan["rechazadas"] and plan["bajas"]
+                else ""
+            )
+        )
+
+
+class Respaldo:
+    """
+    Copia la base de datos mientras se usa, con la API de respaldo en línea de SQLite.
+
+    Copiar el archivo a mano mientras la agenda escribe puede dejar una copia a
+    medias. Connection.backup() copia las páginas de a bloques con su propia
+    conexión, que mantiene abierta una transacción de lectura durante toda la
+    copia: el respaldo es la foto de la base al empezar y, en modo WAL, las
+    demás conexiones siguen escribiendo mientras tanto. Sin esa transacción,
+    cada escritura ajena obligaría a SQLite a empezar la copia de nuevo. Los
+    respaldos se escriben primero como .parcial y se renombran al terminar;
+    opcionalmente se comprimen con gzip, y solo se conservan los más recientes.
+
+    Args:
+        ruta (str): La ruta del archivo de la base de datos.
+        carpeta (str): La carpeta de los respaldos; por defecto "respaldos" junto
+            a la base.
+        conservar (int): Cuántos respaldos se conservan; los más viejos se borran.
+            0 o None conserva todos.
+        paginas (int): Las páginas copiadas en cada paso.
+    """
+
+    PREFIJO = "RESPALDO"
+    EXTENSIONES = (".db", ".db.gz")
+    CONSERVAR = 10
+    PAGINAS = 1024
+
+    def __init__(self, ruta, carpeta=None, conservar=CONSERVAR, paginas=PAGINAS):
+        self.ruta = ruta
+        self.carpeta = carpeta or os.path.join(
+            os.path.dirname(os.path.abspath(ruta)), "respaldos"
+        )
+        self.conservar = conservar
+        self.paginas = paginas
+
+    def crear(self, comprimir=False, progreso=None, cancelado=None):
+        """
+        Respalda la base de datos y borra los respaldos que sobran.
+
+        Args:
+            comprimir (bool): Si el respaldo se guarda comprimido (.db.gz).
+            progreso (callable): Función opcional llamada con (paginas_copiadas,
+                total) después de cada paso.
+            cancelado (threading.Event): Si se activa, la copia se detiene y se
+                borra el archivo a medio escribir.
+
+        Devuelve:
+            str: La ruta del respaldo creado.
+
+        Lanza:
+            OperacionCancelada: Aparece cuando se cancela el respaldo.
+        """
+        os.makedirs(self.carpeta, exist_ok=True)
+        fecha = strftime("%d-%m-%y_%H-%M-%S")
+        extension = self.EXTENSIONES[1] if comprimir else self.EXTENSIONES[0]
+        destino = os.path.join(self.carpeta, f"{self.PREFIJO} {fecha}{extension}")
+        origen = sqlite3.connect(self.ruta, isolation_level=None)
+        try:
+            origen.execute("BEGIN")
+            origen.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            self._copiar(origen, destino, comprimir, progreso, cancelado)
+        finally:
+            origen.close()
+        self.podar(excepto=destino)
+        return destino
+
+    def restaurar(self, archivo, base_datos, progreso=None):
+        """
+        Reemplaza el contenido de la base de datos por el de un respaldo.
+
+        El respaldo se revisa con PRAGMA quick_check antes de tocar la base y se
+        copia con la conexión de base_datos en una sola transacción: si falla, la
+        base queda como estaba. Un respaldo de una versión anterior del esquema se
+        migra al terminar.
+
+        El registro de cambios sigue desde el de la base reemplazada (ver
+        Comunicacion.continuar_cambios): los números de cambio no se repiten y la
+        próxima exportación incremental de cada marca trae todos los contactos
+        restaurados y, como bajas, los que el respaldo no tenía.
+
+        Args:
+            archivo (str): El respaldo (.db o .db.gz).
+            base_datos (Comunicacion): La conexión con la base a reemplazar.
+            progreso (callable): Función opcional llamada con (paginas_copiadas,
+                total) después de cada paso.
+
+        Devuelve:
+            int: La cantidad de contactos restaurados.
+
+        Lanza:
+            ValueError: Aparece cuando el archivo no es un respaldo de la agenda.
+        """
+        temporal = None
+        origen = None
+        try:
+            if archivo.endswith(".gz"):
+                os.makedirs(self.carpeta, exist_ok=True)
+                temporal = os.path.join(self.carpeta, os.path.basename(archivo)[:-3])
+                temporal += ".parcial"
+                with gzip.open(archivo, "rb") as entrada, open(
+                    temporal, "wb"
+                ) as salida:
+                    shutil.copyfileobj(entrada, salida)
+            origen = sqlite3.connect(f"file:{temporal or archivo}?mode=ro", uri=True)
+            try:
+                revision = origen.execute("PRAGMA quick_check").fetchone()[0]
+                tiene_datos = origen.execute(
+                    "SELECT COUNT(*) FROM sqlite_master "
+                    "WHERE type='table' AND name='datos'"
+                ).fetchone()[0]
+            except sqlite3.DatabaseError as e:
+                raise ValueError(f"El archivo no es un respaldo válido: {e}") from e
+            if revision != "ok" or not tiene_datos:
+                raise ValueError(f"El archivo no es un respaldo válido: {archivo}")
+            estado = base_datos.estado_cambios()
+            origen.backup(
+                base_datos.conexion,
+                pages=self.paginas,
+                progress=self._avance(progreso, None),
+            )
+        finally:
+            if origen is not None:
+                origen.close()
+            if temporal is not None and os.path.exists(temporal):
+                os.remove(temporal)
+        base_datos.recargar()
+        base_datos.continuar_cambios(estado)
+        return base_datos.contar_datos()
+
+    def listar(self):
+        """
+        Devuelve los respaldos de la carpeta, del más reciente al más viejo.
+
+        Devuelve:
+            list: Las rutas de los respaldos.
+        """
+        if not os.path.isdir(self.carpeta):
+            return []
+        respaldos = [
+            os.path.join(self.carpeta, nombre)
+            for nombre in os.listdir(self.carpeta)
+            if nombre.startswith(self.PREFIJO) and nombre.endswith(self.EXTENSIONES)
+        ]
+        return sorted(respaldos, key=os.path.getmtime, reverse=True)
+
+    def podar(self, excepto=None):
+        """
+        Borra los respaldos más viejos que sobran según self.conservar.
+
+        Args:
+            excepto (str): Un respaldo que no se borra aunque sobre, por ejemplo
+                el recién creado.
+
+        Devuelve:
+            list: Las rutas de los respaldos borrados.
+        """
+        if not self.conservar:
+            return []
+        sobran = [ruta for ruta in self.listar()[self.conservar :] if ruta != excepto]
+        for ruta in sobran:
+            os.remove(ruta)
+        return sobran
+
+    def _copiar(self, origen, destino, comprimir, progreso, cancelado):
+        parcial = destino + ".parcial"
+        try:
+            copia = sqlite3.connect(parcial)
+            try:
+                origen.backup(
+                    copia,
+                    pages=self.paginas,
+                    progress=self._avance(progreso, cancelado),
+                )
+                # La copia hereda el modo WAL; suelta queda mejor en un solo archivo.
+                copia.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                copia.close()
+            if comprimir:
+                with open(parcial, "rb") as entrada, gzip.open(
+                    destino, "wb", compresslevel=6
+                ) as salida:
+                    shutil.copyfileobj(entrada, salida)
+                os.remove(parcial)
+            else:
+                os.replace(parcial, destino)
+        except BaseException:
+            for ruta in (parcial, destino):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            raise
+
+    @staticmethod
+    def _avance(progreso, cancelado):
+        # Connection.backup() llama a progress(estado, restantes, total) después de
+        # cada paso; una excepción ahí aborta la copia.
+        def avance(estado, restantes, total):
+            if cancelado is not None and cancelado.is_set():
+                raise OperacionCancelada()
+            if progreso:
+                progreso(total - restantes, total)
+
+        return avance
+
+
+@cache
+def adaptador_lote():
+    """
+    Devuelve el TypeAdapter(list[UserInput]) usado por validar_lote.
+
+    Se compila la primera vez que se usa, no al importar el módulo.
+
+    Devuelve:
+        TypeAdapter: El validador de listas de UserInput.
+    """
+    return TypeAdapter(list[Comunicacion.UserInput])
+
+
+def validar_bloque(bloque):
+    """
+    Valida un bloque de filas numeradas con UserInput.
+
+    Está fuera de Comunicacion para que ProcessPoolExecutor pueda ejecutarla en
+    otro proceso.
+
+    Args:
+        bloque (list): Pares (numero_fila, fila).
+
+    Devuelve:
+        tuple: (validas, rechazadas). validas son tuplas (numero_fila, fila,
+        valores) con los valores ya convertidos por UserInput; rechazadas son
+        tuplas (numero_fila, fila, errores).
+    """
+    UserInput = Comunicacion.UserInput
+    rechazadas = []
+    completas = []
+    for numero, fila in bloque:
+        if len(fila) == 4:
+            completas.append((numero, fila))
+        else:
+            rechazadas.append((numero, fila, [UserInput.error(None, "columnas")]))
+    validas = []
+    validaciones = UserInput.validar_lote([fila for _, fila in completas])
+    for (numero, fila), (is_valid, resultado) in zip(completas, validaciones):
+        if is_valid:
+            valores = (
+                resultado.nombre,
+                resultado.edad,
+                resultado.correo,
+                resultado.telefono,
+            )
+            validas.append((numero, fila, valores))
+        else:
+            rechazadas.append((numero, fila, resultado))
+    return validas, rechazadas
+
+
+class TrabajadorBD(threading.Thread):
+    """
+    Hilo que ejecuta las operaciones de base de datos fuera del hilo de Tk.
+
+    El hilo abre su propia Comunicacion y atiende una cola de pedidos. Los
+    resultados, errores y avisos se dejan en una cola de respuestas que el hilo
+    de Tk revisa periódicamente con after(), así que los callbacks siempre corren
+    en el hilo de la interfaz.
+
+    Args:
+        master: El widget de Tk usado para programar la revisión de respuestas.
+        ruta (str): La ruta del archivo de la base de datos.
+        intervalo (int): Milisegundos entre revisiones de la cola de respuestas.
+        perfil (str): El perfil de almacenamiento de la conexión del hilo.
+        instrumentacion (Instrumentacion): La instrumentación de la conexión del
+            hilo, o None.
+        diferir (float): Los segundos de retardo de la escritura diferida de la
+            conexión del hilo, o None para escribir en el momento. Sin pedidos,
+            el hilo guarda las escrituras pendientes cuando vence el retardo, y
+            siempre antes de terminar.
+        al_vaciar (callable): Se llama sin argumentos en el hilo de Tk cada vez que
+            se guardan escrituras diferidas, o None.
+
+    Atributos:
+        pedidos (queue.Queue): Los pedidos pendientes para el hilo.
+        respuestas (queue.Queue): Los callbacks pendientes para el hilo de Tk.
+        DEMORA_APURADA (int): Milisegundos entre revisiones después de apurar().
+    """
+
+    DEMORA_APURADA = 5
+
+    def __init__(
+        self,
+        master,
+        ruta="base_datos.db",
+        intervalo=50,
+        perfil=Comunicacion.PERFIL_POR_DEFECTO,
+        instrumentacion=None,
+        diferir=None,
+        al_vaciar=None,
+    ):
+        super().__init__(daemon=True)
+        self.master = master
+        self.ruta = ruta
+        self.perfil = perfil
+        self.instrumentacion = instrumentacion
+        self.diferir = diferir
+        self.al_vaciar = al_vaciar
+        self.intervalo = intervalo
+        self.pedidos = queue.Queue()
+        self.respuestas = queue.Queue()
+        self.start()
+        self._apurado_hasta = 0.0
+        # La primera revisión espera al mainloop, así quien crea el hilo termina de
+        # prepararse antes de recibir callbacks.
+        self._revision = self.master.after(self.intervalo, self._revisar)
+
+    def run(self):
+        base_datos = Comunicacion(
+            self.ruta,
+            avisar=self._avisar,
+            perfil=self.perfil,
+            instrumentacion=self.instrumentacion,
+            diferir=self.diferir,
+        )
+        diferidas = base_datos.diferidas
+        if diferidas is not None and self.al_vaciar is not None:
+            diferidas.al_vaciar = lambda: self.publicar(self.al_vaciar)
+            # Lo recuperado del diario al abrir también se muestra.
+            self.publicar(self.al_vaciar)
+        while True:
+            try:
+                pedido = self.pedidos.get(
+                    timeout=None if diferidas is None else diferidas.vence()
+                )
+            except queue.Empty:
+                base_datos.vaciar_diferidas()
+                continue
+            if pedido is None:
+                break
+            funcion, args, kwargs, al_terminar, al_fallar, cancelado = pedido
+            if cancelado.is_set():
+                continue
+            try:
+                resultado = funcion(base_datos, *args, **kwargs)
+            except Exception as e:
+                self.publicar(al_fallar, e)
+            else:
+                if al_terminar is not None:
+                    self.publicar(al_terminar, resultado)
+        base_datos.vaciar_diferidas()
+        base_datos.conexion.execute("PRAGMA optimize")
+        base_datos.conexion.close()
+
+    def enviar(
+        self,
+        funcion,
+        *args,
+        al_terminar=None,
+        al_fallar=None,
+        cancelable=False,
+        **kwargs,
+    ):
+        """
+        Encola una operación para que la ejecute el hilo de base de datos.
+
+        Args:
+            funcion (callable): Se llama como funcion(comunicacion, *args, **kwargs),
+                por ejemplo Comunicacion.buscar_datos_por_nombre.
+            al_terminar (callable): Recibe el resultado, en el hilo de Tk.
+            al_fallar (callable): Recibe la excepción, en el hilo de Tk. Por defecto
+                se muestra en un cuadro de diálogo.
+            cancelable (bool): Si es True, funcion recibe además cancelado=evento.
+
+        Devuelve:
+            threading.Event: El evento que cancela la operación al activarse.
+        """
+        cancelado = threading.Event()
+        if cancelable:
+            kwargs["cancelado"] = cancelado
+        self.pedidos.put(
+            (
+                funcion,
+                args,
+                kwargs,
+                al_terminar,
+                al_fallar or self._mostrar_error,
+                cancelado,
+            )
+        )
+        return cancelado
+
+    def publicar(self, funcion, *args):
+        """
+        Pide que funcion(*args) se ejecute en el hilo de Tk.
+
+        Puede llamarse desde cualquier hilo, por ejemplo para informar progreso.
+
+        Args:
+            funcion (callable): La función a ejecutar.
+
+        Devuelve:
+            Ninguno
+        """
+        self.respuestas.put((funcion, args))
+
+    def detener(self):
+        """
+        Termina el hilo después de los pedidos ya encolados.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.pedidos.put(None)
+
+    def _avisar(self, tipo, titulo, mensaje):
+        self.publicar(avisar_con_dialogo, tipo, titulo, mensaje)
+
+    def _mostrar_error(self, error):
+        if not isinstance(error, OperacionCancelada):
+            messagebox.showerror("Error", str(error))
+
+    def apurar(self):
+        """
+        Revisa las respuestas cada pocos milisegundos hasta que llegue la próxima,
+        para un pedido que la interfaz espera enseguida (una página al desplazarse).
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self._apurado_hasta = perf_counter() + 1.0
+        self.master.after_cancel(self._revision)
+        self._revision = self.master.after(self.DEMORA_APURADA, self._revisar)
+
+    def _revisar(self):
+        if self.is_alive():
+            apurado = perf_counter() < self._apurado_hasta
+            self._revision = self.master.after(
+                self.DEMORA_APURADA if apurado else self.intervalo, self._revisar
+            )
+        while True:
+            try:
+                funcion, args = self.respuestas.get_nowait()
+            except queue.Empty:
+                break
+            self._apurado_hasta = 0.0
+            funcion(*args)
+
+
+class IndiceNombres:
+    """
+    Índice en memoria de los nombres, ordenado como el índice NOCASE de SQLite.
 
-    Args: self
+    Responde las búsquedas por prefijo con bisect sobre una lista ordenada, sin
+    consultar la base de datos. Guarda solo el nombre plegado y el ID de cada fila;
+    los demás datos se leen después, y solo para las filas que se muestran.
+
+    Args:
+        claves (list): Los nombres plegados con Comunicacion.plegar, ordenados.
+        ids (list): El ID de cada nombre de claves, en el mismo orden.
 
     Atributos:
-        conexion (sqlite3.Connection): La conexión con la base de datos.
-        cursor (sqlite3.Cursor): El cursor para ejecutar las consultas SQL.
-        nombre (str): El nombre del usuario.
-        edad (str): La edad del usuario.
-        correo (str): El correo electrónico del usuario.
-        telefono (str): El número de teléfono del usuario.
+        listo (bool): Si el índice ya se cargó; mientras no, las búsquedas van a
+            la base de datos.
     """
 
-    def __init__(self):
-        self.conexion = sqlite3.connect("base_datos.db")
-        self.cursor = self.conexion.cursor()
-        self.nombre = ""
-        self.edad = ""
-        self.correo = ""
-        self.telefono = ""
+    def __init__(self, claves=None, ids=None):
+        self.listo = claves is not None
+        self.claves = claves or []
+        self.ids = ids or []
+        self.clave_de = dict(zip(self.ids, self.claves))
 
-    class UserInput(BaseModel):
+    @classmethod
+    def cargar(cls, base_datos):
         """
-        Clase que representa la entrada del usuario y proporciona métodos de validación.
+        Arma el índice recorriendo los nombres de la base en el orden de su índice.
+
+        Como el índice NOCASE ya los devuelve ordenados, no hace falta ordenar.
+        Es lento con bases grandes: conviene llamarlo en el hilo de base de datos.
 
         Args:
-            cls: La clase en sí.
-            nombre (str): El nombre del usuario.
-            edad (int): La edad del usuario.
-            correo (str): El correo electrónico del usuario.
-            telefono (int): El número de teléfono del usuario.
+            base_datos (Comunicacion): La conexión con la base de datos.
 
         Devuelve:
-            Tupla[bool, str]: Una tupla que indica si la entrada es válida y un mensaje de error en caso contrario.
+            IndiceNombres: El índice cargado.
+        """
+        claves = []
+        ids = []
+        for bloque in base_datos.iterar_nombres():
+            for ID, nombre in bloque:
+                ids.append(ID)
+                claves.append(base_datos.plegar(nombre))
+        return cls(claves, ids)
 
-        Lanza:
-            ValidationError: Aparece cuando la entrada no es válida.
+    def buscar(self, prefijo, limite):
+        """
+        Devuelve los ID de los nombres que empiezan con un texto, en orden de nombre.
 
-        Ejemplo:
-            ```
-            user_input = UserInput()
-            is_valid, error_message = user_input.validate_input("Juan", 25, "juan@ejemplo.com", 1234567890)
-            if is_valid:
-                print("La entrada es válida")
-            si no:
-                print(f "La entrada no es válida: {mensaje_error}")
-            ```
+        Args:
+            prefijo (str): El comienzo del nombre (no vacío).
+            limite (int): La cantidad máxima de ID a devolver.
+
+        Devuelve:
+            tuple: (ids, total) con los primeros `limite` ID y la cantidad total de
+            coincidencias.
         """
+        desde = Comunicacion.plegar(prefijo)
+        hasta = Comunicacion.limite_prefijo(desde)
+        inicio = bisect_left(self.claves, desde)
+        fin = bisect_left(self.claves, hasta, inicio)
+        return self.ids[inicio : min(fin, inicio + limite)], fin - inicio
 
-        nombre: str = Field(..., min_length=2)
-        edad: int = Field(..., ge=18, le=100)
-        correo: EmailStr
-        telefono: int
+    def agregar(self, ID, nombre):
+        """
+        Agrega un nombre nuevo en su lugar del orden.
 
-        @classmethod
-        def validate_input(cls, nombre, edad, correo, telefono):
-            """
-            Valida la entrada del usuario para cada campo (nombre, edad, correo, teléfono) y genera un ValueError si la entrada no es válida.
-            """
-            error_message = ""
-            try:
-                user_input = cls(
-                    nombre=nombre, edad=edad, correo=correo, telefono=telefono
-                )
-                user_input.model_validate(user_input.model_dump())
-                is_valid = True
-            except ValidationError as e:
-                is_valid = False
+        Args:
+            ID (int): El ID de la fila.
+            nombre (str): El nombre.
 
-                if "less_than_equal" in str(e):
-                    messagebox.showerror("Error", "Edad fuera de rango (18-100 Años)")
-                elif "nombre" in str(e):
-                    messagebox.showerror(
-                        "Error", "El Nombre debe tener mas de dos letras"
-                    )
-                elif "correo" in str(e):
-                    messagebox.showerror("Error", "Correo inválido")
-                elif "telefono" in str(e):
-                    messagebox.showerror("Error", "Telefono inválido")
-                else:
-                    error_message = str(e)
+        Devuelve:
+            Ninguno
+        """
+        clave = Comunicacion.plegar(nombre)
+        posicion = bisect_right(self.claves, clave)
+        self.claves.insert(posicion, clave)
+        self.ids.insert(posicion, ID)
+        self.clave_de[ID] = clave
 
-            return is_valid, error_message
+    def quitar(self, ids):
+        """
+        Quita los nombres de filas eliminadas.
 
-    def inserta_datos(self, nombre, edad, correo, telefono):
+        Args:
+            ids (iterable): Los ID de las filas.
+
+        Devuelve:
+            Ninguno
         """
-        Inserta los datos en la base de datos si son válidos.
+        for ID in ids:
+            clave = self.clave_de.pop(ID, None)
+            if clave is None:
+                continue
+            posicion = bisect_left(self.claves, clave)
+            while self.ids[posicion] != ID:
+                posicion += 1
+            del self.claves[posicion]
+            del self.ids[posicion]
+
+    def actualizar(self, ID, nombre):
+        """
+        Mueve una fila a su nuevo lugar después de cambiarle el nombre.
+
         Args:
-            self
-            nombre (str): El nombre del usuario.
-            edad (int): La edad del usuario.
-            correo (str): El correo electrónico del usuario.
-            telefono (int): El número de teléfono del usuario.
+            ID (int): El ID de la fila.
+            nombre (str): El nombre nuevo.
+
+        Devuelve:
+            Ninguno
         """
-        is_valid, error_message = self.UserInput.validate_input(
-            nombre, edad, correo, telefono
+        self.quitar((ID,))
+        self.agregar(ID, nombre)
+
+
+class Vista(NamedTuple):
+    """
+    El orden y los filtros con que TablaVirtual muestra la tabla datos.
+
+    Arma las condiciones y el ORDER BY de las consultas de página. La clave de
+    paginación es (columna de orden, ID), y cada columna ordenable tiene un
+    índice, también combinada con el dominio (ver
+    Comunicacion._migracion_indices_orden), así que ordenar o filtrar no obliga a
+    leer toda la tabla.
+
+    Args:
+        orden (str): La columna de orden: "ID", "NOMBRE", "EDAD", "CORREO" o
+            "TELEFONO".
+        descendente (bool): Si el orden es de mayor a menor.
+        edad_minima (int): Filtra las filas con EDAD menor, o None.
+        edad_maxima (int): Filtra las filas con EDAD mayor, o None.
+        dominio (str): Deja solo los correos de este dominio, o None.
+    """
+
+    orden: str = "ID"
+    descendente: bool = False
+    edad_minima: int | None = None
+    edad_maxima: int | None = None
+    dominio: str | None = None
+
+    # Columna -> (posición en la fila, intercalación), igual que en los índices.
+    COLUMNAS = {
+        "ID": (0, ""),
+        "NOMBRE": (1, " COLLATE NOCASE"),
+        "EDAD": (2, ""),
+        "CORREO": (3, " COLLATE NOCASE"),
+        "TELEFONO": (4, ""),
+    }
+    DOMINIO = "substr(CORREO, instr(CORREO, '@') + 1)"
+
+    def filtros(self):
+        """
+        Devuelve solo los filtros, por ejemplo como clave de la cantidad de filas.
+
+        Devuelve:
+            tuple: (edad_minima, edad_maxima, dominio).
+        """
+        return (self.edad_minima, self.edad_maxima, self.dominio)
+
+    def filtrada(self):
+        """
+        Indica si la vista tiene algún filtro.
+
+        Devuelve:
+            bool: True si algún filtro está puesto.
+        """
+        return any(filtro is not None for filtro in self.filtros())
+
+    def claves(self):
+        """
+        Devuelve las columnas de la clave de paginación.
+
+        Devuelve:
+            list: ["ID"], o [columna de orden, "ID"].
+        """
+        return ["ID"] if self.orden == "ID" else [self.orden, "ID"]
+
+    def clave(self, fila):
+        """
+        Devuelve la clave de paginación de una fila.
+
+        Args:
+            fila (tuple): Una fila (ID, NOMBRE, EDAD, CORREO, TELEFONO).
+
+        Devuelve:
+            tuple: Los valores de las columnas de claves().
+        """
+        return tuple(fila[self.COLUMNAS[columna][0]] for columna in self.claves())
+
+    def condiciones(self, clave=None, adelante=True, incluida=False):
+        """
+        Arma el WHERE de los filtros y, si se da una clave, el del keyset.
+
+        Args:
+            clave (tuple): La clave de la fila ancla, o None.
+            adelante (bool): Si se buscan las filas que siguen al ancla en el orden
+                de la vista (o las anteriores).
+            incluida (bool): Si la fila ancla entra en el resultado.
+
+        Devuelve:
+            tuple: (condiciones, valores) con el texto para después de WHERE y la
+            lista de parámetros.
+        """
+        condiciones = []
+        valores = []
+        # Un rango de edades nunca deja menos de ~1/80 de las filas: conviene
+        # recorrer el índice del orden y descartar, no ordenar todo el rango. El
+        # + evita que SQLite elija el índice de EDAD.
+        edad = "EDAD" if self.orden == "EDAD" else "+EDAD"
+        if self.edad_minima is not None:
+            condiciones.append(f"{edad} >= ?")
+            valores.append(self.edad_minima)
+        if self.edad_maxima is not None:
+            condiciones.append(f"{edad} <= ?")
+            valores.append(self.edad_maxima)
+        if self.dominio is not None:
+            condiciones.append(f"{self.DOMINIO} = ?")
+            valores.append(self.dominio)
+        if clave is not None:
+            comparacion = ">" if adelante != self.descendente else "<"
+            if incluida:
+                comparacion += "="
+            columnas = self.claves()
+            if len(columnas) > 1:
+                # SQLite no usa el índice para buscar el comienzo de un row value
+                # con intercalación: esta condición le da el punto de partida.
+                _, colacion = self.COLUMNAS[self.orden]
+                condiciones.append(f"{self.orden} {comparacion[0]}= ?{colacion}")
+                valores.append(clave[0])
+            lista = ", ".join(f"{c}{self.COLUMNAS[c][1]}" for c in columnas)
+            marcas = ", ".join("?" for _ in columnas)
+            condiciones.append(f"({lista}) {comparacion} ({marcas})")
+            valores.extend(clave)
+        return " AND ".join(condiciones) or "1", valores
+
+    def orden_sql(self, adelante=True):
+        """
+        Arma el ORDER BY de la vista.
+
+        Args:
+            adelante (bool): False para recorrer el orden al revés.
+
+        Devuelve:
+            str: El texto para después de ORDER BY.
+        """
+        sentido = "ASC" if adelante != self.descendente else "DESC"
+        return ", ".join(
+            f"{columna}{self.COLUMNAS[columna][1]} {sentido}"
+            for columna in self.claves()
         )
-        if is_valid:
-            try:
-                cursor = self.conexion.cursor()
 
-                bd = """INSERT INTO datos (NOMBRE, EDAD, CORREO, TELEFONO)
-                VALUES('{}','{}','{}','{}')""".format(
-                    nombre, edad, correo, telefono
-                )
-                cursor.execute(bd)
-                self.conexion.commit()
-                cursor.close()
-            except sqlite3.Error as e:
-                messagebox.showerror("Database Error", str(e))
-        else:
-            messagebox.showerror("Invalid Input", error_message)
-        messagebox.showinfo("Success", "Ud. inserta datos")
 
-    def mostrar_datos(self):
+class TablaVirtual:
+    """
+    Muestra la tabla datos en un Treeview sin cargarla completa en memoria.
+
+    Mantiene un grupo fijo de items del Treeview (tantos como filas entran en
+    pantalla) y, al desplazarse, solo les cambia el contenido. Las filas se leen
+    de a una ventana con paginación por clave, así que el tiempo de refresco y la
+    memoria no crecen con el tamaño de la base de datos.
+
+    Las lecturas corren en el hilo de base de datos y la página se muestra cuando
+    llega la respuesta. Solo vale la última lectura pedida: las anteriores se
+    cancelan y, si ya se leyeron, se descartan. Los pasos de la rueda que llegan
+    mientras se lee se suman y se piden juntos desde la página mostrada.
+
+    Args:
+        tabla (ttk.Treeview): El Treeview donde se muestran los datos.
+        barra (ttk.Scrollbar): La barra de desplazamiento vertical de la tabla.
+        trabajador (TrabajadorBD): El hilo que lee las páginas.
+
+    Atributos:
+        activa (bool): Si la tabla está en modo virtual.
+        slots (list): Los iid de los items reutilizados del Treeview.
+        filas (list): Las filas mostradas actualmente, una por slot.
+        posicion (int): La posición en la tabla de la primera fila mostrada.
+        total (int): La cantidad total de filas de la tabla (con los filtros).
+        vista (Vista): El orden y los filtros de las filas mostradas.
+        instrumentacion (Instrumentacion): La de trabajador, o None.
+    """
+
+    def __init__(self, tabla, barra, trabajador):
+        self.tabla = tabla
+        self.barra = barra
+        self.trabajador = trabajador
+        self.instrumentacion = trabajador.instrumentacion
+        self.activa = False
+        self.slots = []
+        self.filas = []
+        self.posicion = 0
+        self.total = 0
+        self.vista = Vista()
+        self._pedido = None
+        self._paso = 0
+        self.alto_fila = font.Font(font=("Helvetica", 15)).metrics("linespace") + 4
+
+        self.tabla.bind("<Configure>", self._redimensionar, add="+")
+        self.tabla.bind("<MouseWheel>", self._rueda, add="+")
+        self.tabla.bind("<Button-4>", self._rueda, add="+")
+        self.tabla.bind("<Button-5>", self._rueda, add="+")
+
+    def activar(self):
         """
-        Recupera todos los datos de la base de datos.
+        Pasa la tabla a modo virtual y muestra la primera página.
 
         Args:
             self
 
         Devuelve:
-            Lista[Tupla]: Una lista de tuplas que representan los datos.
+            Ninguno
         """
-        cursor = self.conexion.cursor()
-        bd = "SELECT*FROM datos"
-        cursor.execute(bd)
-        return cursor.fetchall()
+        if not self.activa:
+            self.tabla.delete(*self.tabla.get_children())
+            self.slots = []
+            self.filas = []
+            self.tabla.configure(yscrollcommand="")
+            self.barra.configure(command=self.desplazar)
+            self.activa = True
+            self._ajustar_pool(self.tabla.winfo_height())
+        self.posicion = 0
+        self.refrescar()
 
-    def elimina_datos(self, nombre):
+    def desactivar(self):
         """
-        Elimina datos de la base de datos basándose en el nombre.
+        Sale del modo virtual para que la tabla muestre una lista común de items.
 
         Args:
             self
-            nombre (str): El nombre del usuario.
 
         Devuelve:
             Ninguno
         """
-        cursor = self.conexion.cursor()
-        bd = f"""DELETE FROM datos WHERE NOMBRE='{nombre}' """
-        cursor.execute(bd)
-        self.conexion.commit()
-        cursor.close()
+        if self.activa:
+            self._cancelar()
+            self._paso = 0
+            self.tabla.delete(*self.tabla.get_children())
+            self.slots = []
+            self.filas = []
+            self.tabla.configure(yscrollcommand=self.barra.set)
+            self.barra.configure(command=self.tabla.yview)
+            self.activa = False
+
+    def refrescar(self):
+        """
+        Vuelve a leer la página actual, por ejemplo después de una modificación.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        if self.activa:
+            self._leer_en(self.posicion, None)
+
+    def id_de(self, item):
+        """
+        Devuelve el ID de la fila que muestra un item del Treeview.
+
+        Args:
+            item (str): El iid del item.
+
+        Devuelve:
+            int: El ID de la fila, o None si el item no muestra ninguna.
+        """
+        if item in self.slots:
+            indice = self.slots.index(item)
+            if indice < len(self.filas):
+                return self.filas[indice][0]
+        return None
+
+    def actualizar_fila(self, fila):
+        """
+        Cambia el contenido de la fila visible con el mismo ID, sin releer la página.
+
+        Args:
+            fila (Contacto): La fila actualizada, o su tupla (ID, NOMBRE, EDAD,
+                CORREO, TELEFONO).
+
+        Devuelve:
+            bool: True si la fila estaba visible.
+        """
+        fila = tuple(fila)
+        for indice, actual in enumerate(self.filas):
+            if actual[0] == fila[0]:
+                self.filas[indice] = fila
+                self.tabla.item(self.slots[indice], text=fila[1], values=fila[2:5])
+                return True
+        return False
+
+    def quitar(self, ids):
+        """
+        Saca filas eliminadas de la vista y completa la página con las siguientes.
+
+        Args:
+            ids (iterable): Los ID de las filas eliminadas.
+
+        Devuelve:
+            Ninguno
+        """
+        ids = set(ids)
+        quedan = [fila for fila in self.filas if fila[0] not in ids]
+        faltan = len(self.filas) - len(quedan)
+        if not faltan:
+            return
+        self.total = max(0, self.total - faltan)
+        if quedan:
+            self._paso = 0
+            self._mostrar(quedan)
+            self._pedir(
+                Comunicacion.leer_pagina,
+                quedan[-1],
+                faltan,
+                vista=self.vista,
+                al_terminar=lambda nuevas: self._mostrar(quedan + nuevas),
+            )
+        else:
+            self.refrescar()
+
+    def desplazar(self, accion, cantidad, unidad=None):
+        """
+        Recibe los comandos de la barra de desplazamiento ("moveto" o "scroll").
+
+        Args:
+            accion (str): "moveto" o "scroll".
+            cantidad (str): La fracción destino o la cantidad de pasos.
+            unidad (str): "units" o "pages" cuando la acción es "scroll".
+
+        Devuelve:
+            Ninguno
+        """
+        if accion == "moveto":
+            self.ir_a(int(float(cantidad) * self.total))
+        else:
+            paso = int(cantidad) * (len(self.slots) if unidad == "pages" else 1)
+            self.mover(paso)
+
+    def ir_a(self, posicion):
+        """
+        Muestra la página que empieza en una posición de la tabla.
+
+        Args:
+            posicion (int): La posición (desde 0) de la primera fila a mostrar.
+
+        Devuelve:
+            Ninguno
+        """
+        self._leer_en(posicion, self.total)
+
+    def mover(self, paso):
+        """
+        Desplaza la ventana visible una cantidad de filas, leyendo solo las nuevas.
+
+        Args:
+            paso (int): Filas a avanzar (positivo) o retroceder (negativo).
+
+        Devuelve:
+            Ninguno
+        """
+        if not self.filas or paso == 0:
+            return
+        self._paso += paso
+        paso, filas = self._paso, self.filas
+        if paso > 0:
+            self._pedir(
+                Comunicacion.leer_pagina,
+                filas[-1],
+                paso,
+                vista=self.vista,
+                al_terminar=lambda nuevas: self._avanzar(filas + nuevas, paso),
+            )
+        elif paso < 0:
+            self._pedir(
+                Comunicacion.leer_pagina,
+                filas[0],
+                -paso,
+                hacia_atras=True,
+                vista=self.vista,
+                al_terminar=lambda nuevas: self._retroceder(nuevas + filas, nuevas),
+            )
+        else:
+            self._cancelar()
 
-    def actualiza_datos(self, ID, nombre, edad, correo, telefono):
+    def ordenar(self, columna):
         """
-        Actualiza los datos en la base de datos basándose en el ID.
+        Ordena por una columna; si ya se ordenaba por ella, invierte el sentido.
 
         Args:
-            self
-            ID (int): El ID de los datos.
-            nombre (str): El nombre del usuario.
-            edad (int): La edad del usuario.
-            correo (str): El correo electrónico del usuario.
-            telefono (int): El número de teléfono del usuario.
+            columna (str): "NOMBRE", "EDAD", "CORREO" o "TELEFONO".
 
         Devuelve:
-            int: El número de filas afectadas por la actualización.
+            Ninguno
         """
-        is_valid, error_message = self.UserInput.validate_input(
-            nombre, edad, correo, telefono
-        )
-        if is_valid:
-            dato = None
-            try:
-                cursor = self.conexion.cursor()
-                bd = """UPDATE datos SET NOMBRE='{}', EDAD='{}', CORREO='{}', TELEFONO='{}'
-                WHERE ID='{}' """.format(
-                    nombre, edad, correo, telefono, ID
-                )
-                cursor.execute(bd)
-                dato = cursor.rowcount
-                self.conexion.commit()
-                cursor.close()
-            except sqlite3.Error as e:
-                messagebox.showerror("Database Error", str(e))
-            else:
-                messagebox.showerror("Invalid Input", error_message)
-                return dato
+        descendente = self.vista.orden == columna and not self.vista.descendente
+        self.vista = self.vista._replace(orden=columna, descendente=descendente)
+        self.activar()
 
-    def buscar_datos_por_nombre(self, nombre):
+    def filtrar(self, edad_minima=None, edad_maxima=None, dominio=None):
         """
-        Busca datos en la base de datos basándose en el nombre.
+        Muestra solo las filas que pasan los filtros, conservando el orden.
 
         Args:
-            self
-            nombre (str): El nombre del usuario.
+            edad_minima (int): La edad mínima, o None.
+            edad_maxima (int): La edad máxima, o None.
+            dominio (str): El dominio de correo, o None.
 
         Devuelve:
-            datos (list): Una lista de datos que coinciden con el nombre.
+            Ninguno
         """
-        cursor = self.conexion.cursor()
-        bd = f"""SELECT * FROM datos WHERE NOMBRE LIKE '{nombre}%' """
-        cursor.execute(bd)
-        datos = cursor.fetchall()
-        cursor.close()
-        return datos
+        self.vista = self.vista._replace(
+            edad_minima=edad_minima, edad_maxima=edad_maxima, dominio=dominio
+        )
+        self.activar()
+
+    def _pedir(self, funcion, *args, al_terminar, **kwargs):
+        # Como las búsquedas mientras se escribe: una respuesta que no es la del
+        # último pedido se descarta.
+        self._cancelar()
+        pedido = self.trabajador.enviar(
+            funcion,
+            *args,
+            al_terminar=lambda resultado: pedido is self._pedido
+            and self._respondido(al_terminar, resultado),
+            **kwargs,
+        )
+        self._pedido = pedido
+        self.trabajador.apurar()
+
+    def _respondido(self, al_terminar, resultado):
+        self._pedido = None
+        self._paso = 0
+        if self.activa:
+            al_terminar(resultado)
+
+    def _cancelar(self):
+        if self._pedido is not None:
+            self._pedido.set()
+            self._pedido = None
+
+    def _leer_en(self, posicion, total):
+        # Sin total (al refrescar) se cuenta de nuevo en la misma lectura.
+        self._paso = 0
+        desde = (self.posicion, self.filas[0]) if self.filas else None
+        self._pedir(
+            self._leer_pagina_en,
+            posicion,
+            len(self.slots),
+            self.vista,
+            desde,
+            total,
+            al_terminar=self._mostrar_en,
+        )
+
+    @staticmethod
+    def _leer_pagina_en(base_datos, posicion, cantidad, vista, desde, total):
+        # Corre en el hilo de base de datos.
+        if total is None:
+            total = base_datos.contar_datos(vista)
+        posicion = max(0, min(posicion, total - cantidad))
+        filas = base_datos.leer_pagina_en(posicion, cantidad, vista, desde)
+        return total, posicion, filas
+
+    def _mostrar_en(self, leido):
+        self.total, self.posicion, filas = leido
+        self._mostrar(filas)
+
+    def _avanzar(self, filas, paso):
+        cantidad = len(self.slots)
+        avance = max(0, min(paso, len(filas) - cantidad))
+        self.posicion += avance
+        self._mostrar(filas[avance : avance + cantidad])
+
+    def _retroceder(self, filas, nuevas):
+        self.posicion = max(0, self.posicion - len(nuevas))
+        self._mostrar(filas[: len(self.slots)])
+
+    def _mostrar(self, filas):
+        seleccionados = {self.id_de(item) for item in self.tabla.selection()}
+        self.filas = filas
+        visibles = []
+        for slot, fila in zip(self.slots, filas):
+            self.tabla.item(slot, text=fila[1], values=fila[2:5])
+            self.tabla.move(slot, "", len(visibles))
+            visibles.append(slot)
+        self.tabla.detach(*self.slots[len(filas) :])
+        self.tabla.selection_set(
+            *[slot for slot, fila in zip(visibles, filas) if fila[0] in seleccionados]
+        )
+        if self.instrumentacion is not None:
+            self.instrumentacion.contar("items_reescritos", len(visibles))
+        if self.total:
+            self.barra.set(
+                self.posicion / self.total,
+                (self.posicion + len(filas)) / self.total,
+            )
+        else:
+            self.barra.set(0, 1)
+
+    def _redimensionar(self, event):
+        if self.activa and self._ajustar_pool(event.height):
+            self.refrescar()
+
+    def _ajustar_pool(self, alto):
+        cantidad = max(1, alto // self.alto_fila - 1)
+        if cantidad == len(self.slots):
+            return False
+        if self.instrumentacion is not None:
+            self.instrumentacion.contar(
+                "items_insertados", max(0, cantidad - len(self.slots))
+            )
+        while len(self.slots) < cantidad:
+            self.slots.append(self.tabla.insert("", "end", iid=f"v{len(self.slots)}"))
+        sobrantes = self.slots[cantidad:]
+        if sobrantes:
+            self.tabla.delete(*sobrantes)
+            del self.slots[cantidad:]
+            del self.filas[cantidad:]
+        return True
+
+    def _rueda(self, event):
+        if not self.activa:
+            return None
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.mover(-3)
+        else:
+            self.mover(3)
+        return "break"
+
+
+Instrumentacion.medir_metodos(TablaVirtual)
 
 
 class Ventana(Frame):
@@ -225,8 +4485,26 @@ class Ventana(Frame):
         correo (StringVar): El correo electrónico del usuario.
         telefono (StringVar): El número de teléfono del usuario.
         base_datos (Comunicacion): Una instancia de la clase Comunicación para la comunicación con la base de datos.
+        trabajador (TrabajadorBD): El hilo que ejecuta las operaciones lentas de base de datos.
+        cancelado (threading.Event): Cancela la operación larga en curso, si la hay.
+        instrumentacion (Instrumentacion): Los tiempos y contadores que se muestran
+            en la barra de estado, o None si no se pidió AGENDA_INSTRUMENTAR.
+        indice (IndiceNombres): Los nombres en memoria para buscar mientras se escribe.
+        RETARDO_BUSQUEDA (int): Milisegundos sin teclear antes de buscar.
+        LIMITE_RESULTADOS (int): Filas máximas que muestra una búsqueda por nombre.
+        ENCABEZADOS (dict): Los encabezados de la tabla que ordenan por cada columna.
     """
 
+    RETARDO_BUSQUEDA = 150
+    LIMITE_RESULTADOS = 1000
+    # Columna de la base -> (columna del Treeview, título del encabezado).
+    ENCABEZADOS = {
+        "NOMBRE": ("#0", "NOMBRE"),
+        "EDAD": ("Edad", "EDAD"),
+        "CORREO": ("Correo", "MAIL"),
+        "TELEFONO": ("Telefono", "TELEFONO"),
+    }
+
     def __init__(self, master):
         super().__init__(master)
 
@@ -234,13 +4512,31 @@ class Ventana(Frame):
         self.edad = StringVar()
         self.correo = StringVar()
         self.telefono = StringVar()
+        self.busqueda_contiene = BooleanVar()
 
         self.master.columnconfigure(0, weight=1)
         self.master.rowconfigure(0, weight=1)
         self.master.rowconfigure(1, weight=5)
-        self.base_datos = Comunicacion()
+        self.instrumentacion = Instrumentacion.desde_entorno()
+        self.base_datos = Comunicacion(instrumentacion=self.instrumentacion)
+        self.trabajador = TrabajadorBD(
+            self.master,
+            self.base_datos.ruta,
+            perfil=self.base_datos.perfil,
+            instrumentacion=self.instrumentacion,
+            diferir=Comunicacion.DIFERIR_POR_DEFECTO,
+            al_vaciar=self._diferidas_guardadas,
+        )
+        self.cancelado = None
+        self.master.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.indice = IndiceNombres()
+        self._busqueda_pendiente = None
+        self._ultima_busqueda = None
+        self._editando = False
+        self.hilo_respaldo = None
 
         self.widgets()
+        self._cargar_indice()
 
     def widgets(self):
         """
@@ -316,13 +4612,15 @@ class Ventana(Frame):
             font=("Arial", 13, "bold"),
         ).grid(column=0, row=4, pady=5)
 
-        Entry(
+        self.entrada_nombre = Entry(
             self.frame_uno,
             textvariable=self.nombre,
             font=("Comic Sans MS", 12),
             highlightbackground="deep sky blue",
             highlightthickness=5,
-        ).grid(column=1, row=1)
+        )
+        self.entrada_nombre.grid(column=1, row=1)
+        self.entrada_nombre.bind("<KeyRelease>", self.programar_busqueda)
         Entry(
             self.frame_uno,
             textvariable=self.edad,
@@ -344,6 +4642,14 @@ class Ventana(Frame):
             highlightbackground="deep sky blue",
             highlightthickness=5,
         ).grid(column=1, row=4)
+        Checkbutton(
+            self.frame_uno,
+            text="Buscar nombres que contengan el texto",
+            variable=self.busqueda_contiene,
+            font=("Arial", 9, "bold"),
+            bg="white",
+            command=self.programar_busqueda,
+        ).grid(column=1, row=5, pady=5)
 
         Button(
             self.frame_uno,
@@ -398,7 +4704,7 @@ class Ventana(Frame):
             bg="deep sky blue",
             width=20,
             bd=3,
-            # command=self.change_frame_color,
+            command=self.eliminar_datos,
         ).grid(column=2, row=7, pady=5, padx=5)
         Button(
             self.frame_uno,
@@ -420,6 +4726,78 @@ class Ventana(Frame):
             width=20,
             bd=3,
         ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="IMPORTAR CSV",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            width=20,
+            bd=3,
+            command=self.importar_csv,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="BORRAR RESULTADOS BÚSQUEDA",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            width=20,
+            bd=3,
+            command=self.eliminar_resultados,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="ESTADÍSTICAS",
+            font=("Arial", 9, "bold"),
+            bg="light green",
+            width=20,
+            bd=3,
+            command=self.mostrar_estadisticas,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="BUSCAR DUPLICADOS",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            width=20,
+            bd=3,
+            command=self.buscar_duplicados,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="EXPORTAR CAMBIOS",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            width=20,
+            bd=3,
+            command=self.guardar_cambios,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="SINCRONIZAR EXCEL",
+            font=("Arial", 9, "bold"),
+            bg="light green",
+            width=20,
+            bd=3,
+            command=self.sincronizar_excel,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="RESPALDAR",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            width=20,
+            bd=3,
+            command=self.respaldar,
+        ).grid(column=2, pady=5)
+        Button(
+            self.frame_uno,
+            text="RESTAURAR RESPALDO",
+            font=("Arial", 9, "bold"),
+            bg="light green",
+            width=20,
+            bd=3,
+            command=self.restaurar_respaldo,
+        ).grid(column=2, pady=5)
 
         estilo_tabla = ttk.Style()
         estilo_tabla.configure(
@@ -453,6 +4831,32 @@ class Ventana(Frame):
         )
         ladoy.grid(column=1, row=0, sticky="ns")
         self.tabla.configure(xscrollcommand=ladox.set, yscrollcommand=ladoy.set)
+        self.progreso = ttk.Progressbar(self.frame_dos, mode="determinate")
+        self.progreso.grid(column=0, row=2, sticky="ew")
+        self.progreso.grid_remove()
+        self.boton_cancelar = Button(
+            self.frame_dos,
+            text="CANCELAR",
+            font=("Arial", 9, "bold"),
+            bg="light grey",
+            bd=3,
+            command=self.cancelar_operacion,
+        )
+        self.boton_cancelar.grid(column=1, row=2)
+        self.boton_cancelar.grid_remove()
+        self.virtual = TablaVirtual(self.tabla, ladoy, self.trabajador)
+        if self.instrumentacion is not None:
+            self.estado = Label(
+                self.frame_dos,
+                text="",
+                anchor="w",
+                fg="black",
+                bg="light grey",
+                font=("Arial", 9),
+            )
+            self.estado.grid(column=0, row=3, columnspan=2, sticky="ew")
+            self.estado.bind("<Button-1>", self.volcar_instrumentacion)
+            self._refrescar_estado()
 
         self.tabla["columns"] = ("Edad", "Correo", "Telefono")
         self.tabla.column("#0", minwidth=100, width=120, anchor="center")
@@ -460,10 +4864,51 @@ class Ventana(Frame):
         self.tabla.column("Correo", minwidth=100, width=120, anchor="center")
         self.tabla.column("Telefono", minwidth=100, width=120, anchor="center")
 
-        self.tabla.heading("#0", text="NOMBRE", anchor="center")
-        self.tabla.heading("Edad", text="EDAD", anchor="center")
-        self.tabla.heading("Correo", text="MAIL", anchor="center")
-        self.tabla.heading("Telefono", text="TELEFONO", anchor="center")
+        for columna, (encabezado, titulo) in self.ENCABEZADOS.items():
+            self.tabla.heading(
+                encabezado,
+                text=titulo,
+                anchor="center",
+                command=lambda columna=columna: self.ordenar_tabla(columna),
+            )
+
+        self.edad_desde = StringVar()
+        self.edad_hasta = StringVar()
+        self.dominio = StringVar()
+        filtros = Frame(self.frame_dos, bg="white")
+        filtros.grid(column=0, row=4, columnspan=2, sticky="ew")
+        for columna, (texto, variable) in enumerate(
+            (
+                ("EDAD DESDE", self.edad_desde),
+                ("HASTA", self.edad_hasta),
+                ("DOMINIO MAIL", self.dominio),
+            )
+        ):
+            Label(
+                filtros, text=texto, fg="black", bg="white", font=("Arial", 9, "bold")
+            ).grid(column=2 * columna, row=0, padx=5)
+            Entry(
+                filtros,
+                textvariable=variable,
+                font=("Comic Sans MS", 10),
+                width=14 if variable is self.dominio else 5,
+            ).grid(column=2 * columna + 1, row=0, pady=3)
+        Button(
+            filtros,
+            text="FILTRAR",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            bd=3,
+            command=self.filtrar_tabla,
+        ).grid(column=6, row=0, padx=5)
+        Button(
+            filtros,
+            text="QUITAR FILTROS",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            bd=3,
+            command=self.quitar_filtros,
+        ).grid(column=7, row=0, padx=5)
 
         self.tabla.bind("<<TreeviewSelect>>", self.obtener_fila)
         self.tabla.bind("<Double-1>", self.eliminar_datos)
@@ -485,25 +4930,114 @@ class Ventana(Frame):
             self.edad.set(self.data["values"][0])
             self.correo.set(self.data["values"][1])
             self.telefono.set(self.data["values"][2])
+            # Los campos muestran una fila para editarla: no se busca al escribir.
+            self._editando = True
 
-    def eliminar_datos(self, event):
+    def eliminar_datos(self, event=None):
         """
         Elimina los datos seleccionados de la tabla y de la base de datos.
 
+        Se pueden seleccionar varias filas (Ctrl/Shift + click); todas se borran en
+        una sola transacción.
+
         Args:
-            Evento: El evento que disparó la función.
+            Evento: El evento que disparó la función, o None desde el botón.
+
+        Devuelve:
+            Ninguno
+        """
+        self.limpiar_campos()
+        ids = [self.id_de_item(item) for item in self.tabla.selection()]
+        self._eliminar_ids([ID for ID in ids if ID is not None])
+
+    def eliminar_resultados(self):
+        """
+        Elimina todas las filas que coinciden con la última búsqueda por nombre.
+
+        La lista muestra como mucho LIMITE_RESULTADOS filas, y otra conexión pudo
+        agregar coincidencias después de buscar: se cuentan todas las que
+        coinciden ahora, se pide confirmación con esa cantidad y se borran con la
+        misma condición de la búsqueda, en el hilo de base de datos.
+
+        Args:
+            self
 
         Devuelve:
             Ninguno
         """
+        if self.virtual.activa or not self._ultima_busqueda:
+            messagebox.showinfo(
+                "Información", "Primero busque por nombre los datos a borrar."
+            )
+            return
+        nombre, contiene = self._ultima_busqueda
+        mostradas = len(self.tabla.get_children())
         self.limpiar_campos()
-        item = self.tabla.selection()[0]
-        x = messagebox.askquestion(
-            "Informacion", "Esta por BORRAR dato. Desea Continuar?"
+        self.trabajador.enviar(
+            Comunicacion.contar_datos_por_nombre,
+            nombre,
+            contiene,
+            al_terminar=lambda total: self._confirmar_eliminar_busqueda(
+                nombre, contiene, total, mostradas
+            ),
         )
-        if x == "yes":
-            self.tabla.delete(item)
-            self.base_datos.elimina_datos(self.data["text"])
+
+    def _confirmar_eliminar_busqueda(self, nombre, contiene, total, mostradas):
+        if not total:
+            return
+        pregunta = f"Esta por BORRAR {total} datos."
+        if total != mostradas:
+            pregunta += f" En la lista se mostraban {mostradas}."
+        if (
+            messagebox.askquestion("Informacion", pregunta + " Desea Continuar?")
+            == "yes"
+        ):
+            self.trabajador.enviar(
+                Comunicacion.elimina_datos_por_nombre,
+                nombre,
+                contiene,
+                al_terminar=self._quitar_items,
+            )
+
+    def _eliminar_ids(self, ids):
+        if not ids:
+            return
+        if len(ids) == 1:
+            pregunta = "Esta por BORRAR dato. Desea Continuar?"
+        else:
+            pregunta = f"Esta por BORRAR {len(ids)} datos. Desea Continuar?"
+        if messagebox.askquestion("Informacion", pregunta) == "yes":
+            self.trabajador.enviar(
+                Comunicacion.elimina_datos_lote,
+                ids,
+                al_terminar=lambda _: self._quitar_items(ids),
+            )
+
+    def id_de_item(self, item):
+        """
+        Devuelve el ID de la base de datos de la fila que muestra un item de la tabla.
+
+        En modo lista el iid del item es el ID; en modo virtual se consulta el slot.
+
+        Args:
+            item (str): El iid del item del Treeview.
+
+        Devuelve:
+            int: El ID de la fila, o None si el item no corresponde a ninguna.
+        """
+        if not item:
+            return None
+        if self.virtual.activa:
+            return self.virtual.id_de(item)
+        return int(item)
+
+    def _quitar_items(self, ids):
+        if self.indice.listo:
+            self.indice.quitar(ids)
+        if self.virtual.activa:
+            self.virtual.quitar(ids)
+        else:
+            self.tabla.delete(*[str(ID) for ID in ids if self.tabla.exists(str(ID))])
 
     def agregar_datos(self):
         """
@@ -521,13 +5055,232 @@ class Ventana(Frame):
         telefono = self.telefono.get()
         datos = (edad, correo, telefono)
         if nombre and edad and correo and telefono != "":
-            self.tabla.insert("", 0, text=nombre, values=datos)
-            self.base_datos.inserta_datos(nombre, edad, correo, telefono)
+            self.trabajador.enviar(
+                Comunicacion.inserta_datos,
+                nombre,
+                edad,
+                correo,
+                telefono,
+                al_terminar=lambda ID: self._agregar_item(ID, nombre, datos),
+            )
             self.limpiar_campos()
 
-    def actualizar_tabla(self):
+    def _agregar_item(self, ID, nombre, datos):
+        if ID is None:
+            return
+        if self.indice.listo:
+            self.indice.agregar(ID, nombre)
+        if self.virtual.activa:
+            self.virtual.refrescar()
+        else:
+            self.tabla.insert("", 0, iid=str(ID), text=nombre, values=datos)
+            if self.instrumentacion is not None:
+                self.instrumentacion.contar("items_insertados")
+
+    def actualizar_tabla(self):
+        """
+        Actualiza la tabla con los últimos datos de la base de datos.
+
+        La tabla se muestra en modo virtual: solo se leen las filas visibles.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.limpiar_campos()
+        self._ultima_busqueda = None
+        self._avisar_recorte(False)
+        self.virtual.activar()
+        self._cargar_indice()
+
+    def actualizar_datos(self):
+        """
+        Actualiza los datos seleccionados en la tabla y en la base de datos.
+
+        La fila se ubica por su ID y solo se modifica el item afectado de la tabla.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        item = self.tabla.focus()
+        self.data = self.tabla.item(item)
+        ID = self.id_de_item(item)
+        nombre = self.nombre.get()
+        edad = self.edad.get()
+        correo = self.correo.get()
+        telefono = self.telefono.get()
+        if ID is not None and nombre and edad and correo and telefono != "":
+            contacto = Contacto(ID, nombre, edad, correo, telefono)
+            self.trabajador.enviar(
+                Comunicacion.actualiza_datos,
+                *contacto,
+                al_terminar=lambda filas: filas and self._actualizar_item(contacto),
+            )
+
+    def _actualizar_item(self, contacto):
+        if self.indice.listo:
+            self.indice.actualizar(contacto.ID, contacto.nombre)
+        if self.virtual.activa:
+            self.virtual.actualizar_fila(contacto)
+        elif self.tabla.exists(str(contacto.ID)):
+            self.tabla.item(
+                str(contacto.ID), text=contacto.nombre, values=contacto.valores()
+            )
+
+    def _diferidas_guardadas(self):
+        # La tabla virtual lee con la conexión de la interfaz, que no ve las
+        # escrituras diferidas hasta que el hilo de base de datos las guarda.
+        if self.virtual.activa:
+            self.virtual.refrescar()
+
+    def limpiar_campos(self):
+        """
+        Borra los campos de entrada.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.nombre.set("")
+        self.edad.set("")
+        self.correo.set("")
+        self.telefono.set("")
+        self._editando = False
+
+    def guardar_datos(self):
+        """
+        Exporta los datos de la tabla a un fichero Excel, CSV o Parquet.
+
+        Las filas se escriben a medida que se leen y el avance se muestra en la
+        barra de progreso debajo de la tabla.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.limpiar_campos()
+        ruta = self._pedir_ruta_exportacion("DATOS")
+        if not ruta:
+            return
+        self._iniciar_operacion()
+        self.cancelado = self.trabajador.enviar(
+            self._exportar,
+            ruta,
+            False,
+            cancelable=True,
+            al_terminar=self._exportacion_terminada,
+            al_fallar=self._operacion_fallida,
+        )
+
+    def guardar_cambios(self):
+        """
+        Exporta solo los contactos agregados, editados o borrados desde la
+        exportación de cambios anterior.
+
+        La primera vez se exporta todo. Los borrados aparecen con su ID y la
+        columna Borrado en 1.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.limpiar_campos()
+        ruta = self._pedir_ruta_exportacion("CAMBIOS")
+        if not ruta:
+            return
+        self._iniciar_operacion()
+        self.cancelado = self.trabajador.enviar(
+            self._exportar,
+            ruta,
+            True,
+            cancelable=True,
+            al_terminar=self._cambios_exportados,
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _pedir_ruta_exportacion(prefijo):
+        fecha = strftime("%d-%m-%y_%H-%M-%S")
+        return filedialog.asksaveasfilename(
+            title="Exportar datos",
+            initialfile=f"{prefijo} {fecha}.xlsx",
+            defaultextension=".xlsx",
+            filetypes=[
+                ("Excel", "*.xlsx"),
+                ("CSV", "*.csv"),
+                ("Parquet", "*.parquet"),
+            ],
+        )
+
+    def _exportar(self, base_datos, ruta, cambios, cancelado):
+        # Corre en el hilo de base de datos: el progreso se publica al hilo de Tk.
+        exportador = Exportador(base_datos)
+        exportar = exportador.exportar_cambios if cambios else exportador.exportar
+        return exportar(
+            ruta,
+            progreso=lambda hechas, total: self.trabajador.publicar(
+                self.mostrar_progreso, hechas, total
+            ),
+            cancelado=cancelado,
+        )
+
+    def _cambios_exportados(self, cambios):
+        self._terminar_operacion()
+        messagebox.showinfo("Informacion", f"{cambios} cambios exportados..!!")
+
+    def _exportacion_terminada(self, filas):
+        self._terminar_operacion()
+        messagebox.showinfo("Informacion", f"{filas} filas exportadas..!!")
+
+    def _iniciar_operacion(self, determinada=True):
+        if determinada:
+            self.progreso.configure(mode="determinate", value=0)
+        else:
+            self.progreso.configure(mode="indeterminate")
+            self.progreso.start()
+        self.progreso.grid()
+        self.boton_cancelar.grid()
+
+    def _terminar_operacion(self):
+        self.cancelado = None
+        self.progreso.stop()
+        self.progreso.grid_remove()
+        self.boton_cancelar.grid_remove()
+
+    def _operacion_fallida(self, error):
+        self._terminar_operacion()
+        if isinstance(error, OperacionCancelada):
+            messagebox.showinfo("Informacion", "Operación cancelada")
+        else:
+            messagebox.showerror("Error", f"No se pudo completar la operación: {error}")
+
+    def cancelar_operacion(self):
+        """
+        Cancela la exportación o importación en curso.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        if self.cancelado is not None:
+            self.cancelado.set()
+
+    def cerrar(self):
         """
-        Actualiza la tabla con los últimos datos de la base de datos.
+        Cierra la ventana después de que el hilo de base de datos termine sus pedidos.
 
         Args:
             self
@@ -535,68 +5288,58 @@ class Ventana(Frame):
         Devuelve:
             Ninguno
         """
-        self.limpiar_campos()
-        datos = self.base_datos.mostrar_datos()
-        self.tabla.delete(*self.tabla.get_children())
-        for dato in datos:
-            text = dato[1:2][0]
-            values = dato[2:5]
-            self.tabla.insert("", "end", text=text, values=values)
+        self.cancelar_operacion()
+        if self.hilo_respaldo is not None:
+            self.hilo_respaldo.join(timeout=10)
+        self.trabajador.detener()
+        self.trabajador.join(timeout=10)
+        if self.instrumentacion is not None:
+            self.instrumentacion.volcar()
+        self.master.destroy()
 
-    def actualizar_datos(self):
+    def volcar_instrumentacion(self, event=None):
         """
-        Actualiza los datos seleccionados en la tabla y en la base de datos.
+        Guarda los tiempos y contadores de la barra de estado en un archivo JSON.
 
         Args:
-            self
+            Evento: El click sobre la barra de estado, o None.
 
         Devuelve:
             Ninguno
         """
-        item = self.tabla.focus()
-        self.data = self.tabla.item(item)
-        nombre = self.data["text"]
-        datos = self.base_datos.mostrar_datos()
-        for fila in datos:
-            nombre_bd = fila[1]
-            if nombre_bd == nombre:
-                Id = fila[0]
-                if Id != None:
-                    nombre = self.nombre.get()
-                    edad = self.edad.get()
-                    correo = self.correo.get()
-                    telefono = self.telefono.get()
-                    if nombre and edad and correo and telefono != "":
-                        self.base_datos.actualiza_datos(
-                            Id, nombre, edad, correo, telefono
-                        )
-                        self.tabla.delete(*self.tabla.get_children())
-                        datos = self.base_datos.mostrar_datos()
-                        i = -1
-                        for dato in datos:
-                            i = i + 1
-                            self.tabla.insert(
-                                "", i, text=datos[i][1:2][0], values=datos[i][2:5]
-                            )
+        ruta = filedialog.asksaveasfilename(
+            title="Guardar instrumentación",
+            initialfile=os.path.basename(self.instrumentacion.volcado),
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")],
+        )
+        if ruta:
+            self.instrumentacion.volcar(ruta)
+            messagebox.showinfo("Informacion", f"Instrumentación guardada en {ruta}")
 
-    def limpiar_campos(self):
+    def _refrescar_estado(self):
+        self.estado.configure(text=self.instrumentacion.resumen())
+        self.after(1000, self._refrescar_estado)
+
+    def mostrar_progreso(self, hechas, total):
         """
-        Borra los campos de entrada.
+        Actualiza la barra de progreso durante una operación larga.
 
         Args:
-            self
+            hechas (int): La cantidad de filas procesadas.
+            total (int): La cantidad total de filas.
 
         Devuelve:
             Ninguno
         """
-        self.nombre.set("")
-        self.edad.set("")
-        self.correo.set("")
-        self.telefono.set("")
+        self.progreso.configure(maximum=max(total, 1), value=hechas)
 
-    def guardar_datos(self):
+    def importar_csv(self):
         """
-        Exporta los datos de la tabla a un fichero Excel.
+        Importa contactos desde un archivo CSV o xlsx (Nombre, Edad, Correo,
+        Telefono) en bloque.
+
+        La validación se reparte entre un proceso por núcleo.
 
         Args:
             self
@@ -604,19 +5347,40 @@ class Ventana(Frame):
         Devuelve:
             Ninguno
         """
-        self.limpiar_campos()
-        datos = self.base_datos.mostrar_datos()
-        nombre, edad, correo, telefono = list(zip(*datos))[1:5]
-        fecha = strftime("%d-%m-%y_%H-%M-%S")
-        datos = {
-            "Nombre": nombre,
-            "Edad": edad,
-            "Correo": correo,
-            "Telefono": telefono,
-        }
-        df = pd.DataFrame(datos, columns=["Nombre", "Edad", "Correo", "Telefono"])
-        df.to_excel(f"DATOS {fecha}.xlsx")
-        messagebox.showinfo("Informacion", "Datos exportados a Excel..!!")
+        ruta = filedialog.askopenfilename(
+            title="Importar CSV",
+            filetypes=[("CSV", "*.csv"), ("Excel", "*.xlsx"), ("Todos", "*.*")],
+        )
+        if not ruta:
+            return
+        self._iniciar_operacion(determinada=False)
+        self.cancelado = self.trabajador.enviar(
+            self._importar,
+            ruta,
+            cancelable=True,
+            al_terminar=self._importacion_terminada,
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _importar(base_datos, ruta, cancelado):
+        return base_datos.inserta_datos_lote(
+            leer_archivo(ruta), cancelado=cancelado, procesos=os.cpu_count() or 1
+        )
+
+    def _importacion_terminada(self, reporte):
+        self._terminar_operacion()
+        self.actualizar_tabla()
+        rechazadas = reporte["rechazadas"]
+        mensaje = f"Filas importadas: {reporte['aceptadas']}\nFilas rechazadas: {len(rechazadas)}"
+        if reporte["cancelada"]:
+            mensaje = "Importación cancelada\n" + mensaje
+        for numero, _, errores in rechazadas[:5]:
+            detalle = "; ".join(error["mensaje"] for error in errores)
+            mensaje += f"\n  Fila {numero}: {detalle}"
+        if len(rechazadas) > 5:
+            mensaje += "\n  ..."
+        messagebox.showinfo("Informacion", mensaje)
 
     def change_frame_color(self):
         """
@@ -673,7 +5437,10 @@ class Ventana(Frame):
 
     def look_for_name(self):
         """
-        Busca un nombre dentro de la tabla y muestra todas las coincidencias.
+        Busca un nombre dentro de la tabla y muestra las coincidencias.
+
+        Busca por prefijo, o por contenido si está marcada la casilla correspondiente.
+        Se muestran como mucho LIMITE_RESULTADOS filas.
 
         Args:
             self
@@ -682,17 +5449,921 @@ class Ventana(Frame):
             Ninguno
         """
         if name := self.nombre.get():
-            self.tabla.delete(*self.tabla.get_children())
-            datos = self.base_datos.buscar_datos_por_nombre(name)
-            for dato in datos:
-                text = dato[1]
-                values = dato[2:5]
-                self.tabla.insert("", "end", text=text, values=values)
+            self.trabajador.enviar(
+                Comunicacion.buscar_datos_por_nombre,
+                name,
+                contiene=self.busqueda_contiene.get(),
+                limite=self.LIMITE_RESULTADOS + 1,
+                al_terminar=self._mostrar_resultados,
+            )
         else:
             messagebox.showinfo("Información", "Ingrese un nombre para buscar.")
 
+    def mostrar_estadisticas(self):
+        """
+        Abre una ventana con la distribución de edades, los dominios de correo más
+        usados y el crecimiento de la agenda por mes.
+
+        Los datos se calculan en el hilo de base de datos con SQL y NumPy.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.trabajador.enviar(
+            Comunicacion.datos_graficos, al_terminar=self._dibujar_estadisticas
+        )
+
+    def _dibujar_estadisticas(self, datos):
+        try:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        except ImportError as e:
+            messagebox.showerror("Error", f"No se pueden dibujar los gráficos: {e}")
+            return
+        ventana = Toplevel(self.master)
+        ventana.title("ESTADÍSTICAS")
+        figura = Figure(figsize=(9, 6.5), layout="constrained")
+        ejes = figura.subplot_mosaic(
+            [["edades", "dominios"], ["crecimiento", "crecimiento"]]
+        )
+        edades = ejes["edades"]
+        decadas = datos["decadas"]
+        edades.bar(
+            [f"{desde}-{desde + 9}" for desde in decadas[:-1]],
+            datos["por_decada"],
+            color="deepskyblue",
+        )
+        edades.set_title("Edades")
+        edades.tick_params(axis="x", labelrotation=45, labelsize=8)
+
+        dominios = ejes["dominios"]
+        nombres = [dominio for dominio, _ in reversed(datos["dominios"])]
+        dominios.barh(
+            nombres,
+            [cantidad for _, cantidad in reversed(datos["dominios"])],
+            color="lightgreen",
+        )
+        dominios.set_title("Dominios de correo")
+
+        crecimiento = ejes["crecimiento"]
+        if len(datos["meses"]):
+            crecimiento.plot(
+                datos["meses"],
+                datos["acumulado"],
+                drawstyle="steps-post",
+                marker="o",
+                color="green",
+            )
+        titulo = "Contactos por mes"
+        if datos["sin_fecha"]:
+            titulo += f" ({datos['sin_fecha']} sin fecha de alta)"
+        crecimiento.set_title(titulo)
+
+        lienzo = FigureCanvasTkAgg(figura, master=ventana)
+        lienzo.draw()
+        lienzo.get_tk_widget().pack(fill="both", expand=True)
+
+    def sincronizar_excel(self):
+        """
+        Concilia la base con una planilla DATOS editada a mano.
+
+        Los contactos se emparejan por correo o teléfono. Primero se muestra un
+        resumen de las altas, cambios y bajas, y solo se aplican si se confirman.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        ruta = filedialog.askopenfilename(
+            title="Sincronizar con Excel", filetypes=[("Excel", "*.xlsx")]
+        )
+        if not ruta:
+            return
+        self._iniciar_operacion(determinada=False)
+        self.cancelado = self.trabajador.enviar(
+            self._planificar_sincronizacion,
+            ruta,
+            cancelable=True,
+            al_terminar=self._confirmar_sincronizacion,
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _planificar_sincronizacion(base_datos, ruta, cancelado):
+        return Sincronizador(base_datos).planificar(leer_xlsx(ruta), cancelado)
+
+    def _confirmar_sincronizacion(self, plan):
+        self._terminar_operacion()
+        mensaje = Sincronizador.resumen(plan)
+        for numero, _, errores in plan["rechazadas"][:5]:
+            detalle = "; ".join(error["mensaje"] for error in errores)
+            mensaje += f"\n  Fila {numero}: {detalle}"
+        if len(plan["rechazadas"]) > 5:
+            mensaje += "\n  ..."
+        if not (plan["altas"] or plan["cambios"] or plan["bajas"]):
+            messagebox.showinfo("Informacion", "Sin cambios para aplicar\n" + mensaje)
+            return
+        if not messagebox.askyesno(
+            "Sincronizar", mensaje + "\n\n¿Aplicar los cambios?"
+        ):
+            return
+        self._iniciar_operacion(determinada=False)
+        self.cancelado = self.trabajador.enviar(
+            self._aplicar_sincronizacion,
+            plan,
+            cancelable=True,
+            al_terminar=self._sincronizacion_terminada,
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _aplicar_sincronizacion(base_datos, plan, cancelado):
+        return Sincronizador(base_datos).aplicar(plan, cancelado=cancelado)
+
+    def _sincronizacion_terminada(self, reporte):
+        self._terminar_operacion()
+        self.actualizar_tabla()
+        mensaje = (
+            f"Filas guardadas: {reporte['guardadas']}\n"
+            f"Filas eliminadas: {reporte['eliminadas']}"
+        )
+        if reporte["cancelada"]:
+            mensaje = "Sincronización cancelada\n" + mensaje
+        messagebox.showinfo("Informacion", mensaje)
+
+    def respaldar(self):
+        """
+        Respalda la base de datos en la carpeta "respaldos" sin detener la agenda.
+
+        La copia corre en su propio hilo y con su propia conexión, así que se
+        puede seguir buscando y editando mientras avanza. Se conservan los
+        últimos Respaldo.CONSERVAR respaldos.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        comprimir = messagebox.askyesno(
+            "Respaldo", "¿Comprimir el respaldo? Ocupa menos pero tarda más."
+        )
+        self._iniciar_operacion()
+        cancelado = threading.Event()
+        self.cancelado = cancelado
+        # Las escrituras diferidas se guardan antes, para que entren en la copia.
+        self.trabajador.enviar(
+            Comunicacion.vaciar_diferidas,
+            al_terminar=lambda _: self._lanzar_respaldo(comprimir, cancelado),
+            al_fallar=self._operacion_fallida,
+        )
+
+    def _lanzar_respaldo(self, comprimir, cancelado):
+        self.hilo_respaldo = threading.Thread(
+            target=self._respaldar, args=(comprimir, cancelado), daemon=True
+        )
+        self.hilo_respaldo.start()
+
+    def _respaldar(self, comprimir, cancelado):
+        # Corre en el hilo del respaldo: los resultados se publican al hilo de Tk.
+        try:
+            ruta = Respaldo(self.base_datos.ruta).crear(
+                comprimir,
+                progreso=lambda hechas, total: self.trabajador.publicar(
+                    self.mostrar_progreso, hechas, total
+                ),
+                cancelado=cancelado,
+            )
+        except Exception as e:
+            self.trabajador.publicar(self._operacion_fallida, e)
+        else:
+            self.trabajador.publicar(self._respaldo_terminado, ruta)
+
+    def _respaldo_terminado(self, ruta):
+        self._terminar_operacion()
+        messagebox.showinfo("Informacion", f"Respaldo guardado en {ruta}")
+
+    def restaurar_respaldo(self):
+        """
+        Reemplaza todos los contactos por los de un respaldo elegido.
+
+        La restauración corre en el hilo de base de datos en una sola transacción:
+        si falla, la base queda como estaba.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        archivo = filedialog.askopenfilename(
+            title="Restaurar respaldo",
+            initialdir=Respaldo(self.base_datos.ruta).carpeta,
+            filetypes=[("Respaldos", "*.db *.gz")],
+        )
+        if not archivo:
+            return
+        if not messagebox.askyesno(
+            "Restaurar",
+            "Se van a reemplazar TODOS los datos por los del respaldo.\n"
+            "Conviene respaldar antes. ¿Desea continuar?",
+        ):
+            return
+        self._iniciar_operacion()
+        self.trabajador.enviar(
+            self._restaurar,
+            archivo,
+            al_terminar=self._respaldo_restaurado,
+            al_fallar=self._operacion_fallida,
+        )
+
+    def _restaurar(self, base_datos, archivo):
+        # Corre en el hilo de base de datos: el progreso se publica al hilo de Tk.
+        return Respaldo(base_datos.ruta).restaurar(
+            archivo,
+            base_datos,
+            progreso=lambda hechas, total: self.trabajador.publicar(
+                self.mostrar_progreso, hechas, total
+            ),
+        )
+
+    def _respaldo_restaurado(self, contactos):
+        self._terminar_operacion()
+        self.actualizar_tabla()
+        messagebox.showinfo("Informacion", f"{contactos} contactos restaurados..!!")
+
+    def buscar_duplicados(self):
+        """
+        Busca contactos duplicados y los muestra agrupados en otra ventana.
+
+        Dos contactos son duplicados si comparten el correo, el teléfono o el
+        nombre y la edad, comparados después de normalizarlos. La búsqueda corre
+        en el hilo de base de datos y se puede cancelar.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self._iniciar_operacion(determinada=False)
+        self.cancelado = self.trabajador.enviar(
+            self._buscar_duplicados,
+            cancelable=True,
+            al_terminar=self._mostrar_duplicados,
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _buscar_duplicados(base_datos, cancelado):
+        return Deduplicador(base_datos).buscar(cancelado)
+
+    def _mostrar_duplicados(self, grupos):
+        self._terminar_operacion()
+        if not grupos:
+            messagebox.showinfo("Informacion", "No se encontraron duplicados.")
+            return
+        ventana = Toplevel(self.master)
+        titulo = f"DUPLICADOS: {len(grupos)} grupos"
+        if len(grupos) > self.LIMITE_RESULTADOS:
+            titulo += f" (se muestran los primeros {self.LIMITE_RESULTADOS})"
+        ventana.title(titulo)
+        tabla = ttk.Treeview(ventana, columns=("Nombre", "Edad", "Correo", "Telefono"))
+        tabla.heading("#0", text="GRUPO / ID")
+        for columna in ("Nombre", "Edad", "Correo", "Telefono"):
+            tabla.heading(columna, text=columna.upper())
+            tabla.column(columna, minwidth=80, width=140, anchor="center")
+        lado = ttk.Scrollbar(ventana, orient="vertical", command=tabla.yview)
+        tabla.configure(yscrollcommand=lado.set)
+        miembros = {}
+        fusionables = set()
+        for numero, grupo in enumerate(grupos[: self.LIMITE_RESULTADOS], start=1):
+            texto = f"{numero}: {', '.join(grupo['motivos'])}"
+            if not grupo["fusionable"]:
+                texto += " (revisar)"
+            padre = tabla.insert("", "end", text=texto, open=True)
+            miembros[padre] = [contacto.ID for contacto in grupo["filas"]]
+            if grupo["fusionable"]:
+                fusionables.add(padre)
+            # Una fila puede estar en un grupo y en uno para revisar: el ID va en
+            # el texto y no como iid, que no puede repetirse.
+            for contacto in grupo["filas"]:
+                tabla.insert(
+                    padre,
+                    "end",
+                    text=contacto.ID,
+                    values=(contacto.nombre,) + contacto.valores(),
+                )
+        botones = Frame(ventana)
+        Button(
+            botones,
+            text="FUSIONAR SELECCIONADOS",
+            font=("Arial", 9, "bold"),
+            bg="light green",
+            bd=3,
+            command=lambda: self.fusionar_duplicados(tabla, miembros, fusionables),
+        ).pack(side="left", padx=5, pady=5)
+        Button(
+            botones,
+            text="FUSIONAR TODOS",
+            font=("Arial", 9, "bold"),
+            bg="deep sky blue",
+            bd=3,
+            command=lambda: self.fusionar_duplicados(
+                tabla, miembros, fusionables, todos=True
+            ),
+        ).pack(side="left", padx=5, pady=5)
+        botones.pack(side="bottom", fill="x")
+        lado.pack(side="right", fill="y")
+        tabla.pack(fill="both", expand=True)
+
+    def fusionar_duplicados(self, tabla, miembros, fusionables, todos=False):
+        """
+        Fusiona los grupos elegidos en la ventana de duplicados, en una transacción.
+
+        De cada grupo se conserva la fila seleccionada, o la de menor ID si se
+        seleccionó el grupo entero, y se eliminan las demás. Los grupos que solo
+        comparten nombre y edad se fusionan únicamente si se seleccionan.
+
+        Args:
+            tabla (ttk.Treeview): La tabla de la ventana de duplicados.
+            miembros (dict): Item de cada grupo -> ID de sus filas.
+            fusionables (set): Los items de los grupos con el mismo correo o
+                teléfono.
+            todos (bool): Si se fusionan todos los grupos fusionables que siguen en
+                la tabla.
+
+        Devuelve:
+            Ninguno
+        """
+        if todos:
+            elegidos = {
+                grupo: miembros[grupo][0]
+                for grupo in tabla.get_children()
+                if grupo in fusionables
+            }
+        else:
+            elegidos = {}
+            for item in tabla.selection():
+                if item in miembros:
+                    elegidos.setdefault(item, miembros[item][0])
+                else:
+                    elegidos[tabla.parent(item)] = int(tabla.item(item, "text"))
+        if not elegidos:
+            messagebox.showinfo("Información", "Seleccione un grupo o una fila.")
+            return
+        pares = [(conservar, miembros[grupo]) for grupo, conservar in elegidos.items()]
+        self.trabajador.enviar(
+            self._fusionar_duplicados,
+            pares,
+            al_terminar=lambda fusion: self._duplicados_fusionados(
+                tabla, list(elegidos), fusion
+            ),
+            al_fallar=self._operacion_fallida,
+        )
+
+    @staticmethod
+    def _fusionar_duplicados(base_datos, pares):
+        deduplicador = Deduplicador(base_datos)
+        eliminados = deduplicador.fusionar(pares)
+        return eliminados, deduplicador.completadas
+
+    def _duplicados_fusionados(self, tabla, grupos, fusion):
+        eliminados, completadas = fusion
+        if tabla.winfo_exists():
+            tabla.delete(*grupos)
+        self._quitar_items(eliminados)
+        for contacto in completadas:
+            self._actualizar_item(contacto)
+        messagebox.showinfo(
+            "Informacion",
+            f"{len(grupos)} grupos fusionados, {len(eliminados)} filas eliminadas.",
+        )
+
+    def ordenar_tabla(self, columna):
+        """
+        Ordena la tabla completa por una columna al hacer click en su encabezado.
+
+        Un segundo click invierte el orden. El orden lo resuelve SQLite con el
+        índice de la columna y la tabla sigue leyendo solo las filas visibles.
+
+        Args:
+            columna (str): "NOMBRE", "EDAD", "CORREO" o "TELEFONO".
+
+        Devuelve:
+            Ninguno
+        """
+        self._ultima_busqueda = None
+        self.virtual.ordenar(columna)
+        for nombre, (encabezado, titulo) in self.ENCABEZADOS.items():
+            if nombre == columna:
+                titulo += " ▼" if self.virtual.vista.descendente else " ▲"
+            self.tabla.heading(encabezado, text=titulo)
+
+    def filtrar_tabla(self):
+        """
+        Muestra solo las filas dentro del rango de edad y del dominio de correo dados.
+
+        Los campos vacíos no filtran. El filtro se resuelve en SQLite con los
+        índices de EDAD y del dominio del correo.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        try:
+            edades = [
+                int(valor) if valor.strip() else None
+                for valor in (self.edad_desde.get(), self.edad_hasta.get())
+            ]
+        except ValueError:
+            messagebox.showerror("Error", "Edad inválida")
+            return
+        dominio = self.dominio.get().strip().lstrip("@").lower() or None
+        self._ultima_busqueda = None
+        self.virtual.filtrar(*edades, dominio)
+
+    def quitar_filtros(self):
+        """
+        Vuelve a mostrar todas las filas, conservando el orden elegido.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self.edad_desde.set("")
+        self.edad_hasta.set("")
+        self.dominio.set("")
+        self._ultima_busqueda = None
+        self.virtual.filtrar()
+
+    def programar_busqueda(self, event=None):
+        """
+        Busca el nombre escrito cuando se deja de teclear por RETARDO_BUSQUEDA ms.
+
+        No busca mientras los campos muestran una fila seleccionada para editarla.
+
+        Args:
+            Evento: La tecla soltada en el campo NOMBRE, o None.
+
+        Devuelve:
+            Ninguno
+        """
+        if self._busqueda_pendiente is not None:
+            self.after_cancel(self._busqueda_pendiente)
+            self._busqueda_pendiente = None
+        if self._editando:
+            return
+        self._busqueda_pendiente = self.after(
+            self.RETARDO_BUSQUEDA, self.buscar_mientras_escribe
+        )
+
+    def buscar_mientras_escribe(self):
+        """
+        Muestra los nombres que coinciden con el texto del campo NOMBRE.
+
+        Las búsquedas por prefijo se responden con el índice en memoria; las
+        búsquedas "contiene", o las hechas antes de que el índice termine de
+        cargarse, van al hilo de base de datos. En los dos casos se muestran como
+        mucho LIMITE_RESULTADOS filas. Con el campo vacío se vuelve a mostrar toda
+        la tabla.
+
+        Args:
+            self
+
+        Devuelve:
+            Ninguno
+        """
+        self._busqueda_pendiente = None
+        nombre = self.nombre.get()
+        contiene = self.busqueda_contiene.get()
+        if (nombre, contiene) == self._ultima_busqueda:
+            return
+        self._ultima_busqueda = (nombre, contiene)
+        if not nombre:
+            self._avisar_recorte(False)
+            self.virtual.activar()
+        elif contiene or not self.indice.listo:
+            busqueda = self._ultima_busqueda
+            self.trabajador.enviar(
+                Comunicacion.buscar_datos_por_nombre,
+                nombre,
+                contiene=contiene,
+                limite=self.LIMITE_RESULTADOS + 1,
+                al_terminar=lambda datos: busqueda == self._ultima_busqueda
+                and self._mostrar_resultados(datos),
+            )
+        else:
+            # El índice da los ID al instante; las filas que todavía no se muestran
+            # se leen en el hilo de base de datos.
+            ids, total = self.indice.buscar(nombre, self.LIMITE_RESULTADOS)
+            visibles = set() if self.virtual.activa else set(self.tabla.get_children())
+            busqueda = self._ultima_busqueda
+            self.trabajador.enviar(
+                Comunicacion.leer_filas,
+                [ID for ID in ids if str(ID) not in visibles],
+                al_terminar=lambda contactos: busqueda == self._ultima_busqueda
+                and self._mostrar_filas(ids, contactos, total > self.LIMITE_RESULTADOS),
+            )
+            self.trabajador.apurar()
+
+    def _cargar_indice(self):
+        self.trabajador.enviar(IndiceNombres.cargar, al_terminar=self._indice_cargado)
+
+    def _indice_cargado(self, indice):
+        self.indice = indice
+
+    def _mostrar_resultados(self, contactos):
+        # Se pide una fila más que el límite para saber si hay más coincidencias.
+        ids = contactos.ids[: self.LIMITE_RESULTADOS]
+        self._mostrar_filas(ids, contactos, len(contactos) > self.LIMITE_RESULTADOS)
+
+    def _avisar_recorte(self, recortados):
+        self.master.title(
+            f"Resultados (se muestran los primeros {self.LIMITE_RESULTADOS})"
+            if recortados
+            else ""
+        )
+
+    def _mostrar_filas(self, ids, contactos, recortados=False):
+        # Actualiza la lista en vez de rehacerla: al agregar letras solo se borran
+        # los items que dejaron de coincidir, y solo se insertan los que faltan.
+        self._avisar_recorte(recortados)
+        self.virtual.desactivar()
+        quedan = {str(ID) for ID in ids}
+        existentes = set()
+        sobrantes = []
+        for item in self.tabla.get_children():
+            if item in quedan:
+                existentes.add(item)
+            else:
+                sobrantes.append(item)
+        self.tabla.delete(*sobrantes)
+        insertados = 0
+        posicion = 0
+        for ID in ids:
+            iid = str(ID)
+            if iid in existentes:
+                posicion += 1
+            elif (contacto := contactos.buscar(ID)) is not None:
+                self.tabla.insert(
+                    "",
+                    posicion,
+                    iid=iid,
+                    text=contacto.nombre,
+                    values=contacto.valores(),
+                )
+                insertados += 1
+                posicion += 1
+        if self.instrumentacion is not None:
+            self.instrumentacion.contar("items_insertados", insertados)
+
+
+Instrumentacion.medir_metodos(Ventana)
+
+
+SALIDA_OK = 0
+SALIDA_ERROR = 1
+SALIDA_USO = 2
+SALIDA_RECHAZOS = 3
+SALIDA_SIN_RESULTADOS = 4
+
+
+def avisar_en_consola(tipo, titulo, mensaje):
+    """
+    Muestra un aviso en la salida de errores, para el uso sin ventana.
+
+    Args:
+        tipo (str): "error" o "info".
+        titulo (str): El título del aviso.
+        mensaje (str): El texto a mostrar.
+
+    Devuelve:
+        Ninguno
+    """
+    print(f"{titulo}: {mensaje}", file=sys.stderr)
+
+
+def crear_parser():
+    """
+    Arma el parser de la línea de comandos (import, export, search, stats, dupes, sync,
+    backup, restore).
+
+    Devuelve:
+        argparse.ArgumentParser: El parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Agenda UTN. Sin argumentos abre la ventana.",
+        epilog=(
+            f"Códigos de salida: {SALIDA_OK} correcto, {SALIDA_ERROR} error, "
+            f"{SALIDA_USO} uso incorrecto, {SALIDA_RECHAZOS} importación o "
+            f"sincronización con filas rechazadas, {SALIDA_SIN_RESULTADOS} búsqueda "
+            "sin resultados o sin duplicados."
+        ),
+    )
+    parser.add_argument("--db", default="base_datos.db", help="Archivo de la base.")
+    parser.add_argument(
+        "--perfil",
+        choices=sorted(Comunicacion.PERFILES),
+        default=Comunicacion.PERFIL_POR_DEFECTO,
+        help="Perfil de almacenamiento.",
+    )
+    parser.add_argument(
+        "--instrumentar",
+        metavar="ARCHIVO",
+        help="Guarda en ARCHIVO (JSON) los tiempos de métodos y sentencias lentas.",
+    )
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    importar = comandos.add_parser(
+        "import", help="Importa contactos desde un CSV o una planilla xlsx."
+    )
+    importar.add_argument(
+        "archivo", help='CSV o xlsx a importar, o "-" para CSV en la entrada estándar.'
+    )
+    importar.add_argument(
+        "--lote", type=int, default=5000, help="Filas por transacción."
+    )
+    importar.add_argument(
+        "--rechazos", help="CSV donde guardar todas las filas rechazadas."
+    )
+    importar.add_argument(
+        "--procesos",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Procesos que validan en paralelo (por defecto, uno por núcleo).",
+    )
+
+    exportar = comandos.add_parser("export", help="Exporta todos los contactos.")
+    exportar.add_argument(
+        "archivo",
+        help='Archivo xlsx, csv o parquet, o "-" para CSV en la salida estándar.',
+    )
+    exportar.add_argument("--formato", choices=Exportador.FORMATOS)
+    exportar.add_argument("--lote", type=int, default=5000, help="Filas por bloque.")
+    exportar.add_argument(
+        "--cambios",
+        action="store_true",
+        help="Exporta solo los cambios desde la exportación anterior con esa marca.",
+    )
+    exportar.add_argument(
+        "--marca", default="exportacion", help="La marca de --cambios."
+    )
+
+    buscar = comandos.add_parser("search", help="Busca contactos por nombre (CSV).")
+    buscar.add_argument("nombre", help="El nombre o el comienzo del nombre.")
+    buscar.add_argument(
+        "--contiene", action="store_true", help="Busca el texto en cualquier parte."
+    )
+
+    estadisticas = comandos.add_parser("stats", help="Muestra un resumen de la agenda.")
+    estadisticas.add_argument("--json", action="store_true", help="Salida en JSON.")
+
+    duplicados = comandos.add_parser(
+        "dupes", help="Lista los contactos duplicados por grupo (CSV)."
+    )
+    duplicados.add_argument(
+        "--fusionar",
+        action="store_true",
+        help=(
+            "Fusiona los grupos con el mismo correo o teléfono conservando la fila "
+            "de menor ID; los que solo comparten nombre y edad quedan para revisar."
+        ),
+    )
+
+    sincronizar = comandos.add_parser(
+        "sync",
+        help="Concilia la base con una planilla xlsx (por defecto solo la compara).",
+    )
+    sincronizar.add_argument("archivo", help="La planilla xlsx editada.")
+    sincronizar.add_argument(
+        "--aplicar", action="store_true", help="Aplica las altas, cambios y bajas."
+    )
+    sincronizar.add_argument(
+        "--sin-bajas",
+        action="store_true",
+        help="No borra los contactos que faltan en la planilla.",
+    )
+    sincronizar.add_argument(
+        "--lote", type=int, default=1000, help="Filas por transacción."
+    )
+
+    respaldar = comandos.add_parser(
+        "backup", help="Respalda la base de datos, aunque la ventana esté abierta."
+    )
+    respaldar.add_argument(
+        "--carpeta", help='Carpeta de los respaldos (por defecto "respaldos").'
+    )
+    respaldar.add_argument(
+        "--comprimir", action="store_true", help="Comprime el respaldo con gzip."
+    )
+    respaldar.add_argument(
+        "--conservar",
+        type=int,
+        default=Respaldo.CONSERVAR,
+        help="Respaldos a conservar; 0 conserva todos.",
+    )
+    respaldar.add_argument(
+        "--paginas", type=int, default=Respaldo.PAGINAS, help="Páginas por paso."
+    )
+
+    restaurar = comandos.add_parser(
+        "restore", help="Reemplaza todos los contactos por los de un respaldo."
+    )
+    restaurar.add_argument("archivo", help="El respaldo (.db o .db.gz).")
+    restaurar.add_argument(
+        "--paginas", type=int, default=Respaldo.PAGINAS, help="Páginas por paso."
+    )
+    return parser
+
+
+def linea_de_comandos(argumentos):
+    """
+    Ejecuta un comando de la agenda sin crear ningún objeto de Tk.
+
+    Args:
+        argumentos (list): Los argumentos, sin el nombre del programa.
+
+    Devuelve:
+        int: El código de salida del proceso.
+    """
+    parser = crear_parser()
+    try:
+        opciones = parser.parse_args(argumentos)
+    except SystemExit as e:
+        return SALIDA_OK if e.code == 0 else SALIDA_USO
+    instrumentacion = None
+    if opciones.instrumentar:
+        instrumentacion = Instrumentacion(volcado=opciones.instrumentar)
+    try:
+        base_datos = Comunicacion(
+            opciones.db,
+            avisar=avisar_en_consola,
+            perfil=opciones.perfil,
+            instrumentacion=instrumentacion,
+        )
+        try:
+            return COMANDOS_CLI[opciones.comando](base_datos, opciones)
+        finally:
+            base_datos.conexion.close()
+            if instrumentacion is not None:
+                instrumentacion.volcar()
+    except BrokenPipeError:
+        # Quien lee la salida (por ejemplo head) la cerró antes de terminar.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return SALIDA_OK
+    except (sqlite3.Error, OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return SALIDA_ERROR
+
+
+def _cli_importar(base_datos, opciones):
+    if opciones.archivo == "-":
+        entrada = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+        filas = leer_csv(entrada)
+    else:
+        filas = leer_archivo(opciones.archivo)
+    reporte = base_datos.inserta_datos_lote(
+        filas, opciones.lote, procesos=opciones.procesos
+    )
+    rechazadas = reporte["rechazadas"]
+    print(
+        f"Filas importadas: {reporte['aceptadas']}, rechazadas: {len(rechazadas)}",
+        file=sys.stderr,
+    )
+    if opciones.rechazos:
+        with open(opciones.rechazos, "w", newline="", encoding="utf-8") as salida:
+            escritor = csv.writer(salida)
+            escritor.writerow(("Fila", "Datos", "Errores"))
+            for numero, fila, errores in rechazadas:
+                escritor.writerow(
+                    (
+                        numero,
+                        "|".join(str(valor) for valor in fila),
+                        "; ".join(f"{e['campo']}:{e['codigo']}" for e in errores),
+                    )
+                )
+    else:
+        for numero, _, errores in rechazadas[:20]:
+            detalle = "; ".join(error["mensaje"] for error in errores)
+            print(f"  Fila {numero}: {detalle}", file=sys.stderr)
+    return SALIDA_RECHAZOS if rechazadas else SALIDA_OK
+
+
+def _cli_exportar(base_datos, opciones):
+    exportador = Exportador(base_datos, opciones.lote)
+    if opciones.cambios:
+        filas = exportador.exportar_cambios(
+            opciones.archivo, opciones.formato, opciones.marca
+        )
+        print(f"Cambios exportados: {filas}", file=sys.stderr)
+        return SALIDA_OK
+    filas = exportador.exportar(opciones.archivo, opciones.formato)
+    print(f"Filas exportadas: {filas}", file=sys.stderr)
+    return SALIDA_OK
+
+
+def _cli_buscar(base_datos, opciones):
+    escritor = csv.writer(sys.stdout)
+    escritor.writerow(("ID",) + Exportador.COLUMNAS)
+    encontradas = 0
+    for filas in base_datos.iterar_busqueda(opciones.nombre, opciones.contiene):
+        escritor.writerows(filas)
+        encontradas += len(filas)
+    return SALIDA_OK if encontradas else SALIDA_SIN_RESULTADOS
+
+
+def _cli_estadisticas(base_datos, opciones):
+    resumen = base_datos.estadisticas()
+    if opciones.json:
+        print(json.dumps(resumen))
+    else:
+        for clave, valor in resumen.items():
+            print(f"{clave}: {valor}")
+    return SALIDA_OK
+
+
+def _cli_duplicados(base_datos, opciones):
+    deduplicador = Deduplicador(base_datos)
+    grupos = deduplicador.buscar()
+    escritor = csv.writer(sys.stdout)
+    escritor.writerow(("Grupo", "Motivos", "ID") + Exportador.COLUMNAS)
+    for numero, grupo in enumerate(grupos, start=1):
+        motivos = "|".join(grupo["motivos"])
+        escritor.writerows((numero, motivos, *fila) for fila in grupo["filas"])
+    if opciones.fusionar:
+        fusionables = [grupo for grupo in grupos if grupo["fusionable"]]
+        eliminados = deduplicador.fusionar(
+            (grupo["filas"][0].ID, [contacto.ID for contacto in grupo["filas"]])
+            for grupo in fusionables
+        )
+        print(
+            f"Grupos fusionados: {len(fusionables)}, "
+            f"filas eliminadas: {len(eliminados)}, "
+            f"filas completadas: {len(deduplicador.completadas)}, "
+            f"grupos para revisar a mano: {len(grupos) - len(fusionables)}",
+            file=sys.stderr,
+        )
+    return SALIDA_OK if grupos else SALIDA_SIN_RESULTADOS
+
+
+def _cli_sincronizar(base_datos, opciones):
+    sincronizador = Sincronizador(base_datos, opciones.lote)
+    plan = sincronizador.planificar(leer_xlsx(opciones.archivo))
+    print(Sincronizador.resumen(plan), file=sys.stderr)
+    for numero, _, errores in plan["rechazadas"][:20]:
+        detalle = "; ".join(error["mensaje"] for error in errores)
+        print(f"  Fila {numero}: {detalle}", file=sys.stderr)
+    if opciones.aplicar:
+        reporte = sincronizador.aplicar(plan, borrar=not opciones.sin_bajas)
+        print(
+            f"Filas guardadas: {reporte['guardadas']}, "
+            f"eliminadas: {reporte['eliminadas']}",
+            file=sys.stderr,
+        )
+    return SALIDA_RECHAZOS if plan["rechazadas"] else SALIDA_OK
+
+
+def _cli_respaldar(base_datos, opciones):
+    respaldo = Respaldo(
+        base_datos.ruta, opciones.carpeta, opciones.conservar, opciones.paginas
+    )
+    print(respaldo.crear(opciones.comprimir))
+    return SALIDA_OK
+
+
+def _cli_restaurar(base_datos, opciones):
+    respaldo = Respaldo(base_datos.ruta, paginas=opciones.paginas)
+    contactos = respaldo.restaurar(opciones.archivo, base_datos)
+    print(f"Contactos restaurados: {contactos}", file=sys.stderr)
+    return SALIDA_OK
+
+
+COMANDOS_CLI = {
+    "import": _cli_importar,
+    "export": _cli_exportar,
+    "search": _cli_buscar,
+    "stats": _cli_estadisticas,
+    "dupes": _cli_duplicados,
+    "sync": _cli_sincronizar,
+    "backup": _cli_respaldar,
+    "restore": _cli_restaurar,
+}
+
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(linea_de_comandos(sys.argv[1:]))
     ventana = Tk()
     ventana.title("")
     ventana.minsize(height=400, width=600)
@@ -0,0 +1,72 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def crear_base(tmp_path, nombres):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    filas = [
+        (nombre, 30, f"c{numero}@example.com", numero)
+        for numero, nombre in enumerate(nombres)
+    ]
+    assert base_datos.inserta_datos_lote(filas)["aceptadas"] == len(filas)
+    return base_datos
+
+
+def nombres(contactos):
+    return sorted(contacto.nombre for contacto in contactos)
+
+
+def test_limite_prefijo():
+    assert Comunicacion.limite_prefijo("ana") == "anb"
+    # El siguiente de "@" sería "A", que NOCASE compara como "a".
+    assert Comunicacion.limite_prefijo("a@") == "a["
+    assert Comunicacion.limite_prefijo("z") == "{"
+
+
+def test_prefijo_sin_mayusculas_ni_vecinos(tmp_path):
+    base_datos = crear_base(
+        tmp_path, ["Ana Perez", "ANABEL", "anb", "a@x", "a[b", "a_b", "Mariana"]
+    )
+    assert nombres(base_datos.buscar_datos_por_nombre("ana")) == [
+        "ANABEL",
+        "Ana Perez",
+    ]
+    assert nombres(base_datos.buscar_datos_por_nombre("A@")) == ["a@x"]
+    assert base_datos.contar_datos_por_nombre("ana") == 2
+
+
+def test_contiene_con_fts_y_con_like(tmp_path):
+    base_datos = crear_base(
+        tmp_path, ["Ana Perez", "Pedro Gomez", "Lopez Per", "Maria", 'Jo"se']
+    )
+    assert base_datos.fts_disponible
+    assert nombres(base_datos.buscar_datos_por_nombre("per", contiene=True)) == [
+        "Ana Perez",
+        "Lopez Per",
+    ]
+    # Menos de 3 caracteres no entran en el trigram: se busca con LIKE.
+    assert nombres(base_datos.buscar_datos_por_nombre("ez", contiene=True)) == [
+        "Ana Perez",
+        "Lopez Per",
+        "Pedro Gomez",
+    ]
+    assert nombres(base_datos.buscar_datos_por_nombre('o"s', contiene=True)) == [
+        'Jo"se'
+    ]
+    assert nombres(base_datos.buscar_datos_por_nombre("%", contiene=True)) == []
+
+
+def test_eliminar_por_nombre_borra_mas_alla_del_limite(tmp_path):
+    base_datos = crear_base(tmp_path, [f"Perez {numero}" for numero in range(5)])
+    assert len(base_datos.buscar_datos_por_nombre("perez", limite=2)) == 2
+    eliminados = base_datos.elimina_datos_por_nombre("rez", contiene=True)
+    assert len(eliminados) == 5
+    assert base_datos.contar_datos() == 0
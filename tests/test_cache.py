@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def test_repetir_una_lectura_usa_la_cache(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 1
+    aciertos = base_datos.cache.aciertos
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 1
+    assert base_datos.cache.aciertos == aciertos + 1
+
+
+def test_escritura_local_descarta_lo_que_cambia(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    ID = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    assert base_datos.contar_datos() == 1
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 1
+
+    base_datos.inserta_datos("Anabel", 40, "anabel@example.com", 2)
+    assert base_datos.contar_datos() == 2
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 2
+    base_datos.actualiza_datos(ID, "Beatriz", 30, "ana@example.com", 1)
+    assert [c.nombre for c in base_datos.buscar_datos_por_nombre("ana")] == ["Anabel"]
+
+
+def test_escritura_de_otra_conexion_invalida_por_data_version(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+    otra = Comunicacion(ruta, avisar=sin_avisos)
+    base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    assert base_datos.contar_datos() == 1
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 1
+
+    otra.inserta_datos("Anabel", 40, "anabel@example.com", 2)
+    assert base_datos.contar_datos() == 2
+    assert len(base_datos.buscar_datos_por_nombre("ana")) == 2
+
+
+def test_los_resultados_devueltos_son_copias(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    contactos = base_datos.mostrar_datos()
+    contactos.extender([(99, "Intruso", 50, "x@example.com", 3)])
+    assert len(base_datos.mostrar_datos()) == 1
@@ -0,0 +1,92 @@
+import csv
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import (  # noqa: E402
+    SALIDA_ERROR,
+    SALIDA_OK,
+    SALIDA_RECHAZOS,
+    SALIDA_SIN_RESULTADOS,
+    SALIDA_USO,
+    linea_de_comandos,
+)
+
+
+def escribir_csv(ruta, filas):
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(("Nombre", "Edad", "Correo", "Telefono"))
+        escritor.writerows(filas)
+    return str(ruta)
+
+
+def importar(tmp_path, db):
+    archivo = escribir_csv(
+        tmp_path / "contactos.csv",
+        [
+            ("Ana Perez", 30, "ana@example.com", 1),
+            ("Eva Gomez", 40, "eva@example.com", 2),
+        ],
+    )
+    return linea_de_comandos(["--db", db, "import", archivo])
+
+
+def test_importar_y_buscar(tmp_path, capsys):
+    db = str(tmp_path / "agenda.db")
+    assert importar(tmp_path, db) == SALIDA_OK
+
+    capsys.readouterr()
+    assert linea_de_comandos(["--db", db, "search", "ana"]) == SALIDA_OK
+    filas = list(csv.reader(io.StringIO(capsys.readouterr().out)))
+    assert [fila[1] for fila in filas[1:]] == ["Ana Perez"]
+    assert linea_de_comandos(["--db", db, "search", "luis"]) == SALIDA_SIN_RESULTADOS
+
+
+def test_importar_con_filas_rechazadas(tmp_path, capsys):
+    db = str(tmp_path / "agenda.db")
+    archivo = escribir_csv(
+        tmp_path / "contactos.csv",
+        [
+            ("Ana Perez", 30, "ana@example.com", 1),
+            ("Eva Gomez", 10, "eva@example.com", 2),
+        ],
+    )
+    rechazos = str(tmp_path / "rechazos.csv")
+    codigo = linea_de_comandos(["--db", db, "import", archivo, "--rechazos", rechazos])
+    assert codigo == SALIDA_RECHAZOS
+    with open(rechazos, newline="", encoding="utf-8") as salida:
+        filas = list(csv.reader(salida))
+    assert [fila[0] for fila in filas[1:]] == ["2"]
+    assert "importadas: 1" in capsys.readouterr().err
+
+
+def test_argumentos_invalidos(tmp_path, capsys):
+    db = str(tmp_path / "agenda.db")
+    assert linea_de_comandos(["--db", db, "comando-inexistente"]) == SALIDA_USO
+    assert linea_de_comandos(["--db", db, "search"]) == SALIDA_USO
+    assert linea_de_comandos(["--help"]) == SALIDA_OK
+
+
+def test_errores_devuelven_salida_error(tmp_path, capsys):
+    db = str(tmp_path / "agenda.db")
+    assert importar(tmp_path, db) == SALIDA_OK
+    invalido = tmp_path / "RESPALDO roto.db"
+    invalido.write_bytes(b"esto no es una base de datos" * 100)
+    assert linea_de_comandos(["--db", db, "restore", str(invalido)]) == SALIDA_ERROR
+    assert "no es un respaldo" in capsys.readouterr().err
+    faltante = str(tmp_path / "no-existe.csv")
+    assert linea_de_comandos(["--db", db, "import", faltante]) == SALIDA_ERROR
+
+
+def test_respaldar_y_restaurar(tmp_path, capsys):
+    db = str(tmp_path / "agenda.db")
+    assert importar(tmp_path, db) == SALIDA_OK
+    capsys.readouterr()
+    assert linea_de_comandos(["--db", db, "backup", "--comprimir"]) == SALIDA_OK
+    archivo = capsys.readouterr().out.strip()
+    assert archivo.endswith(".db.gz")
+    assert linea_de_comandos(["--db", db, "restore", archivo]) == SALIDA_OK
+    assert "Contactos restaurados: 2" in capsys.readouterr().err
@@ -0,0 +1,90 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion, EscrituraDiferida  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def cerrar_sin_guardar(base_datos):
+    # Simula un cierre inesperado: el diario queda escrito pero sin guardar.
+    base_datos.diferidas._archivo.close()
+    base_datos.diferidas = None
+    base_datos._conexion.close()
+
+
+def test_combinar_por_id():
+    pendientes = {}
+    EscrituraDiferida.combinar(pendientes, ["alta", 1, "Ana", 30, "a@x.com", 1, 5.0])
+    EscrituraDiferida.combinar(pendientes, ["cambio", 1, "Ana B", 31, "a@x.com", 1, 0])
+    assert pendientes[1] == ["alta", 1, "Ana B", 31, "a@x.com", 1, 5.0]
+    EscrituraDiferida.combinar(pendientes, ["baja", 1, 0])
+    assert pendientes == {}
+
+    EscrituraDiferida.combinar(pendientes, ["cambio", 2, "Eva", 40, "e@x.com", 2, 3])
+    EscrituraDiferida.combinar(pendientes, ["cambio", 2, "Eva M", 41, "e@x.com", 2, 3])
+    assert pendientes[2] == ["cambio", 2, "Eva M", 41, "e@x.com", 2, 3]
+    EscrituraDiferida.combinar(pendientes, ["baja", 2, 3])
+    EscrituraDiferida.combinar(pendientes, ["cambio", 2, "Eva", 40, "e@x.com", 2, 3])
+    assert pendientes[2] == ["baja", 2, 3]
+
+
+def test_ediciones_seguidas_quedan_en_una(tmp_path):
+    base_datos = Comunicacion(
+        str(tmp_path / "agenda.db"), avisar=sin_avisos, diferir=60
+    )
+    ID = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    for edad in range(31, 36):
+        base_datos.actualiza_datos(ID, "Ana Perez", edad, "ana@example.com", 1)
+    assert list(base_datos.diferidas.pendientes) == [ID]
+    assert base_datos.diferidas.pendientes[ID][0] == "alta"
+
+    assert [tuple(c) for c in base_datos.mostrar_datos()] == [
+        (ID, "Ana Perez", 35, "ana@example.com", 1)
+    ]
+    assert base_datos.diferidas.pendientes == {}
+    assert not os.path.exists(base_datos.diferidas.ruta)
+
+
+def test_recupera_el_diario_tras_un_cierre_inesperado(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    base_datos = Comunicacion(ruta, avisar=sin_avisos, diferir=60)
+    ID = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    otro = base_datos.inserta_datos("Eva Gomez", 40, "eva@example.com", 2)
+    base_datos.elimina_datos(otro)
+    cerrar_sin_guardar(base_datos)
+
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+    assert [tuple(c) for c in base_datos.mostrar_datos()] == [
+        (ID, "Ana Perez", 30, "ana@example.com", 1)
+    ]
+    assert not os.path.exists(ruta + "-diferidas")
+
+
+def test_no_pisa_una_fila_cambiada_despues(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    base_datos = Comunicacion(ruta, avisar=sin_avisos, diferir=60)
+    otra = Comunicacion(ruta, avisar=sin_avisos)
+    ID = otra.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    base_datos.actualiza_datos(ID, "Ana Vieja", 31, "ana@example.com", 1)
+    cerrar_sin_guardar(base_datos)
+    otra.actualiza_datos(ID, "Ana Nueva", 32, "ana@example.com", 1)
+
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+    assert [c.nombre for c in base_datos.mostrar_datos()] == ["Ana Nueva"]
+
+
+def test_no_recupera_el_diario_de_una_conexion_abierta(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    base_datos = Comunicacion(ruta, avisar=sin_avisos, diferir=60)
+    ID = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+
+    otra = Comunicacion(ruta, avisar=sin_avisos)
+    assert os.path.exists(ruta + "-diferidas")
+    assert otra.contar_datos() == 0
+    assert base_datos.contar_datos() == 1
+    assert otra.mostrar_datos().ids.tolist() == [ID]
@@ -0,0 +1,88 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion, Deduplicador  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def crear_base(tmp_path, filas):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    ids = [base_datos.inserta_datos(*fila) for fila in filas]
+    assert None not in ids
+    return base_datos, ids
+
+
+def grupos(base_datos):
+    return [
+        ([contacto.ID for contacto in grupo["filas"]], grupo["fusionable"])
+        for grupo in Deduplicador(base_datos).buscar()
+    ]
+
+
+def test_correo_y_telefono_agrupan_de_forma_transitiva(tmp_path):
+    base_datos, (ana, ana_trabajo, ana_casa, eva) = crear_base(
+        tmp_path,
+        [
+            ("Ana Perez", 30, "ana@example.com", 5551234567),
+            ("A. Perez", 31, "ANA@example.com ", 5559990000),
+            ("Perez Ana", 32, "casa@example.com", 15559990000),
+            ("Eva Gomez", 40, "eva@example.com", 5550001111),
+        ],
+    )
+    assert grupos(base_datos) == [([ana, ana_trabajo, ana_casa], True)]
+
+
+def test_etiqueta_solo_en_los_proveedores_que_la_entregan():
+    assert Deduplicador.normalizar_correo("Ana+Trabajo@Gmail.com") == "ana@gmail.com"
+    assert (
+        Deduplicador.normalizar_correo("ana+trabajo@example.com")
+        == "ana+trabajo@example.com"
+    )
+
+
+def test_etiquetas_en_gmail_agrupan_y_en_otro_dominio_no(tmp_path):
+    base_datos, (ana, ana_etiqueta, eva, eva_etiqueta) = crear_base(
+        tmp_path,
+        [
+            ("Ana Perez", 30, "ana@gmail.com", 1),
+            ("Ana P", 31, "ana+compras@gmail.com", 2),
+            ("Eva Gomez", 40, "eva@example.com", 3),
+            ("Eva G", 41, "eva+compras@example.com", 4),
+        ],
+    )
+    assert grupos(base_datos) == [([ana, ana_etiqueta], True)]
+
+
+def test_nombre_y_edad_solo_se_agrupan_para_revisar(tmp_path):
+    base_datos, (ana, otra_ana, eva) = crear_base(
+        tmp_path,
+        [
+            ("Ana Pérez", 30, "ana@example.com", 1),
+            ("perez ana", 30, "otra@example.com", 2),
+            ("Ana Perez", 31, "eva@example.com", 3),
+        ],
+    )
+    assert grupos(base_datos) == [([ana, otra_ana], False)]
+
+
+def test_fusionar_completa_los_campos_vacios(tmp_path):
+    base_datos, (ana, duplicada) = crear_base(
+        tmp_path,
+        [
+            ("Ana Perez", 30, "ana@example.com", 0),
+            ("Ana P", 31, "ana@example.com", 5551234567),
+        ],
+    )
+    deduplicador = Deduplicador(base_datos)
+    assert deduplicador.fusionar([(ana, [ana, duplicada])]) == [duplicada]
+    assert [tuple(c) for c in deduplicador.completadas] == [
+        (ana, "Ana Perez", 30, "ana@example.com", 5551234567)
+    ]
+    assert [tuple(c) for c in base_datos.mostrar_datos()] == [
+        (ana, "Ana Perez", 30, "ana@example.com", 5551234567)
+    ]
@@ -0,0 +1,61 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion, Exportador  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def leer_cambios(ruta):
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        filas = list(csv.reader(archivo))
+    assert tuple(filas[0]) == Exportador.COLUMNAS_CAMBIOS
+    return {int(fila[0]): (fila[1], fila[6]) for fila in filas[1:]}
+
+
+def contar_bajas(base_datos):
+    return base_datos.conexion.execute(
+        "SELECT COUNT(*) FROM datos_borrados"
+    ).fetchone()[0]
+
+
+def test_la_marca_avanza_y_exporta_solo_lo_nuevo(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    exportador = Exportador(base_datos)
+    ana = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    eva = base_datos.inserta_datos("Eva Gomez", 40, "eva@example.com", 2)
+    luis = base_datos.inserta_datos("Luis Diaz", 50, "luis@example.com", 3)
+
+    assert exportador.exportar_cambios(str(tmp_path / "uno.csv")) == 3
+    assert base_datos.marca_exportacion("exportacion") == base_datos.version_cambios()
+
+    base_datos.actualiza_datos(eva, "Eva Martinez", 41, "eva@example.com", 2)
+    base_datos.elimina_datos(luis)
+    assert exportador.exportar_cambios(str(tmp_path / "dos.csv")) == 2
+    cambios = leer_cambios(str(tmp_path / "dos.csv"))
+    assert cambios == {eva: ("Eva Martinez", "0"), luis: ("", "1")}
+    assert ana not in cambios
+
+    assert exportador.exportar_cambios(str(tmp_path / "tres.csv")) == 0
+
+
+def test_las_bajas_se_podan_cuando_todas_las_marcas_pasan(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    exportador = Exportador(base_datos)
+    ID = base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    exportador.exportar_cambios(str(tmp_path / "a.csv"), marca="a")
+    exportador.exportar_cambios(str(tmp_path / "b.csv"), marca="b")
+    base_datos.elimina_datos(ID)
+    assert contar_bajas(base_datos) == 1
+
+    exportador.exportar_cambios(str(tmp_path / "a2.csv"), marca="a")
+    # La marca "b" todavía no exportó la baja.
+    assert contar_bajas(base_datos) == 1
+    exportador.exportar_cambios(str(tmp_path / "b2.csv"), marca="b")
+    assert leer_cambios(str(tmp_path / "b2.csv")) == {ID: ("", "1")}
+    assert contar_bajas(base_datos) == 0
@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def filas_con_errores(cantidad, invalidas):
+    filas = []
+    for numero in range(1, cantidad + 1):
+        edad = 10 if numero in invalidas else 30
+        filas.append((f"Contacto {numero}", edad, f"c{numero}@example.com", numero))
+    return filas
+
+
+def test_rechazos_en_orden_del_archivo_con_varios_procesos(tmp_path):
+    invalidas = {2, 9, 10, 17, 31}
+    filas = filas_con_errores(32, invalidas)
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+
+    reporte = base_datos.inserta_datos_lote(filas, tamano_lote=4, procesos=2)
+
+    assert reporte["aceptadas"] == len(filas) - len(invalidas)
+    assert [numero for numero, _, _ in reporte["rechazadas"]] == sorted(invalidas)
+    for numero, fila, errores in reporte["rechazadas"]:
+        assert tuple(fila) == filas[numero - 1]
+        assert [error["campo"] for error in errores] == ["edad"]
+    # Las válidas se escriben en el orden del archivo.
+    assert [c.nombre for c in base_datos.mostrar_datos()] == [
+        f"Contacto {numero}"
+        for numero in range(1, len(filas) + 1)
+        if numero not in invalidas
+    ]
+
+
+def test_mismo_reporte_con_uno_y_con_varios_procesos(tmp_path):
+    filas = filas_con_errores(20, {1, 7, 20})
+    uno = Comunicacion(str(tmp_path / "uno.db"), avisar=sin_avisos)
+    varios = Comunicacion(str(tmp_path / "varios.db"), avisar=sin_avisos)
+    reporte = uno.inserta_datos_lote(filas, tamano_lote=3)
+    assert reporte == varios.inserta_datos_lote(filas, tamano_lote=3, procesos=2)
@@ -0,0 +1,90 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion  # noqa: E402
+
+# El esquema de las bases anteriores a las migraciones.
+ESQUEMA_ANTIGUO = """CREATE TABLE "datos" (
+    "ID" INTEGER,
+    "NOMBRE" TEXT,
+    "EDAD" NUMERIC,
+    "CORREO" TEXT,
+    "TELEFONO" NUMERIC,
+    PRIMARY KEY("ID" AUTOINCREMENT)
+)"""
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def crear_base_antigua(ruta):
+    conexion = sqlite3.connect(ruta)
+    conexion.execute(ESQUEMA_ANTIGUO)
+    conexion.executemany(
+        "INSERT INTO datos (ID, NOMBRE, EDAD, CORREO, TELEFONO) VALUES (?, ?, ?, ?, ?)",
+        [
+            (32, "boca juniors", "51", "boca@gmail.com", "32423"),
+            (34, "fidji", 40, "fidji@hotmail.com", 9876100),
+            (43, "wales", 46, "det@dwwd.com", 67855),
+        ],
+    )
+    # La última fila se borró: el contador de AUTOINCREMENT queda en 43.
+    conexion.execute("DELETE FROM datos WHERE ID = 43")
+    conexion.commit()
+    conexion.close()
+
+
+def test_migra_base_antigua_conservando_ids_y_contador(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    crear_base_antigua(ruta)
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+
+    version = base_datos.conexion.execute("PRAGMA user_version").fetchone()[0]
+    assert version == len(Comunicacion.MIGRACIONES)
+    filas = base_datos.conexion.execute(
+        "SELECT ID, NOMBRE, typeof(EDAD), typeof(TELEFONO), VERSION FROM datos"
+    ).fetchall()
+    assert filas == [
+        (32, "boca juniors", "integer", "integer", 0),
+        (34, "fidji", "integer", "integer", 0),
+    ]
+    reporte = base_datos.inserta_datos_lote([("Ana Perez", 30, "ana@example.com", 1)])
+    assert reporte["aceptadas"] == 1
+    assert base_datos.mostrar_datos().ids.tolist() == [32, 34, 44]
+
+
+def test_migraciones_crean_registro_de_cambios_e_indices(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    crear_base_antigua(ruta)
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+
+    nombres = {
+        fila[0]
+        for fila in base_datos.conexion.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'index', 'trigger')"
+        )
+    }
+    assert {
+        "datos_borrados",
+        "contador_cambios",
+        "marcas_exportacion",
+        "datos_cambio_alta",
+        "idx_datos_nombre",
+        "idx_datos_dominio_correo",
+    } <= nombres
+    base_datos.elimina_datos(32)
+    assert base_datos.conexion.execute("SELECT ID FROM datos_borrados").fetchall() == [
+        (32,)
+    ]
+
+
+def test_abrir_de_nuevo_no_vuelve_a_migrar(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    Comunicacion(ruta, avisar=sin_avisos).conexion.close()
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+    assert base_datos.migrar() == len(Comunicacion.MIGRACIONES)
+    assert base_datos.contar_datos() == 0
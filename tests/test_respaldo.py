@@ -0,0 +1,86 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion, Exportador, Respaldo  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def crear_base(tmp_path):
+    ruta = str(tmp_path / "agenda.db")
+    base_datos = Comunicacion(ruta, avisar=sin_avisos)
+    base_datos.inserta_datos("Ana Perez", 30, "ana@example.com", 1)
+    base_datos.inserta_datos("Eva Gomez", 40, "eva@example.com", 2)
+    return base_datos, Respaldo(ruta, carpeta=str(tmp_path / "respaldos"))
+
+
+def datos(base_datos):
+    return [tuple(c) for c in base_datos.mostrar_datos()]
+
+
+@pytest.mark.parametrize("comprimir", [False, True])
+def test_restaurar_devuelve_los_datos_del_respaldo(tmp_path, comprimir):
+    base_datos, respaldo = crear_base(tmp_path)
+    antes = datos(base_datos)
+    archivo = respaldo.crear(comprimir=comprimir)
+    assert archivo.endswith(".db.gz" if comprimir else ".db")
+    assert respaldo.listar() == [archivo]
+
+    base_datos.elimina_datos(antes[0][0])
+    base_datos.inserta_datos("Luis Diaz", 50, "luis@example.com", 3)
+    assert respaldo.restaurar(archivo, base_datos) == 2
+    assert datos(base_datos) == antes
+    assert os.listdir(respaldo.carpeta) == [os.path.basename(archivo)]
+
+
+def test_restaurar_un_archivo_invalido_no_toca_la_base(tmp_path):
+    base_datos, respaldo = crear_base(tmp_path)
+    antes = datos(base_datos)
+    invalido = tmp_path / "RESPALDO roto.db"
+    invalido.write_bytes(b"esto no es una base de datos" * 100)
+    with pytest.raises(ValueError):
+        respaldo.restaurar(str(invalido), base_datos)
+    assert datos(base_datos) == antes
+
+
+def test_podar_conserva_los_mas_recientes(tmp_path):
+    base_datos, respaldo = crear_base(tmp_path)
+    os.makedirs(respaldo.carpeta)
+    viejos = []
+    for numero in range(4):
+        ruta = os.path.join(respaldo.carpeta, f"RESPALDO {numero}.db")
+        open(ruta, "wb").close()
+        os.utime(ruta, (numero, numero))
+        viejos.append(ruta)
+    respaldo.conservar = 2
+    nuevo = respaldo.crear()
+    assert respaldo.listar() == [nuevo, viejos[3]]
+
+
+def test_restaurar_sigue_el_registro_de_cambios(tmp_path):
+    base_datos, respaldo = crear_base(tmp_path)
+    exportador = Exportador(base_datos)
+    archivo = respaldo.crear()
+    luis = base_datos.inserta_datos("Luis Diaz", 50, "luis@example.com", 3)
+    exportador.exportar_cambios(str(tmp_path / "uno.csv"))
+    version = base_datos.version_cambios()
+
+    respaldo.restaurar(archivo, base_datos)
+    assert base_datos.version_cambios() > version
+    assert base_datos.marca_exportacion("exportacion") == version
+    cambios = [
+        (fila[0], fila[6])
+        for bloque in base_datos.iterar_cambios(version, base_datos.version_cambios())
+        for fila in bloque
+    ]
+    assert sorted(cambios) == sorted(
+        [(ID, 0) for ID, *_ in datos(base_datos)] + [(luis, 1)]
+    )
+    # El ID del contacto borrado no se vuelve a usar.
+    assert base_datos.inserta_datos("Sol Ruiz", 20, "sol@example.com", 4) > luis
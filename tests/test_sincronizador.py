@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import Comunicacion, Sincronizador  # noqa: E402
+
+
+def sin_avisos(tipo, titulo, mensaje):
+    pass
+
+
+def crear_base(tmp_path):
+    base_datos = Comunicacion(str(tmp_path / "agenda.db"), avisar=sin_avisos)
+    base_datos.inserta_datos_lote(
+        [
+            ("Ana Perez", 30, "ana@example.com", 1155550001),
+            ("Bruno Diaz", 40, "bruno@example.com", 1155550002),
+        ]
+    )
+    return base_datos
+
+
+def test_fila_rechazada_no_borra_su_contacto(tmp_path):
+    base_datos = crear_base(tmp_path)
+    filas = [
+        ("Ana Perez", 400, "ana@example.com", 1155550001),
+        ("Bruno Diaz", 40, "bruno@example.com", 1155550002),
+    ]
+    sincronizador = Sincronizador(base_datos)
+    plan = sincronizador.planificar(filas)
+    assert len(plan["rechazadas"]) == 1
+    assert plan["bajas"] == []
+    reporte = sincronizador.aplicar(plan, borrar=True)
+    assert reporte["eliminadas"] == 0
+    assert base_datos.contar_datos() == 2
+
+
+def test_con_filas_rechazadas_no_se_aplican_bajas(tmp_path):
+    base_datos = crear_base(tmp_path)
+    # La fila rechazada tampoco coincide por correo ni teléfono.
+    filas = [
+        ("Ana Perez", 400, "otro@example.com", 1),
+        ("Bruno Diaz", 40, "bruno@example.com", 1155550002),
+    ]
+    sincronizador = Sincronizador(base_datos)
+    plan = sincronizador.planificar(filas)
+    assert len(plan["bajas"]) == 1
+    reporte = sincronizador.aplicar(plan, borrar=True)
+    assert reporte["eliminadas"] == 0
+    assert base_datos.contar_datos() == 2